@@ -0,0 +1,223 @@
+import logging
+import os
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from subscriptions import SUBSCRIPTION_CELL_DEGREES, Subscription, SubscriptionIndex
+from text import tokenize
+
+logger = logging.getLogger(__name__)
+
+# Deals listed in the body of one alert notification
+ALERT_NOTIFICATION_MAX_DEALS = int(os.environ.get('ALERT_NOTIFICATION_MAX_DEALS', '3'))
+
+PENDING = "pending"
+
+
+class Alert(Subscription):
+    """
+    A saved deal alert: the area and filters of a Subscription, the keyword phrases
+    of which a deal must contain at least one, and the browser push subscription
+    notifications go to
+    """
+
+    __slots__ = ("keywords", "push_subscription")
+
+    def __init__(self, document: Dict[str, Any]):
+        super().__init__(
+            document["id"], document["lat"], document["lng"], document["radius"],
+            document.get("category"), document.get("min_discount")
+        )
+        phrases = (tuple(tokenize(keyword)) for keyword in document.get("keywords") or [])
+        self.keywords: List[Tuple[str, ...]] = [phrase for phrase in phrases if phrase]
+        self.push_subscription = document.get("push_subscription")
+
+
+class AlertIndex:
+    """
+    Matches deals against saved alerts without visiting each alert. Alerts without
+    keywords live in one SubscriptionIndex; alerts with keywords are filed in an
+    inverted index from the first word of each phrase to a SubscriptionIndex of its
+    own. A deal only consults the spatial indexes of the words it contains, one grid
+    cell each, and checks the rest of a phrase for the few alerts found there.
+    """
+
+    def __init__(self, cell_degrees: float = SUBSCRIPTION_CELL_DEGREES):
+        self.cell_degrees = cell_degrees
+        self._anywhere = SubscriptionIndex(cell_degrees)
+        self._by_keyword: Dict[str, SubscriptionIndex] = {}
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def _indexes(self, alert: Alert) -> Iterable[Tuple[Optional[str], Optional[SubscriptionIndex]]]:
+        if not alert.keywords:
+            return [(None, self._anywhere)]
+        return [(word, self._by_keyword.get(word)) for word in {phrase[0] for phrase in alert.keywords}]
+
+    def add(self, alert: Alert):
+        for word, index in self._indexes(alert):
+            if index is None:
+                index = self._by_keyword[word] = SubscriptionIndex(self.cell_degrees)
+            index.add(alert)
+        self._count += 1
+
+    def remove(self, alert: Alert):
+        for word, index in self._indexes(alert):
+            if index is None:
+                continue
+            index.remove(alert)
+            if word is not None and not len(index):
+                del self._by_keyword[word]
+        self._count -= 1
+
+    def match(self, document: Dict[str, Any]) -> Dict[Alert, float]:
+        """
+        Alerts a stored deal document satisfies, with the deal's distance from each
+        """
+        location = document["location"]
+        lat, lng = location["lat"], location["lng"]
+        category, discount = document.get("category"), document.get("discount_percentage")
+
+        matches = dict(self._anywhere.match(lat, lng, category, discount))
+        if self._by_keyword:
+            words = set(tokenize(document.get("title") or "")) | set(tokenize(document.get("description") or ""))
+            for word in words:
+                index = self._by_keyword.get(word)
+                if index is None:
+                    continue
+                for alert, distance in index.match(lat, lng, category, discount):
+                    if alert in matches:
+                        continue
+                    if any(phrase[0] == word and all(token in words for token in phrase) for phrase in alert.keywords):
+                        matches[alert] = distance
+        return matches
+
+
+def notification_payload(deals: List[Tuple[float, Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    Push message in the shape public/service-worker.js shows: title, body, icon, badge and url.
+    deals are (distance, document) pairs, nearest first.
+    """
+    _, best = deals[0]
+    if len(deals) == 1:
+        title = f"{best['discount_percentage']:g}% off at {best['business_name']}"
+    else:
+        title = f"{len(deals)} new deals near you"
+    lines = [
+        f"{deal['title']} - {deal['discount_percentage']:g}% off, {deal_distance:.1f} mi"
+        for deal_distance, deal in deals[:ALERT_NOTIFICATION_MAX_DEALS]
+    ]
+    if len(deals) > ALERT_NOTIFICATION_MAX_DEALS:
+        lines.append(f"and {len(deals) - ALERT_NOTIFICATION_MAX_DEALS} more")
+    return {
+        "title": title,
+        "body": "\n".join(lines),
+        "icon": best.get("image_url") or None,
+        "badge": None,
+        "url": best.get("url"),
+    }
+
+
+class DealAlerts:
+    """
+    Saved alerts kept in memory and matched against every deal DealWriter inserts.
+    publish() turns a write batch into at most one notification per matching alert;
+    deliver() hands the pending notifications to the push outbox, where the web-push
+    sender picks them up with the browser subscription they are addressed to.
+    Like the deal index, alerts saved by other processes are only seen after load().
+    """
+
+    def __init__(self, cell_degrees: float = SUBSCRIPTION_CELL_DEGREES):
+        self._index = AlertIndex(cell_degrees)
+        self._by_id: Dict[str, Alert] = {}
+        self._pending: List[Dict[str, Any]] = []
+
+    def __len__(self):
+        return len(self._by_id)
+
+    async def load(self, collection) -> int:
+        """
+        Replace the alerts in memory with every alert in the collection
+        """
+        self._index = AlertIndex(self._index.cell_degrees)
+        self._by_id = {}
+        async for document in collection.find({}, {"_id": 0}):
+            self.add(document)
+        logger.info(f"Loaded {len(self)} deal alerts")
+        return len(self)
+
+    def add(self, document: Dict[str, Any]) -> Alert:
+        self.remove(document["id"])
+        alert = Alert(document)
+        self._by_id[alert.id] = alert
+        self._index.add(alert)
+        return alert
+
+    def remove(self, alert_id: str) -> bool:
+        alert = self._by_id.pop(alert_id, None)
+        if alert is None:
+            return False
+        self._index.remove(alert)
+        return True
+
+    def notifications(self, documents: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        One web-push notification per alert matched by any of the deal documents
+        """
+        if not self._by_id:
+            return []
+        matched: Dict[Alert, List[Tuple[float, Dict[str, Any]]]] = {}
+        for document in documents:
+            for alert, distance in self._index.match(document).items():
+                matched.setdefault(alert, []).append((distance, document))
+
+        now = datetime.now()
+        batch = []
+        for alert, deals in matched.items():
+            deals.sort(key=lambda pair: pair[0])
+            batch.append({
+                "id": str(uuid.uuid4()),
+                "alert_id": alert.id,
+                "subscription": alert.push_subscription,
+                "payload": notification_payload(deals),
+                "deal_ids": [deal["id"] for _, deal in deals],
+                "status": PENDING,
+                "created_at": now,
+            })
+        return batch
+
+    def publish(self, documents: Iterable[Dict[str, Any]]) -> int:
+        """
+        Queue the notifications for newly inserted deals and return how many were queued
+        """
+        batch = self.notifications(documents)
+        self._pending.extend(batch)
+        return len(batch)
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def drain(self) -> List[Dict[str, Any]]:
+        batch, self._pending = self._pending, []
+        return batch
+
+    async def deliver(self, outbox) -> int:
+        """
+        Write the pending notifications to the outbox collection in one insert
+        """
+        batch = self.drain()
+        if not batch:
+            return 0
+        try:
+            await outbox.insert_many(batch, ordered=False)
+        except Exception as e:
+            logger.error(f"Could not queue {len(batch)} alert notifications: {e}")
+            return 0
+        return len(batch)
+
+
+deal_alerts = DealAlerts()
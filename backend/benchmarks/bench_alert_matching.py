@@ -0,0 +1,96 @@
+"""
+Cost of matching newly scraped deals against saved alerts: the alert index (keyword
+inverted index over per-keyword subscription grids) versus checking every alert.
+
+Alerts sit around the generated stores with a 1-5 mile radius; four in five have
+keywords drawn from the generated deal titles, a third a category and a third a
+minimum discount.
+
+Run from backend/:  python benchmarks/bench_alert_matching.py --alerts 200000 --deals 2000
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from alerts import Alert, AlertIndex  # noqa: E402
+from datagen import ITEMS, synthetic_deals, synthetic_stores  # noqa: E402
+from geo import calculate_distance  # noqa: E402
+from text import tokenize  # noqa: E402
+
+
+def synthetic_alerts(count, stores, seed):
+    rng = random.Random(seed)
+    words = sorted({item.lower() for items in ITEMS.values() for item in items})
+    for i in range(count):
+        store = rng.choice(stores)
+        yield {
+            "id": f"alert-{i}",
+            "lat": store["lat"] + rng.gauss(0, 0.03),
+            "lng": store["lng"] + rng.gauss(0, 0.03),
+            "radius": rng.uniform(1, 5),
+            "category": rng.choice(["retail", "restaurant"]) if rng.random() < 0.33 else None,
+            "min_discount": rng.choice([20, 30, 50]) if rng.random() < 0.33 else None,
+            "keywords": rng.sample(words, rng.randint(1, 2)) if rng.random() < 0.8 else [],
+        }
+
+
+def scan(alerts, document):
+    """
+    The loop the index replaces: every alert checked against the deal
+    """
+    location = document["location"]
+    words = set(tokenize(document["title"])) | set(tokenize(document["description"]))
+    matches = []
+    for alert in alerts:
+        if alert.category and alert.category != document["category"]:
+            continue
+        if alert.min_discount is not None and document["discount_percentage"] < alert.min_discount:
+            continue
+        if alert.keywords and not any(all(token in words for token in phrase) for phrase in alert.keywords):
+            continue
+        if calculate_distance(alert.lat, alert.lng, location["lat"], location["lng"]) <= alert.radius:
+            matches.append(alert)
+    return matches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--alerts", type=int, default=200000)
+    parser.add_argument("--deals", type=int, default=2000)
+    parser.add_argument("--scan-deals", type=int, default=20, help="Deals matched by the full scan, which is slow")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    stores = synthetic_stores(2000, args.seed)
+    alerts = [Alert(document) for document in synthetic_alerts(args.alerts, stores, args.seed)]
+    deals = list(synthetic_deals(args.deals, args.seed, stores))
+
+    start = time.perf_counter()
+    index = AlertIndex()
+    for alert in alerts:
+        index.add(alert)
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    matched = sum(len(index.match(deal)) for deal in deals)
+    indexed = (time.perf_counter() - start) / len(deals)
+
+    sample = deals[:args.scan_deals]
+    start = time.perf_counter()
+    scanned = [scan(alerts, deal) for deal in sample]
+    full_scan = (time.perf_counter() - start) / len(sample)
+    agree = all({alert.id for alert in found} == {alert.id for alert in index.match(deal)} for deal, found in zip(sample, scanned))
+
+    print(f"{args.alerts} alerts, {args.deals} deals, {matched / len(deals):.1f} matches per deal")
+    print(f"  index build      {build:8.2f} s")
+    print(f"  alert index      {indexed * 1e6:10.1f} us/deal")
+    print(f"  full scan        {full_scan * 1e6:10.1f} us/deal  ({full_scan / indexed:.0f}x slower)")
+    print(f"  same matches     {agree}")
+
+
+if __name__ == "__main__":
+    main()
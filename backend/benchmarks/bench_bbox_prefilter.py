@@ -0,0 +1,104 @@
+"""
+How many exact distance evaluations the bounding-box prefilter saves as the deal
+collection grows.
+
+Deals are clustered around a few city centers and every query asks for deals near
+Brigade Road, Bengaluru. For each collection size the script compares:
+
+  full scan   exact distance for every deal (what a query without a spatial bound pays)
+  bbox        lat/lng box check for every deal, exact distance only inside the box
+  grid+bbox   the deal index: grid cells overlapping the box, box check, exact distance
+
+Run from backend/:  python benchmarks/bench_bbox_prefilter.py --sizes 1000 100000 1000000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from deal_index import DealIndex  # noqa: E402
+from geo import bounding_box, calculate_distances, in_bounding_box  # noqa: E402
+
+CITY_CENTERS = [
+    (12.9716, 77.5946),   # Bengaluru
+    (37.7749, -122.4194),  # San Francisco
+    (40.7128, -74.0060),  # New York
+    (51.5074, -0.1278),   # London
+    (19.0760, 72.8777),   # Mumbai
+]
+QUERY = (12.9720, 77.6081)
+
+
+def synthetic_coordinates(count, seed):
+    rng = np.random.default_rng(seed)
+    centers = np.array(CITY_CENTERS)[rng.integers(0, len(CITY_CENTERS), count)]
+    # Roughly a 10 mile spread around each center
+    lats = centers[:, 0] + rng.normal(0, 0.1, count)
+    lngs = centers[:, 1] + rng.normal(0, 0.1, count)
+    return lats, lngs
+
+
+def best_of(repeats, fn):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def bench(count, radius, repeats, seed):
+    lats, lngs = synthetic_coordinates(count, seed)
+    box = bounding_box(*QUERY, radius)
+
+    def full_scan():
+        distances = calculate_distances(*QUERY, lats, lngs)
+        return int(np.count_nonzero(distances <= radius)), count
+
+    def bbox():
+        inside = np.flatnonzero(in_bounding_box(lats, lngs, box))
+        distances = calculate_distances(*QUERY, lats[inside], lngs[inside])
+        return int(np.count_nonzero(distances <= radius)), len(inside)
+
+    index = DealIndex()
+    index.upsert_many(
+        {"id": f"{i:08d}", "deal_key": str(i), "store_key": str(i % 1000), "category": "retail",
+         "discount_percentage": 30.0, "location": {"lat": float(lat), "lng": float(lng), "address": ""}}
+        for i, (lat, lng) in enumerate(zip(lats, lngs))
+    )
+    candidates = np.fromiter(index._grid.query_box(*box), dtype=np.intp)
+    grid_evaluated = int(np.count_nonzero(in_bounding_box(index._lats[candidates], index._lngs[candidates], box)))
+
+    def grid_bbox():
+        return len(index.nearest(*QUERY, radius)), grid_evaluated
+
+    rows = []
+    for name, fn in (("full scan", full_scan), ("bbox", bbox), ("grid+bbox", grid_bbox)):
+        seconds, (matches, evaluated) = best_of(repeats, fn)
+        rows.append((name, matches, evaluated, seconds))
+    return rows, len(candidates)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--radius", type=float, default=5.0, help="Search radius in miles")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{'deals':>9}  {'strategy':<10} {'matches':>8} {'exact evals':>12} {'saved':>7} {'ms':>9}")
+    for count in args.sizes:
+        rows, grid_candidates = bench(count, args.radius, args.repeats, args.seed)
+        for name, matches, evaluated, seconds in rows:
+            saved = 1 - evaluated / count
+            print(f"{count:>9}  {name:<10} {matches:>8} {evaluated:>12} {saved:>7.1%} {seconds * 1000:>9.3f}")
+        print(f"{'':>9}  grid cells yielded {grid_candidates} candidates before the box check")
+
+
+if __name__ == "__main__":
+    main()
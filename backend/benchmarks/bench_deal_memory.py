@@ -0,0 +1,87 @@
+"""
+Memory held by the active deal working set: plain document dicts, as the read path
+used to pass around, versus the deal index's slotted records and coordinate arrays.
+
+Run from backend/:  python benchmarks/bench_deal_memory.py --count 300000
+"""
+import argparse
+import gc
+import random
+import sys
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from deal_index import DealIndex  # noqa: E402
+
+STORES = [
+    (f"Store {i}", random.Random(i).choice(["retail", "restaurant"]), f"{i} Brigade Road, Bengaluru")
+    for i in range(500)
+]
+
+
+def documents(count, seed):
+    """
+    Stored-deal dicts; each one's strings are built separately, as documents decoded
+    from BSON are
+    """
+    rng = random.Random(seed)
+    now = datetime(2025, 4, 1)
+    for i in range(count):
+        name, category, address = rng.choice(STORES)
+        yield {
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "title": f"{rng.randint(10, 70)}% off item {i}",
+            "description": f"Limited time offer on item {i}",
+            "discount_percentage": float(rng.randint(10, 70)),
+            "original_price": float(rng.randint(100, 5000)),
+            "sale_price": float(rng.randint(50, 2500)),
+            "business_name": "".join(name),
+            "category": "".join(category),
+            "location": {"lat": 12.97 + rng.uniform(-0.2, 0.2), "lng": 77.6 + rng.uniform(-0.2, 0.2), "address": "".join(address)},
+            "expiration_date": now + timedelta(days=rng.randint(1, 30)),
+            "image_url": f"https://images.example.com/{i}.jpg",
+            "url": "https://example.com/sale",
+            "created_at": now,
+            "deal_key": f"{i:040x}",
+            "store_key": "".join(f"{name}|{address}".lower()),
+            "scrape_generation": "".join("3f2a9c"),
+        }
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    held = build()
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, held
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    dict_bytes, _ = measure(lambda: list(documents(args.count, args.seed)))
+
+    def build_index():
+        index = DealIndex()
+        index.upsert_many(documents(args.count, args.seed))
+        return index
+
+    index_bytes, _ = measure(build_index)
+
+    print(f"{args.count} deals")
+    print(f"  document dicts   {dict_bytes / 2**20:8.1f} MiB  {dict_bytes / args.count:6.0f} B/deal")
+    print(f"  deal index       {index_bytes / 2**20:8.1f} MiB  {index_bytes / args.count:6.0f} B/deal"
+          f"  ({index_bytes / dict_bytes:.0%} of dicts, grid included)")
+
+
+if __name__ == "__main__":
+    main()
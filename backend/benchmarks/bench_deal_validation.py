@@ -0,0 +1,68 @@
+"""
+Cost of turning 10k internally produced deals into MongoDB documents: validating
+each one with Deal(**data) as before, versus building trusted dicts with
+models.trusted_deal.
+
+Run from backend/:  python benchmarks/bench_deal_validation.py
+"""
+import argparse
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from deal_writer import deal_to_document  # noqa: E402
+from models import Deal, trusted_deal  # noqa: E402
+
+
+def raw_deals(count):
+    return [
+        {
+            "title": f"{10 + i % 60}% off item {i}",
+            "description": f"Limited time offer on item {i}",
+            "discount_percentage": float(10 + i % 60),
+            "business_name": f"Store {i % 500}",
+            "category": "retail" if i % 3 else "restaurant",
+            "location": {"lat": 12.97 + (i % 100) * 0.001, "lng": 77.6, "address": f"{i % 500} Brigade Road, Bengaluru"},
+            "original_price": 1000.0,
+            "sale_price": 600.0,
+            "expiration_date": datetime(2025, 5, 1),
+            "image_url": f"https://images.example.com/{i}.jpg",
+            "url": "https://example.com/sale",
+        }
+        for i in range(count)
+    ]
+
+
+def best_of(repeats, fn):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=10000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    deals = raw_deals(args.count)
+
+    cases = [
+        ("Deal(**data)", lambda: [Deal(**deal) for deal in deals]),
+        ("trusted_deal", lambda: [trusted_deal(**deal) for deal in deals]),
+        ("Deal(**data) + document", lambda: [deal_to_document(Deal(**deal)) for deal in deals]),
+        ("trusted_deal + document", lambda: [deal_to_document(trusted_deal(**deal)) for deal in deals]),
+    ]
+    print(f"{'path':<26} {'ms per ' + str(args.count):>14} {'us per deal':>12}")
+    for name, fn in cases:
+        seconds = best_of(args.repeats, fn)
+        print(f"{name:<26} {seconds * 1000:>14.1f} {seconds / args.count * 1e6:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""
+Reproducible load and micro-benchmarks with baseline regression checks.
+
+Scenarios:
+
+  deals/<n>         GET /api/deals through the ASGI app at --concurrency against n
+                    deals from datagen (--sizes), served by the in-memory deal index
+                    or, with --mongo-url, by a local mongod
+  search/<n>        GET /api/deals/search with item keywords (half of them typed as
+                    prefixes) near a store, against the same n deals
+  micro/*           calculate_distance, present_deal plus dumps for one deal, and
+                    the scrape parse loop over a --listing-size row listing
+  scrape/e2e        scrape_deals for a catalog area against a fake Firecrawl that
+                    answers after --firecrawl-latency seconds; writes are discarded
+
+Each scenario reports p50/p95/p99 latency and throughput. The run exits with status 1
+if a scenario's operations fail, such as scrape/e2e writes reporting errors.
+--save-baseline writes the results to a JSON file; --baseline compares against one
+and exits with status 1, listing every regression, when p95 grows or throughput
+drops by more than --tolerance.
+
+Run from backend/:
+  python benchmarks/bench_suite.py --save-baseline /tmp/deals-baseline.json
+  python benchmarks/bench_suite.py --baseline /tmp/deals-baseline.json
+  python benchmarks/bench_suite.py --only deals --sizes 1000 100000 1000000 --mongo-url mongodb://localhost:27017
+"""
+import argparse
+import asyncio
+import logging
+import random
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import server  # noqa: E402
+from cache import TTLLRUCache  # noqa: E402
+from datagen import DEALS_PER_STORE, ITEMS, insert_deals, synthetic_deals, synthetic_stores  # noqa: E402
+from deal_index import DealIndex  # noqa: E402
+from deal_writer import deal_to_document, new_generation  # noqa: E402
+from geo import calculate_distance  # noqa: E402
+from harness import ScenarioFailed, load_baseline, regressions, report, run_load, run_micro, save_baseline  # noqa: E402
+from http_client import ScrapeClient, set_scrape_client  # noqa: E402
+from indexes import DEAL_INDEXES, ensure_indexes  # noqa: E402
+from scrape_state import StoreFreshness  # noqa: E402
+from serialization import dumps  # noqa: E402
+
+SCRAPE_AREA = "Brigade Road"
+
+
+def query_points(count, stores, seed):
+    """
+    Where users search from: near a random store, within a couple of miles
+    """
+    rng = random.Random(seed)
+    points = []
+    for _ in range(count):
+        store = rng.choice(stores)
+        points.append((store["lat"] + rng.gauss(0, 0.02), store["lng"] + rng.gauss(0, 0.02)))
+    return points
+
+
+def search_queries(count, seed):
+    """
+    Item words from the generated titles; half are cut short as if still being typed
+    """
+    rng = random.Random(seed)
+    words = sorted({word.lower() for items in ITEMS.values() for item in items for word in item.split()})
+    queries = []
+    for _ in range(count):
+        word = rng.choice(words)
+        queries.append(word[:max(2, len(word) // 2)] if rng.random() < 0.5 else word)
+    return queries
+
+
+def synthetic_listing(size, seed):
+    """
+    Raw Firecrawl listing rows as store pages return them
+    """
+    rng = random.Random(seed)
+    rows = []
+    for i in range(size):
+        original = rng.randint(200, 5000)
+        discount = rng.randint(0, 70)
+        rows.append({
+            "title": f"Item {i}",
+            "description": "Limited stock",
+            "discount": f"{discount}% off" if discount else "",
+            "original_price": f"₹{original:,}",
+            "sale_price": f"₹{original * (100 - discount) // 100:,}",
+            "image": f"https://images.example.com/{i}.jpg",
+        })
+    return rows
+
+
+class DiscardingCollection:
+    """Stand-in deals collection that accepts every write and keeps nothing"""
+
+    async def bulk_write(self, operations, ordered=True):
+        return SimpleNamespace(upserted_count=len(operations), matched_count=0, upserted_ids={})
+
+    async def delete_many(self, query):
+        return SimpleNamespace(deleted_count=0)
+
+
+async def load_deals(count, stores, seed, mongo_url):
+    """
+    Point the app at count synthetic deals: a fresh in-memory index, or a bench
+    database on mongod loaded through the bulk insert path
+    """
+    deals = synthetic_deals(count, seed, stores)
+    if mongo_url is None:
+        index = DealIndex()
+        generation = new_generation()
+        index.upsert_many(deal_to_document(deal, generation) for deal in deals)
+        index.ready = True
+        server.live_deal_index = index
+        return
+
+    from motor.motor_asyncio import AsyncIOMotorClient
+    database = AsyncIOMotorClient(mongo_url)["deal_finder_bench"]
+    await database.deals.drop()
+    await insert_deals(database.deals, deals)
+    await ensure_indexes(database.deals, DEAL_INDEXES)
+    server.db = database
+    server.live_deal_index = None
+
+
+async def bench_deals(count, args):
+    stores = synthetic_stores(max(1, count // DEALS_PER_STORE), args.seed)
+    await load_deals(count, stores, args.seed, args.mongo_url)
+    if not args.cache:
+        # Entries expire as soon as they are stored, so every request is answered fresh
+        server.deals_cache = TTLLRUCache(ttl=0)
+    points = query_points(args.requests, stores, args.seed)
+
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def call(i):
+            lat, lng = points[i]
+            response = await client.get("/api/deals", params={"lat": lat, "lng": lng, "radius": args.radius})
+            response.raise_for_status()
+
+        return await run_load(call, args.requests, args.concurrency)
+
+
+async def bench_search(count, args):
+    stores = synthetic_stores(max(1, count // DEALS_PER_STORE), args.seed)
+    await load_deals(count, stores, args.seed, args.mongo_url)
+    points = query_points(args.requests, stores, args.seed)
+    queries = search_queries(args.requests, args.seed)
+
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def call(i):
+            lat, lng = points[i]
+            params = {"q": queries[i], "lat": lat, "lng": lng, "radius": args.radius}
+            response = await client.get("/api/deals/search", params=params)
+            response.raise_for_status()
+
+        return await run_load(call, args.requests, args.concurrency)
+
+
+def bench_micro(args):
+    points = query_points(1024, synthetic_stores(100, args.seed), args.seed)
+    deal = {**next(synthetic_deals(1, args.seed)), "distance": 1.23456}
+    store = {"name": "Bench Store", "category": "retail", "address": "1 Brigade Road, Bengaluru",
+             "lat": 12.972, "lng": 77.6081, "website": "https://bench.example.com/sale"}
+    listing = synthetic_listing(args.listing_size, args.seed)
+    counter = iter(range(10**12))
+
+    def distance():
+        lat, lng = points[next(counter) & 1023]
+        calculate_distance(12.972, 77.6081, lat, lng)
+
+    return {
+        "micro/calculate_distance": run_micro(distance, args.iterations),
+        "micro/present_and_dump_deal": run_micro(lambda: dumps(server.present_deal(dict(deal))), args.iterations),
+        "micro/parse_loop": run_micro(
+            lambda: server.parse_store_deals(store, listing), max(10, args.iterations // args.listing_size), batch=1
+        ),
+    }
+
+
+async def bench_scrape(args):
+    listing = synthetic_listing(args.listing_size, args.seed)
+
+    async def firecrawl(request):
+        await asyncio.sleep(args.firecrawl_latency)
+        return httpx.Response(200, json={"deals": listing})
+
+    previous = set_scrape_client(ScrapeClient(transport=httpx.MockTransport(firecrawl)))
+    server.db = SimpleNamespace(deals=DiscardingCollection())
+    server.live_deal_index = DealIndex()
+    try:
+        async def call(i):
+            # Forget earlier scrapes so every run fetches, parses and writes every store
+            server.store_freshness = StoreFreshness(ttl=0)
+            result = await server.scrape_deals(location_name=SCRAPE_AREA)
+            # Timing the error path instead of the writes would make any baseline look fine
+            failed = [store["store"] for store in result["stores"] if store["status"] == "failed"]
+            write_report = result["write_report"]
+            if failed or write_report["failed"]:
+                errors = "; ".join(error["message"] for error in write_report["errors"][:3])
+                raise ScenarioFailed(
+                    f"scrape/e2e: {len(failed)} stores and {write_report['failed']} deal writes failed: {errors}"
+                )
+
+        return await run_load(call, args.scrape_runs, 1)
+    finally:
+        await set_scrape_client(previous).aclose()
+
+
+async def run(args):
+    results = {}
+    if "micro" in args.only:
+        results.update(bench_micro(args))
+    if "deals" in args.only:
+        for count in args.sizes:
+            results[f"deals/{count}"] = await bench_deals(count, args)
+    if "search" in args.only:
+        for count in args.sizes:
+            results[f"search/{count}"] = await bench_search(count, args)
+    if "scrape" in args.only:
+        results["scrape/e2e"] = await bench_scrape(args)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="+", choices=["deals", "search", "micro", "scrape"],
+                        default=["deals", "search", "micro", "scrape"])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000])
+    parser.add_argument("--requests", type=int, default=2000, help="/api/deals and /api/deals/search requests per size")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--radius", type=float, default=5.0)
+    parser.add_argument("--cache", action="store_true", help="Keep the /api/deals response cache on")
+    parser.add_argument("--mongo-url", help="Serve /api/deals from this mongod instead of the deal index")
+    parser.add_argument("--iterations", type=int, default=20000, help="Calls per microbenchmark")
+    parser.add_argument("--listing-size", type=int, default=50, help="Rows per fake store listing")
+    parser.add_argument("--firecrawl-latency", type=float, default=0.05, help="Seconds the fake Firecrawl takes per store")
+    parser.add_argument("--scrape-runs", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save-baseline", type=Path)
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown against the baseline, 0.25 = 25%%")
+    args = parser.parse_args()
+
+    # Per-store scrape logging would dominate the timings
+    logging.disable(logging.INFO)
+    try:
+        results = asyncio.run(run(args))
+    except ScenarioFailed as e:
+        print(f"SCENARIO FAILED: {e}")
+        sys.exit(1)
+    report(results)
+
+    if args.save_baseline:
+        settings = {key: value for key, value in vars(args).items() if key not in ("save_baseline", "baseline")}
+        save_baseline(args.save_baseline, results, settings)
+        print(f"Saved baseline to {args.save_baseline}")
+    if args.baseline:
+        found = regressions(results, load_baseline(args.baseline), args.tolerance)
+        if found:
+            print(f"\nPERFORMANCE REGRESSION against {args.baseline} (tolerance {args.tolerance:.0%}):")
+            for line in found:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"No regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Shared measurement and baseline helpers for the benchmark suite.
+
+Every scenario is summarized as latency percentiles (milliseconds) and throughput
+(operations per second). Results can be saved as a baseline JSON file and later
+runs compared against it; a scenario regresses when its p95 latency grows, or its
+throughput drops, by more than the tolerance.
+"""
+import asyncio
+import json
+import platform
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+
+
+class ScenarioFailed(Exception):
+    """A scenario's operations did not do the work being timed, so its numbers are meaningless"""
+
+
+def summarize(latencies: List[float], elapsed: float, operations: Optional[int] = None) -> Dict[str, float]:
+    """
+    Percentiles of latencies (seconds) in milliseconds, and operations per second over elapsed
+    """
+    samples = np.asarray(latencies, dtype=np.float64) * 1000
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99]) if len(samples) else (0.0, 0.0, 0.0)
+    operations = len(samples) if operations is None else operations
+    return {
+        "operations": operations,
+        "p50_ms": round(float(p50), 4),
+        "p95_ms": round(float(p95), 4),
+        "p99_ms": round(float(p99), 4),
+        "throughput": round(operations / elapsed, 2) if elapsed > 0 else 0.0,
+    }
+
+
+def run_micro(fn: Callable[[], Any], iterations: int, batch: int = 100) -> Dict[str, float]:
+    """
+    Time fn in batches of calls so the timer's own cost stays out of the latency;
+    each batch contributes its mean per-call latency as one sample
+    """
+    batches = max(1, iterations // batch)
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(batches):
+        batch_start = time.perf_counter()
+        for _ in range(batch):
+            fn()
+        latencies.append((time.perf_counter() - batch_start) / batch)
+    return summarize(latencies, time.perf_counter() - start, batches * batch)
+
+
+async def run_load(call: Callable[[int], Awaitable[Any]], requests: int, concurrency: int) -> Dict[str, float]:
+    """
+    Issue requests calls of call(i) from concurrency workers and time each one
+    """
+    latencies: List[float] = []
+    next_request = iter(range(requests))
+
+    async def worker():
+        for i in next_request:
+            request_start = time.perf_counter()
+            await call(i)
+            latencies.append(time.perf_counter() - request_start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    return summarize(latencies, time.perf_counter() - start)
+
+
+def report(results: Dict[str, Dict[str, float]]):
+    width = max((len(name) for name in results), default=10)
+    print(f"{'scenario':<{width}}  {'ops':>8}  {'p50 ms':>10}  {'p95 ms':>10}  {'p99 ms':>10}  {'ops/s':>12}")
+    for name, result in results.items():
+        print(
+            f"{name:<{width}}  {result['operations']:>8}  {result['p50_ms']:>10.4f}  {result['p95_ms']:>10.4f}"
+            f"  {result['p99_ms']:>10.4f}  {result['throughput']:>12.2f}"
+        )
+
+
+def save_baseline(path: Path, results: Dict[str, Dict[str, float]], settings: Dict[str, Any]):
+    baseline = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "machine": {"python": platform.python_version(), "platform": platform.platform()},
+        "settings": settings,
+        "results": results,
+    }
+    Path(path).write_text(json.dumps(baseline, indent=2) + "\n")
+
+
+def load_baseline(path: Path) -> Dict[str, Any]:
+    return json.loads(Path(path).read_text())
+
+
+def regressions(results: Dict[str, Dict[str, float]], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    Scenarios that got slower than the baseline by more than tolerance (0.2 = 20%).
+    Scenarios missing from either side are not compared.
+    """
+    found = []
+    for name, result in results.items():
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+        if before["p95_ms"] > 0 and result["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            found.append(f"{name}: p95 {before['p95_ms']:.4f} ms -> {result['p95_ms']:.4f} ms")
+        if result["throughput"] < before["throughput"] * (1 - tolerance):
+            found.append(f"{name}: throughput {before['throughput']:.2f} -> {result['throughput']:.2f} ops/s")
+    return found
@@ -0,0 +1,102 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+
+from geo import calculate_distance
+
+# Response cache for /api/deals
+DEALS_CACHE_TTL = float(os.environ.get('DEALS_CACHE_TTL', '60'))
+DEALS_CACHE_MAX_ENTRIES = int(os.environ.get('DEALS_CACHE_MAX_ENTRIES', '1024'))
+# Geohash precision used to quantize coordinates; 7 characters is a cell of roughly 150m
+DEALS_CACHE_GEOHASH_PRECISION = int(os.environ.get('DEALS_CACHE_GEOHASH_PRECISION', '7'))
+
+# Area is (lat, lng, radius in miles), or None for queries not bound to a location
+Area = Optional[Tuple[float, float, float]]
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "area")
+
+    def __init__(self, value, expires_at, area):
+        self.value = value
+        self.expires_at = expires_at
+        self.area = area
+
+
+class TTLLRUCache:
+    """
+    In-process cache bounded by size (least recently used entries go first) and by age.
+    Each entry remembers the area it covers so writes can invalidate just that area.
+    """
+
+    def __init__(self, ttl: float = DEALS_CACHE_TTL, max_entries: int = DEALS_CACHE_MAX_ENTRIES, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.expires_at <= self._clock():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.value
+
+    def put(self, key: Hashable, value: Any, area: Area = None):
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = _Entry(value, self._clock() + self.ttl, area)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate_points(self, points: Iterable[Tuple[float, float]]) -> int:
+        """
+        Drop every entry whose area contains one of the points, plus all entries without an area
+        """
+        points = list(points)
+        if not points:
+            return 0
+        stale = [
+            key for key, entry in self._entries.items()
+            if entry.area is None or any(
+                calculate_distance(entry.area[0], entry.area[1], lat, lng) <= entry.area[2]
+                for lat, lng in points
+            )
+        ]
+        for key in stale:
+            del self._entries[key]
+        self.invalidations += len(stale)
+        return len(stale)
+
+    def clear(self):
+        self.invalidations += len(self._entries)
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+deals_cache = TTLLRUCache()
@@ -0,0 +1,298 @@
+"""
+Seeded synthetic stores and deals for benchmarks and capacity planning.
+
+Stores cluster around real city centroids, in a handful of shopping hotspots per
+city, and a few stores carry most of the deals. Discounts are skewed towards
+10-30% with a long tail and snap to the round numbers stores like to advertise;
+expiry dates mix flash deals, short promotions and season-long sales. The same
+seed always produces the same stores and deals (dates are relative to now).
+
+Run from backend/:  python datagen.py --deals 1000000 --seed 7 --replace
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import re
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import BulkWriteError
+
+from deal_writer import WriteError, WriteReport, deal_to_document, new_generation
+from indexes import DEAL_INDEXES, ensure_indexes
+from models import trusted_deal
+
+logger = logging.getLogger(__name__)
+
+# Largest dataset POST /api/sample-deals generates in one request; load bigger ones with this module's CLI
+SYNTHETIC_DEALS_MAX = int(os.environ.get('SYNTHETIC_DEALS_MAX', '50000'))
+# Documents per unordered insert_many when loading generated deals
+SYNTHETIC_INSERT_BATCH_SIZE = int(os.environ.get('SYNTHETIC_INSERT_BATCH_SIZE', '5000'))
+# Deals mirrored into the in-memory index between yields to the event loop
+SYNTHETIC_INDEX_SLICE_SIZE = int(os.environ.get('SYNTHETIC_INDEX_SLICE_SIZE', '200'))
+
+# Name, centroid, relative share of the stores and spread in degrees (0.1 is about 7 miles)
+CITIES = [
+    ("Bengaluru", 12.9716, 77.5946, 0.16, 0.10),
+    ("Mumbai", 19.0760, 72.8777, 0.16, 0.08),
+    ("Delhi", 28.6139, 77.2090, 0.18, 0.12),
+    ("Hyderabad", 17.3850, 78.4867, 0.09, 0.09),
+    ("Chennai", 13.0827, 80.2707, 0.07, 0.08),
+    ("San Francisco", 37.7749, -122.4194, 0.05, 0.05),
+    ("New York", 40.7128, -74.0060, 0.12, 0.08),
+    ("Los Angeles", 34.0522, -118.2437, 0.08, 0.12),
+    ("London", 51.5074, -0.1278, 0.07, 0.08),
+    ("Singapore", 1.3521, 103.8198, 0.02, 0.05),
+]
+HOTSPOTS_PER_CITY = 6
+
+CATEGORIES = ["retail", "restaurant"]
+CATEGORY_WEIGHTS = [0.7, 0.3]
+BRANDS = {
+    "retail": ["Zudio", "Westside", "Lifestyle", "Max Fashion", "Decathlon", "Croma", "Pantaloons", "H&M", "Gap", "Best Buy"],
+    "restaurant": ["Domino's", "Chai Point", "Burger King", "Subway", "Hard Rock Cafe", "Starbucks", "Taco Bell", "Barbeque Nation"],
+}
+ITEMS = {
+    "retail": ["Denim Jackets", "Running Shoes", "Kurtas", "Headphones", "Handbags", "Sarees", "Smart Watches", "T-Shirts", "Backpacks"],
+    "restaurant": ["Pizzas", "Combo Meals", "Coffee", "Desserts", "Weekday Lunch", "Family Platters", "Biryani", "Burgers"],
+}
+STREETS = ["Main Road", "High Street", "Market Road", "Station Road", "Park Avenue", "Mall Road", "Church Street", "Lake View Road"]
+
+# Advertised discounts that snap to a round number, and the values they snap to
+ROUND_DISCOUNT_SHARE = 0.6
+ROUND_DISCOUNTS = np.array([10, 15, 20, 25, 30, 40, 50, 60, 70])
+# Flash, short and season-long deals: share and expiry range in hours
+EXPIRY_BANDS = [(0.15, 1, 48), (0.55, 48, 14 * 24), (0.30, 14 * 24, 90 * 24)]
+# Zipf exponent of deals per store; higher means fewer stores carry more deals
+STORE_SKEW = 0.5
+DEALS_PER_STORE = 25
+
+
+def synthetic_stores(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    count stores in the store catalog's shape, with the city they belong to as area
+    """
+    rng = np.random.default_rng([seed, 0])
+    shares = np.array([city[3] for city in CITIES])
+    hotspots = [
+        (lat + rng.normal(0, spread / 2, HOTSPOTS_PER_CITY), lng + rng.normal(0, spread / 2, HOTSPOTS_PER_CITY))
+        for _, lat, lng, _, spread in CITIES
+    ]
+    cities = rng.choice(len(CITIES), size=count, p=shares / shares.sum())
+    spots = rng.integers(0, HOTSPOTS_PER_CITY, size=count)
+    offsets = rng.normal(0, 1, size=(count, 2))
+    categories = rng.choice(len(CATEGORIES), size=count, p=CATEGORY_WEIGHTS)
+
+    stores = []
+    for i in range(count):
+        name, _, _, _, spread = CITIES[cities[i]]
+        hotspot_lats, hotspot_lngs = hotspots[cities[i]]
+        category = CATEGORIES[categories[i]]
+        brands = BRANDS[category]
+        brand = brands[i % len(brands)]
+        slug = re.sub(r"[^a-z0-9]", "", brand.lower())
+        stores.append({
+            "name": f"{brand} {name} {i}",
+            "category": category,
+            "address": f"{1 + i % 199}, {STREETS[i % len(STREETS)]}, {name}",
+            "lat": round(float(hotspot_lats[spots[i]] + offsets[i, 0] * spread / 8), 6),
+            "lng": round(float(hotspot_lngs[spots[i]] + offsets[i, 1] * spread / 8), 6),
+            "website": f"https://{slug}.example.com/{i}/sale",
+            "area": name,
+        })
+    return stores
+
+
+def store_catalog_data(stores: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    A store catalog (see data/stores.json) with one area per city, bounded by its stores
+    """
+    areas = []
+    for name, *_ in CITIES:
+        members = [store for store in stores if store["area"] == name]
+        if not members:
+            continue
+        lats = [store["lat"] for store in members]
+        lngs = [store["lng"] for store in members]
+        areas.append({
+            "name": name,
+            "aliases": [name.lower()],
+            "bbox": [min(lats), max(lats), min(lngs), max(lngs)],
+            "address_token": name,
+        })
+    return {"areas": areas, "stores": stores}
+
+
+def _discounts(rng, categories: np.ndarray) -> np.ndarray:
+    # Restaurants discount less deeply than retail
+    retail = rng.beta(2.0, 4.5, size=len(categories)) * 85 + 5
+    restaurant = rng.beta(2.0, 6.0, size=len(categories)) * 60 + 5
+    discounts = np.where(categories == 0, retail, restaurant)
+    nearest_round = ROUND_DISCOUNTS[np.abs(discounts[:, None] - ROUND_DISCOUNTS).argmin(axis=1)]
+    return np.round(np.where(rng.random(len(discounts)) < ROUND_DISCOUNT_SHARE, nearest_round, discounts), 1)
+
+
+def _expiry_hours(rng, count: int) -> np.ndarray:
+    shares = np.array([band[0] for band in EXPIRY_BANDS])
+    bands = rng.choice(len(EXPIRY_BANDS), size=count, p=shares / shares.sum())
+    low = np.array([band[1] for band in EXPIRY_BANDS])[bands]
+    high = np.array([band[2] for band in EXPIRY_BANDS])[bands]
+    return rng.uniform(low, high)
+
+
+def synthetic_deals(
+    count: int,
+    seed: int = 0,
+    stores: Optional[List[Dict[str, Any]]] = None,
+    chunk_size: int = 10000
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield count trusted deal dicts for stores (by default one store per
+    DEALS_PER_STORE deals from synthetic_stores), generated chunk by chunk so
+    millions of deals never sit in memory at once
+    """
+    if stores is None:
+        stores = synthetic_stores(max(1, count // DEALS_PER_STORE), seed)
+    rng = np.random.default_rng([seed, 1])
+    # Zipf-like weights over a shuffled store order, so popular stores are spread over every city
+    weights = 1.0 / np.arange(1, len(stores) + 1) ** STORE_SKEW
+    weights = rng.permutation(weights / weights.sum())
+    category_codes = np.array([CATEGORIES.index(store["category"]) for store in stores])
+    # Expiry dates are UTC, as the TTL index reads them
+    expires_from = datetime.utcnow()
+    created_from = datetime.now()
+
+    for start in range(0, count, chunk_size):
+        size = min(chunk_size, count - start)
+        owners = rng.choice(len(stores), size=size, p=weights)
+        categories = category_codes[owners]
+        discounts = _discounts(rng, categories)
+        originals = np.round(np.where(
+            categories == 0,
+            rng.lognormal(np.log(1500), 0.9, size=size),
+            rng.lognormal(np.log(600), 0.6, size=size)
+        ) + 49, 0)
+        expiry_hours = _expiry_hours(rng, size)
+        age_hours = rng.uniform(0, 14 * 24, size=size)
+        items = rng.integers(0, 1 << 16, size=size)
+        ids = rng.bytes(16 * size)
+
+        for j in range(size):
+            store = stores[owners[j]]
+            category = store["category"]
+            item = ITEMS[category][items[j] % len(ITEMS[category])]
+            discount = float(discounts[j])
+            original = float(originals[j])
+            yield trusted_deal(
+                id=str(uuid.UUID(bytes=ids[16 * j:16 * j + 16], version=4)),
+                title=f"{discount:g}% Off {item}",
+                description=f"Save {discount:g}% on {item.lower()} at {store['name']}. Offer {start + j}.",
+                discount_percentage=discount,
+                original_price=original,
+                sale_price=round(original * (1 - discount / 100), 2),
+                business_name=store["name"],
+                category=category,
+                location={"lat": store["lat"], "lng": store["lng"], "address": store["address"]},
+                expiration_date=expires_from + timedelta(hours=float(expiry_hours[j])),
+                image_url="",
+                url=store["website"],
+                created_at=created_from - timedelta(hours=float(age_hours[j]))
+            )
+
+
+async def _insert_batch(collection, batch: List[Dict[str, Any]], report: WriteReport, index):
+    report.attempted += len(batch)
+    report.batches += 1
+    try:
+        result = await collection.insert_many(batch, ordered=False)
+        report.inserted += len(result.inserted_ids)
+        written = batch
+    except BulkWriteError as e:
+        details = e.details
+        write_errors = details.get("writeErrors", [])
+        report.inserted += details.get("nInserted", 0)
+        report.failed += len(write_errors)
+        for error in write_errors:
+            report.errors.append(WriteError(
+                deal_id=batch[error["index"]].get("id"),
+                code=error.get("code"),
+                message=error.get("errmsg", "")
+            ))
+        rejected = {error["index"] for error in write_errors}
+        written = [document for i, document in enumerate(batch) if i not in rejected]
+    if index is not None:
+        # The index is read by request handlers on the loop, so it is updated there, a slice at a time
+        for start in range(0, len(written), SYNTHETIC_INDEX_SLICE_SIZE):
+            index.upsert_many(written[start:start + SYNTHETIC_INDEX_SLICE_SIZE])
+            await asyncio.sleep(0)
+
+
+def _next_batch(deals: Iterator[Dict[str, Any]], generation: str, batch_size: int) -> List[Dict[str, Any]]:
+    return [deal_to_document(deal, generation) for deal in itertools.islice(deals, batch_size)]
+
+
+async def insert_deals(
+    collection,
+    deals: Iterable[Dict[str, Any]],
+    index=None,
+    batch_size: int = SYNTHETIC_INSERT_BATCH_SIZE
+) -> WriteReport:
+    """
+    Bulk-load new deals with unordered insert_many batches, which is much cheaper
+    than DealWriter's per-deal upserts. Deals whose deal_key is already stored are
+    rejected by the unique index and counted as failed. Like DealWriter, every
+    inserted deal is applied to index if one is given. Deals are generated and
+    serialized in a worker thread so a large load does not stall the event loop.
+    """
+    generation = new_generation()
+    report = WriteReport()
+    deals = iter(deals)
+    while True:
+        batch = await asyncio.to_thread(_next_batch, deals, generation, batch_size)
+        if not batch:
+            return report
+        await _insert_batch(collection, batch, report, index)
+
+
+async def _main(args):
+    load_dotenv(Path(__file__).parent / '.env')
+    collection = AsyncIOMotorClient(os.environ['MONGO_URL'])[os.environ['DB_NAME']].deals
+
+    stores = synthetic_stores(args.stores or max(1, args.deals // DEALS_PER_STORE), args.seed)
+    if args.stores_out:
+        Path(args.stores_out).write_text(json.dumps(store_catalog_data(stores), indent=2) + "\n")
+        logger.info(f"Wrote {len(stores)} stores to {args.stores_out}")
+
+    if args.replace:
+        result = await collection.delete_many({})
+        logger.info(f"Deleted {result.deleted_count} existing deals")
+    started = datetime.now()
+    report = await insert_deals(collection, synthetic_deals(args.deals, args.seed, stores), batch_size=args.batch_size)
+    elapsed = (datetime.now() - started).total_seconds()
+    logger.info(f"Inserted {report.inserted} of {report.attempted} deals in {elapsed:.1f}s ({report.failed} failed)")
+    # Building indexes after a bulk load is cheaper than maintaining them during it
+    await ensure_indexes(collection, DEAL_INDEXES)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--deals", type=int, default=100000)
+    parser.add_argument("--stores", type=int, help=f"Default: one per {DEALS_PER_STORE} deals")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--replace", action="store_true", help="Delete every existing deal first")
+    parser.add_argument("--stores-out", help="Also write the stores as a store catalog JSON file")
+    parser.add_argument("--batch-size", type=int, default=SYNTHETIC_INSERT_BATCH_SIZE)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from deal_records import DealRecord
+from geo import bounding_box, calculate_distances, in_bounding_box, nearest_order
+from metrics import DEALS_DISTANCE_FILTER, DEALS_SORT
+from spatial import GridIndex
+from text_index import TextIndex
+
+logger = logging.getLogger(__name__)
+
+# Serve located /api/deals queries from the in-process index instead of MongoDB
+DEAL_INDEX_ENABLED = os.environ.get('DEAL_INDEX_ENABLED', '1') == '1'
+# Grid cell size in degrees; 0.02 is roughly 1.4 miles of latitude
+DEAL_INDEX_CELL_DEGREES = float(os.environ.get('DEAL_INDEX_CELL_DEGREES', '0.02'))
+# Seconds between sweeps that drop expired deals; queries skip them in between
+DEAL_INDEX_PURGE_INTERVAL = float(os.environ.get('DEAL_INDEX_PURGE_INTERVAL', '60'))
+
+# Fields that keep their first value when a deal is written again, as in the upsert
+_INSERT_ONLY_FIELDS = ("id", "created_at")
+
+_NO_CATEGORY = -1
+
+
+def expiry_timestamp(expiration_date: Optional[datetime]) -> float:
+    """
+    Epoch seconds of an expiration date, inf for deals that don't expire.
+    Naive datetimes are UTC, as MongoDB stores them.
+    """
+    if expiration_date is None:
+        return float("inf")
+    if expiration_date.tzinfo is None:
+        expiration_date = expiration_date.replace(tzinfo=timezone.utc)
+    return expiration_date.timestamp()
+
+
+class DealIndex:
+    """
+    In-memory copy of the active deals with a spatial grid over their coordinates.
+    It is bulk-loaded from MongoDB at startup and then updated by DealWriter as
+    deals are upserted and expired, so nearby-deal queries are answered without a
+    database round trip. Writes made by other processes are only picked up on the
+    next load().
+
+    Each deal is a slotted DealRecord. Coordinates, discounts, expiry times and
+    category codes live in parallel NumPy arrays indexed by the record's slot, so
+    filters and distances run over arrays; slots of removed deals are reused.
+    Expired deals are never returned and are swept out every purge_interval seconds.
+    Titles and descriptions are indexed by slot in a TextIndex for keyword search.
+    """
+
+    def __init__(
+        self,
+        cell_degrees: float = DEAL_INDEX_CELL_DEGREES,
+        capacity: int = 1024,
+        purge_interval: float = DEAL_INDEX_PURGE_INTERVAL,
+        clock=time.time
+    ):
+        self.cell_degrees = cell_degrees
+        self.ready = False
+        self.purge_interval = purge_interval
+        self._clock = clock
+        self._next_purge = 0.0
+        self._initial_capacity = max(1, capacity)
+        self.clear()
+
+    def __len__(self):
+        return len(self._by_key)
+
+    def clear(self):
+        capacity = self._initial_capacity
+        self._records: List[Optional[DealRecord]] = []
+        self._free_slots: List[int] = []
+        self._lats = np.zeros(capacity, dtype=np.float64)
+        self._lngs = np.zeros(capacity, dtype=np.float64)
+        self._discounts = np.full(capacity, np.nan, dtype=np.float64)
+        self._expires = np.full(capacity, np.inf, dtype=np.float64)
+        self._category_codes = np.full(capacity, _NO_CATEGORY, dtype=np.int32)
+        self._categories: Dict[str, int] = {}
+        self._by_key: Dict[str, int] = {}
+        self._by_store: Dict[str, Set[int]] = {}
+        self._grid = GridIndex(self.cell_degrees)
+        self._text = TextIndex(capacity)
+
+    async def load(self, collection) -> int:
+        """
+        Replace the index contents with every deal in the collection
+        """
+        documents: Dict[str, Dict[str, Any]] = {}
+        async for document in collection.find({"deal_key": {"$exists": True}}, {"_id": 0, "location.point": 0}):
+            documents[document["deal_key"]] = document
+
+        self.clear()
+        for document in documents.values():
+            self._insert(document)
+        self.purge_expired()
+        # Sort the postings now rather than on the first search
+        self._text.compact()
+        self.ready = True
+        logger.info(f"Loaded {len(self)} deals into the in-memory deal index")
+        return len(self)
+
+    def _grow(self):
+        capacity = len(self._lats) * 2
+        self._lats = np.resize(self._lats, capacity)
+        self._lngs = np.resize(self._lngs, capacity)
+        discounts = np.full(capacity, np.nan, dtype=np.float64)
+        discounts[:len(self._discounts)] = self._discounts
+        self._discounts = discounts
+        expires = np.full(capacity, np.inf, dtype=np.float64)
+        expires[:len(self._expires)] = self._expires
+        self._expires = expires
+        codes = np.full(capacity, _NO_CATEGORY, dtype=np.int32)
+        codes[:len(self._category_codes)] = self._category_codes
+        self._category_codes = codes
+
+    def _category_code(self, category: Optional[str]) -> int:
+        if category is None:
+            return _NO_CATEGORY
+        return self._categories.setdefault(category, len(self._categories))
+
+    def _insert(self, document: Dict[str, Any], keep: Optional[DealRecord] = None):
+        if self._free_slots:
+            slot = self._free_slots.pop()
+        else:
+            slot = len(self._records)
+            self._records.append(None)
+            if slot >= len(self._lats):
+                self._grow()
+
+        record = DealRecord(slot, document)
+        if keep is not None:
+            for field in _INSERT_ONLY_FIELDS:
+                setattr(record, field, getattr(keep, field))
+        location = document["location"]
+        lat, lng = float(location["lat"]), float(location["lng"])
+        discount = record.discount_percentage
+
+        self._records[slot] = record
+        self._lats[slot] = lat
+        self._lngs[slot] = lng
+        self._discounts[slot] = np.nan if discount is None else discount
+        self._expires[slot] = expiry_timestamp(record.expiration_date)
+        self._category_codes[slot] = self._category_code(record.category)
+        self._by_key[record.deal_key] = slot
+        self._by_store.setdefault(record.store_key, set()).add(slot)
+        self._grid.insert(slot, lat, lng)
+        self._text.add(slot, record.title, record.description)
+
+    def _remove(self, deal_key: str) -> Optional[DealRecord]:
+        slot = self._by_key.pop(deal_key, None)
+        if slot is None:
+            return None
+        record = self._records[slot]
+        slots = self._by_store.get(record.store_key)
+        if slots is not None:
+            slots.discard(slot)
+            if not slots:
+                del self._by_store[record.store_key]
+        self._grid.remove(slot, self._lats[slot], self._lngs[slot])
+        self._text.remove(slot, record.title, record.description)
+        self._records[slot] = None
+        self._category_codes[slot] = _NO_CATEGORY
+        self._discounts[slot] = np.nan
+        self._expires[slot] = np.inf
+        self._free_slots.append(slot)
+        return record
+
+    def upsert_many(self, documents: Iterable[Dict[str, Any]]):
+        """
+        Apply documents that were upserted into MongoDB
+        """
+        for document in documents:
+            previous = self._remove(document["deal_key"])
+            self._insert(document, keep=previous)
+
+    def expire_stale(self, generation: str, store_keys: Optional[Iterable[str]] = None) -> int:
+        """
+        Mirror of DealWriter.expire_stale: drop rows of the given stores (or of every
+        store) that were not written by generation
+        """
+        if store_keys is None:
+            candidates = list(self._by_key.values())
+        else:
+            candidates = [slot for store in store_keys for slot in self._by_store.get(store, ())]
+        stale = [
+            self._records[slot].deal_key for slot in candidates
+            if self._records[slot].scrape_generation != generation
+        ]
+        for deal_key in stale:
+            self._remove(deal_key)
+        return len(stale)
+
+    def purge_expired(self) -> int:
+        """
+        Drop every deal whose expiration date has passed
+        """
+        now = self._clock()
+        self._next_purge = now + self.purge_interval
+        expired = np.flatnonzero(self._expires[:len(self._records)] <= now)
+        for slot in expired.tolist():
+            self._remove(self._records[slot].deal_key)
+        return len(expired)
+
+    def _within(self, lat, lng, radius, category, min_discount, address_token, after) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Distances and slots of the deals within radius that pass the filters, unordered
+        """
+        box = bounding_box(lat, lng, radius)
+        slots = np.fromiter(self._grid.query_box(*box), dtype=np.intp)
+        lats, lngs = self._lats[slots], self._lngs[slots]
+
+        # Grid cells overhang the search box, so the box check comes first; the
+        # category and discount filters are array comparisons as well
+        keep = in_bounding_box(lats, lngs, box) & (self._expires[slots] > self._clock())
+        if category:
+            keep &= self._category_codes[slots] == self._categories.get(category, _NO_CATEGORY - 1)
+        if min_discount is not None:
+            keep &= self._discounts[slots] >= min_discount
+        if address_token:
+            records = self._records
+            for i in np.flatnonzero(keep):
+                keep[i] = address_token in (records[slots[i]].address or "")
+        slots, lats, lngs = slots[keep], lats[keep], lngs[keep]
+
+        # Exact distances for the remaining candidates in one vectorized call
+        distances = calculate_distances(lat, lng, lats, lngs)
+        keep = distances <= radius
+        if after is not None:
+            after_distance, after_id = after
+            keep &= distances >= after_distance
+            # Only rows tied with the cursor need the id comparison
+            for i in np.flatnonzero(keep & (distances == after_distance)):
+                keep[i] = self._records[slots[i]].id > after_id
+        return distances[keep], slots[keep]
+
+    def nearest(
+        self,
+        lat: float,
+        lng: float,
+        radius: float,
+        k: Optional[int] = None,
+        category: Optional[str] = None,
+        min_discount: Optional[float] = None,
+        address_token: Optional[str] = None,
+        after: Optional[Tuple[float, str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Up to k deals within radius miles, nearest first with ties broken by id, as
+        response dicts carrying a "distance" field. after=(distance, id) skips everything
+        up to and including that position, as a pagination cursor does. The search starts
+        with a small box and widens it until k deals are found or the radius is reached.
+        """
+        if radius <= 0:
+            return []
+        if self._clock() >= self._next_purge:
+            self.purge_expired()
+        cell_miles = self.cell_degrees * 69.0
+        search = radius if k is None else min(radius, cell_miles)
+        with DEALS_DISTANCE_FILTER.time():
+            while True:
+                distances, slots = self._within(lat, lng, search, category, min_discount, address_token, after)
+                if search >= radius or len(slots) >= k:
+                    break
+                search = min(radius, search * 4)
+
+        # Partial sort for the k nearest; the rows come out ordered by distance, so
+        # sorting again with the id tie-breaker only moves ties
+        records = self._records
+        with DEALS_SORT.time():
+            order = nearest_order(distances, k)
+            selected = slots[order].tolist()
+            matches = sorted(zip(distances[order].tolist(), [records[slot].id for slot in selected], selected))
+            if k is not None:
+                matches = matches[:k]
+        lats, lngs = self._lats, self._lngs
+        return [
+            records[slot].to_response(float(lats[slot]), float(lngs[slot]), distance)
+            for distance, _, slot in matches
+        ]
+
+    def search(
+        self,
+        query: str,
+        k: int,
+        lat: Optional[float] = None,
+        lng: Optional[float] = None,
+        radius: Optional[float] = None,
+        category: Optional[str] = None,
+        min_discount: Optional[float] = None,
+        prefix: bool = True
+    ) -> List[Dict[str, Any]]:
+        """
+        Up to k deals matching the words of query, best BM25 score first, as response
+        dicts with a "score" field. Given a location, only deals within radius miles
+        are returned, with their "distance", and equal scores are ordered nearest first.
+        With prefix, the last word of the query may be incomplete.
+        """
+        if self._clock() >= self._next_purge:
+            self.purge_expired()
+        slots, scores = self._text.score(query, prefix=prefix)
+
+        keep = self._expires[slots] > self._clock()
+        if category:
+            keep &= self._category_codes[slots] == self._categories.get(category, _NO_CATEGORY - 1)
+        if min_discount is not None:
+            keep &= self._discounts[slots] >= min_discount
+        located = lat is not None and lng is not None and radius is not None
+        if located:
+            box = bounding_box(lat, lng, radius)
+            keep &= in_bounding_box(self._lats[slots], self._lngs[slots], box)
+        slots, scores = slots[keep], scores[keep]
+        distances = None
+        if located:
+            distances = calculate_distances(lat, lng, self._lats[slots], self._lngs[slots])
+            keep = distances <= radius
+            slots, scores, distances = slots[keep], scores[keep], distances[keep]
+
+        # Partial sort for the k best; ties on score go to the nearer deal, then by slot
+        order = nearest_order(-scores, k)
+        if distances is not None:
+            order = order[np.lexsort((distances[order], -scores[order]))]
+        records, lats, lngs = self._records, self._lats, self._lngs
+        results = []
+        for i in order[:k].tolist():
+            slot = int(slots[i])
+            distance = None if distances is None else round(float(distances[i]), 2)
+            deal = records[slot].to_response(float(lats[slot]), float(lngs[slot]), distance)
+            deal["score"] = round(float(scores[i]), 4)
+            results.append(deal)
+        return results
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[str]:
+        """
+        Words starting with prefix that appear in deal titles or descriptions, most common first
+        """
+        return [term for term, _ in self._text.expand(prefix.strip().lower(), limit)]
+
+
+deal_index = DealIndex()
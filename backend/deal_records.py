@@ -0,0 +1,67 @@
+import sys
+from typing import Any, Dict, Optional
+
+
+def intern_text(value: Optional[str]) -> Optional[str]:
+    """
+    Share one string object between the many deals repeating the same store,
+    category or address
+    """
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class DealRecord:
+    """
+    Compact in-memory form of a stored deal. Coordinates are not kept here but in
+    the parallel arrays of the owning DealIndex, at position slot; repeated strings
+    are interned.
+    """
+
+    __slots__ = (
+        "slot", "id", "title", "description", "discount_percentage", "original_price", "sale_price",
+        "business_name", "category", "address", "expiration_date", "image_url", "url", "created_at",
+        "deal_key", "store_key", "scrape_generation"
+    )
+
+    def __init__(self, slot: int, document: Dict[str, Any]):
+        location = document.get("location") or {}
+        self.slot = slot
+        self.id = document.get("id")
+        self.title = document.get("title")
+        self.description = document.get("description")
+        self.discount_percentage = document.get("discount_percentage")
+        self.original_price = document.get("original_price")
+        self.sale_price = document.get("sale_price")
+        self.business_name = intern_text(document.get("business_name"))
+        self.category = intern_text(document.get("category"))
+        self.address = intern_text(location.get("address"))
+        self.expiration_date = document.get("expiration_date")
+        self.image_url = document.get("image_url")
+        self.url = intern_text(document.get("url"))
+        self.created_at = document.get("created_at")
+        self.deal_key = document["deal_key"]
+        self.store_key = intern_text(document.get("store_key"))
+        self.scrape_generation = intern_text(document.get("scrape_generation"))
+
+    def to_response(self, lat: float, lng: float, distance: Optional[float] = None) -> Dict[str, Any]:
+        """
+        The deal as the API returns it
+        """
+        deal = {
+            "id": self.id,
+            "title": self.title,
+            "description": self.description,
+            "discount_percentage": self.discount_percentage,
+            "original_price": self.original_price,
+            "sale_price": self.sale_price,
+            "business_name": self.business_name,
+            "category": self.category,
+            "location": {"lat": lat, "lng": lng, "address": self.address},
+            "expiration_date": self.expiration_date,
+            "image_url": self.image_url,
+            "url": self.url,
+            "created_at": self.created_at,
+        }
+        if distance is not None:
+            deal["distance"] = distance
+        return deal
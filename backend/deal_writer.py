@@ -0,0 +1,229 @@
+import hashlib
+import logging
+import os
+import re
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from pydantic import BaseModel, Field
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from geo import geo_point
+
+logger = logging.getLogger(__name__)
+
+# Number of deals sent to MongoDB per bulk_write call
+DEAL_WRITE_BATCH_SIZE = int(os.environ.get('DEAL_WRITE_BATCH_SIZE', '500'))
+
+# Fields that keep their first value when a deal is upserted again
+INSERT_ONLY_FIELDS = ("id", "created_at")
+
+# Bookkeeping fields deal_to_document adds for upserts and expiry
+INTERNAL_FIELDS = ("deal_key", "store_key", "scrape_generation")
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class WriteError(BaseModel):
+    deal_id: Optional[str] = None
+    code: Optional[int] = None
+    message: str
+
+
+class WriteReport(BaseModel):
+    attempted: int = 0
+    inserted: int = 0
+    updated: int = 0
+    failed: int = 0
+    expired: int = 0
+    batches: int = 0
+    errors: List[WriteError] = Field(default_factory=list)
+
+    def merge(self, other: "WriteReport"):
+        """
+        Add the counts and errors of another report to this one
+        """
+        for name in ("attempted", "inserted", "updated", "failed", "expired", "batches"):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        self.errors.extend(other.errors)
+
+
+def _normalize(text: str) -> str:
+    return _WHITESPACE.sub(" ", (text or "").casefold()).strip()
+
+
+def store_key(business_name: str, address: str) -> str:
+    """
+    Stable identifier of a store, used to expire its deals after a re-scrape
+    """
+    return f"{_normalize(business_name)}|{_normalize(address)}"
+
+
+def _deal_fields(deal) -> Dict[str, Any]:
+    """
+    Field dict of a Deal model, or a copy of a trusted deal dict (see models.trusted_deal)
+    """
+    if isinstance(deal, BaseModel):
+        return deal.dict()
+    return {**deal, "location": dict(deal["location"])}
+
+
+def _content_key(fields: Dict[str, Any]) -> str:
+    sale_price = fields.get("sale_price")
+    price = "" if sale_price is None else f"{sale_price:.2f}"
+    raw = "\x1f".join([
+        store_key(fields["business_name"], fields["location"]["address"]), _normalize(fields["title"]), price
+    ])
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def deal_key(deal) -> str:
+    """
+    Stable content key of a deal: its store plus normalized title plus price.
+    Re-scraping an unchanged listing yields the same key, so it updates in place.
+    """
+    return _content_key(deal if isinstance(deal, dict) else _deal_fields(deal))
+
+
+def new_generation() -> str:
+    return uuid.uuid4().hex
+
+
+def deal_to_document(deal, generation: Optional[str] = None) -> Dict[str, Any]:
+    """
+    MongoDB document for a Deal or trusted deal dict, including the GeoJSON point used
+    by the 2dsphere index and the keys used for upserts and expiry
+    """
+    document = _deal_fields(deal)
+    location = document["location"]
+    document["deal_key"] = _content_key(document)
+    location["point"] = geo_point(location["lat"], location["lng"])
+    document["store_key"] = store_key(document["business_name"], location["address"])
+    document["scrape_generation"] = generation
+    return document
+
+
+class DealWriter:
+    """
+    Collects deals (Deal models or trusted deal dicts) and upserts them by deal_key in unordered bulk_write batches.
+    Every written row is stamped with the writer's generation so rows the latest
+    scrape did not produce can be expired afterwards. A failing document does not
+    stop the rest of its batch; failures are collected in the report instead.
+    If an index is given (see deal_index.DealIndex), every write MongoDB accepted
+    is applied to it as well. The deals that were newly inserted are published to
+    every listener in events (see live_deals.LiveDealHub and alerts.DealAlerts);
+    rewrites of stored deals are not, as the content of a deal is part of its deal_key.
+    """
+
+    def __init__(
+        self,
+        collection,
+        generation: Optional[str] = None,
+        batch_size: int = DEAL_WRITE_BATCH_SIZE,
+        index=None,
+        events: Sequence = ()
+    ):
+        self.collection = collection
+        self.index = index
+        self.events = tuple(events)
+        self.generation = generation or new_generation()
+        self.batch_size = max(1, batch_size)
+        self.report = WriteReport()
+        # Keyed by deal_key so a listing repeated within a batch is written once
+        self._pending: Dict[str, Dict[str, Any]] = {}
+
+    async def add(self, deal):
+        document = deal_to_document(deal, self.generation)
+        self._pending[document["deal_key"]] = document
+        if len(self._pending) >= self.batch_size:
+            await self.flush()
+
+    async def add_many(self, deals):
+        for deal in deals:
+            await self.add(deal)
+
+    async def flush(self):
+        if not self._pending:
+            return
+        batch, self._pending = list(self._pending.values()), {}
+        self.report.attempted += len(batch)
+        self.report.batches += 1
+
+        operations = []
+        for document in batch:
+            update = {key: value for key, value in document.items() if key not in INSERT_ONLY_FIELDS}
+            on_insert = {key: document[key] for key in INSERT_ONLY_FIELDS}
+            operations.append(UpdateOne(
+                {"deal_key": document["deal_key"]},
+                {"$set": update, "$setOnInsert": on_insert},
+                upsert=True
+            ))
+
+        try:
+            result = await self.collection.bulk_write(operations, ordered=False)
+            self.report.inserted += result.upserted_count
+            self.report.updated += result.matched_count
+            written = batch
+            inserted = result.upserted_ids if self.events else {}
+        except BulkWriteError as e:
+            details = e.details
+            self.report.inserted += details.get("nUpserted", 0)
+            self.report.updated += details.get("nMatched", 0)
+            write_errors = details.get("writeErrors", [])
+            self.report.failed += len(write_errors)
+            for error in write_errors:
+                self.report.errors.append(WriteError(
+                    deal_id=batch[error["index"]].get("id"),
+                    code=error.get("code"),
+                    message=error.get("errmsg", "")
+                ))
+            logger.error(f"Bulk upsert partially failed: {len(write_errors)} of {len(batch)} deals rejected")
+            rejected = {error["index"] for error in write_errors}
+            written = [document for i, document in enumerate(batch) if i not in rejected]
+            inserted = {upsert["index"]: upsert["_id"] for upsert in details.get("upserted", [])}
+        except Exception as e:
+            # Nothing is known about which documents made it, so count the batch as failed
+            self.report.failed += len(batch)
+            self.report.errors.append(WriteError(message=str(e)))
+            logger.error(f"Bulk upsert of {len(batch)} deals failed: {e}")
+            written = []
+            inserted = {}
+
+        if self.index is not None:
+            self.index.upsert_many(written)
+        if self.events and inserted:
+            documents = [batch[i] for i in sorted(inserted)]
+            for listener in self.events:
+                listener.publish(documents)
+
+    async def expire_stale(self, store_keys: Optional[Iterable[str]] = None) -> int:
+        """
+        Delete rows of the given stores that this generation did not write.
+        With store_keys=None every row outside this generation is deleted.
+        Only call this for stores that were scraped successfully.
+        """
+        await self.flush()
+        query: Dict[str, Any] = {"scrape_generation": {"$ne": self.generation}}
+        keys = None
+        if store_keys is not None:
+            keys = list(store_keys)
+            if not keys:
+                return 0
+            query["store_key"] = {"$in": keys}
+
+        result = await self.collection.delete_many(query)
+        if self.index is not None:
+            self.index.expire_stale(self.generation, keys)
+        self.report.expired += result.deleted_count
+        return result.deleted_count
+
+    async def close(self) -> WriteReport:
+        await self.flush()
+        return self.report
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.flush()
@@ -0,0 +1,184 @@
+from math import radians, degrees, sin, cos, sqrt, atan2
+
+import numpy as np
+
+# Radius of Earth in miles used by calculate_distance
+EARTH_RADIUS_MILES = 3956
+
+# MongoDB measures spherical GeoJSON distances in meters on a sphere of this radius.
+# Scaling by MONGO_METERS_PER_MILE makes $geoNear distances agree with calculate_distance.
+MONGO_EARTH_RADIUS_METERS = 6378100
+MONGO_METERS_PER_MILE = MONGO_EARTH_RADIUS_METERS / EARTH_RADIUS_MILES
+
+
+# Calculate distance between two coordinates in miles
+def calculate_distance(lat1, lng1, lat2, lng2):
+    # Convert latitude and longitude from degrees to radians
+    lat1, lng1, lat2, lng2 = map(radians, [lat1, lng1, lat2, lng2])
+
+    # Haversine formula
+    dlng = lng2 - lng1
+    dlat = lat2 - lat1
+    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlng/2)**2
+    c = 2 * atan2(sqrt(a), sqrt(1-a))
+    distance = EARTH_RADIUS_MILES * c
+
+    return distance
+
+
+def calculate_distances(lat, lng, lats, lngs):
+    """
+    Distances in miles from (lat, lng) to every point of the coordinate arrays, in one
+    vectorized pass. Same haversine formula as calculate_distance, which stays the
+    reference for single pairs.
+    """
+    lat1, lng1 = radians(lat), radians(lng)
+    lat2 = np.radians(np.asarray(lats, dtype=np.float64))
+    lng2 = np.radians(np.asarray(lngs, dtype=np.float64))
+
+    a = np.sin((lat2 - lat1) / 2)**2 + cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2)**2
+    return EARTH_RADIUS_MILES * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def nearest_order(distances, k=None):
+    """
+    Indices of the k smallest distances in ascending order, or of all of them when k
+    is None. Uses a partial partition so only the k winners are fully sorted; every
+    row tied with the k-th distance is kept so callers can break ties themselves.
+    """
+    distances = np.asarray(distances)
+    if k is not None and k <= 0:
+        return np.array([], dtype=np.intp)
+    if k is not None and k < len(distances):
+        kth = np.partition(distances, k - 1)[k - 1]
+        candidates = np.flatnonzero(distances <= kth)
+    else:
+        candidates = np.arange(len(distances))
+    return candidates[np.argsort(distances[candidates], kind="stable")]
+
+
+def bounding_box(lat, lng, radius_miles):
+    """
+    (min_lat, max_lat, min_lng, max_lng) of a box that contains every point within
+    radius_miles of (lat, lng). Near the poles the box covers all longitudes.
+    """
+    dlat = degrees(radius_miles / EARTH_RADIUS_MILES)
+    min_lat, max_lat = lat - dlat, lat + dlat
+    if min_lat <= -90 or max_lat >= 90:
+        return max(min_lat, -90.0), min(max_lat, 90.0), -180.0, 180.0
+    # Longitude degrees shrink with the cosine of the latitude furthest from the equator
+    dlng = degrees(radius_miles / (EARTH_RADIUS_MILES * cos(radians(max(abs(min_lat), abs(max_lat))))))
+    if dlng >= 180:
+        return min_lat, max_lat, -180.0, 180.0
+    return min_lat, max_lat, lng - dlng, lng + dlng
+
+
+def _wrapped_lng_ranges(min_lng, max_lng):
+    """
+    A box's longitude span as one or two ranges inside [-180, 180]
+    """
+    if min_lng < -180:
+        return [(min_lng + 360, 180.0), (-180.0, max_lng)]
+    if max_lng > 180:
+        return [(min_lng, 180.0), (-180.0, max_lng - 360)]
+    return [(min_lng, max_lng)]
+
+
+def wrapped_boxes(box):
+    """
+    A bounding box as one or two boxes inside [-180, 180] longitude, split where it
+    crosses the antimeridian
+    """
+    min_lat, max_lat, min_lng, max_lng = box
+    return [(min_lat, max_lat, low, high) for low, high in _wrapped_lng_ranges(min_lng, max_lng)]
+
+
+def in_bounding_box(lats, lngs, box):
+    """
+    Mask of the points of the coordinate arrays that lie inside a bounding_box result.
+    Only comparisons, so it is much cheaper than an exact distance.
+    """
+    min_lat, max_lat, min_lng, max_lng = box
+    lats = np.asarray(lats, dtype=np.float64)
+    lngs = np.asarray(lngs, dtype=np.float64)
+    inside_lng = np.zeros(len(lngs), dtype=bool)
+    for low, high in _wrapped_lng_ranges(min_lng, max_lng):
+        inside_lng |= (lngs >= low) & (lngs <= high)
+    return inside_lng & (lats >= min_lat) & (lats <= max_lat)
+
+
+def bounding_box_query(lat, lng, radius_miles, field="location"):
+    """
+    MongoDB filter on the plain lat/lng fields of a location that keeps only points
+    inside the bounding box of the radius
+    """
+    min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius_miles)
+    query = {f"{field}.lat": {"$gte": min_lat, "$lte": max_lat}}
+    ranges = _wrapped_lng_ranges(min_lng, max_lng)
+    if len(ranges) == 1:
+        query[f"{field}.lng"] = {"$gte": ranges[0][0], "$lte": ranges[0][1]}
+    else:
+        query["$or"] = [{f"{field}.lng": {"$gte": low, "$lte": high}} for low, high in ranges]
+    return query
+
+
+def geo_point(lat, lng):
+    """
+    GeoJSON point for a coordinate pair; GeoJSON orders coordinates as [lng, lat]
+    """
+    return {"type": "Point", "coordinates": [float(lng), float(lat)]}
+
+
+def miles_to_mongo_meters(miles):
+    return miles * MONGO_METERS_PER_MILE
+
+
+_GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash_bounds(lat, lng, precision):
+    """
+    Geohash of a coordinate and the (min_lat, max_lat, min_lng, max_lng) bounds of its cell
+    """
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(chars) < precision:
+        if even:
+            mid = (lng_range[0] + lng_range[1]) / 2
+            if lng >= mid:
+                bits = (bits << 1) | 1
+                lng_range[0] = mid
+            else:
+                bits <<= 1
+                lng_range[1] = mid
+        else:
+            mid = (lat_range[0] + lat_range[1]) / 2
+            if lat >= mid:
+                bits = (bits << 1) | 1
+                lat_range[0] = mid
+            else:
+                bits <<= 1
+                lat_range[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_GEOHASH_BASE32[bits])
+            bits = 0
+            bit_count = 0
+    return "".join(chars), (lat_range[0], lat_range[1], lng_range[0], lng_range[1])
+
+
+def geohash(lat, lng, precision):
+    return geohash_bounds(lat, lng, precision)[0]
+
+
+def geohash_center(lat, lng, precision):
+    """
+    Geohash of a coordinate and the center of its cell, used to snap nearby points together
+    """
+    code, (min_lat, max_lat, min_lng, max_lng) = geohash_bounds(lat, lng, precision)
+    return code, (min_lat + max_lat) / 2, (min_lng + max_lng) / 2
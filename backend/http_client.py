@@ -0,0 +1,88 @@
+import asyncio
+import os
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+# Firecrawl endpoint; point this at a local stub server for tests
+FIRECRAWL_API_URL = os.environ.get('FIRECRAWL_API_URL', 'https://api.firecrawl.dev/v1/scrape')
+
+# Concurrency limits for outbound scrape calls
+SCRAPE_MAX_CONCURRENCY = int(os.environ.get('SCRAPE_MAX_CONCURRENCY', '8'))
+SCRAPE_MAX_PER_HOST = int(os.environ.get('SCRAPE_MAX_PER_HOST', '2'))
+
+# Deadline in seconds for scraping a single store
+SCRAPE_STORE_TIMEOUT = float(os.environ.get('SCRAPE_STORE_TIMEOUT', '30'))
+
+
+class ScrapeClient:
+    """
+    Connection-pooled async HTTP client with a global and a per-host concurrency limit
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = SCRAPE_MAX_CONCURRENCY,
+        max_per_host: int = SCRAPE_MAX_PER_HOST,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_per_host = max_per_host
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._global_limit = asyncio.Semaphore(max_concurrency)
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                transport=self._transport,
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                ),
+                timeout=httpx.Timeout(SCRAPE_STORE_TIMEOUT),
+            )
+        return self._client
+
+    def _host_limit(self, host: str) -> asyncio.Semaphore:
+        limit = self._host_limits.get(host)
+        if limit is None:
+            limit = self._host_limits[host] = asyncio.Semaphore(self.max_per_host)
+        return limit
+
+    async def post(self, url: str, *, host_key: Optional[str] = None, **kwargs: Any) -> httpx.Response:
+        """
+        POST to url once both the global and the per-host slot are free.
+        host_key is the host being limited; it defaults to the host of url, but
+        scrape calls pass the retailer's host since every call goes to Firecrawl.
+        """
+        host = host_key or urlsplit(url).netloc
+        async with self._host_limit(host):
+            async with self._global_limit:
+                return await self.client.post(url, **kwargs)
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+scrape_client = ScrapeClient()
+
+
+def get_scrape_client() -> ScrapeClient:
+    return scrape_client
+
+
+def set_scrape_client(new_client: ScrapeClient) -> ScrapeClient:
+    """
+    Replace the shared client, e.g. with one bound to a stub transport in tests.
+    Returns the previous client so callers can restore it.
+    """
+    global scrape_client
+    previous = scrape_client
+    scrape_client = new_client
+    return previous
@@ -0,0 +1,86 @@
+import logging
+from typing import Dict, Iterable, List
+
+from pymongo import ASCENDING, GEOSPHERE, TEXT, IndexModel
+
+logger = logging.getLogger(__name__)
+
+# Indexes the deals collection needs, named so they can be recognised across restarts
+DEAL_INDEXES = [
+    # $geoNear in get_deals, with the category/discount/expiry filter evaluated from the index
+    IndexModel(
+        [
+            ("location.point", GEOSPHERE), ("category", ASCENDING),
+            ("discount_percentage", ASCENDING), ("expiration_date", ASCENDING)
+        ],
+        name="geo_category_discount_expiry"
+    ),
+    # Non-geo listing: equality on category, sort on id, ranges on discount and expiry
+    IndexModel(
+        [("category", ASCENDING), ("id", ASCENDING), ("discount_percentage", ASCENDING), ("expiration_date", ASCENDING)],
+        name="category_id_discount_expiry"
+    ),
+    # MongoDB's TTL monitor deletes deals once their expiration_date has passed
+    IndexModel([("expiration_date", ASCENDING)], name="expiration_ttl", expireAfterSeconds=0),
+    # Lookups and keyset pagination by deal id
+    IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+    # Upserts by content key; rows written before keys existed are left out
+    IndexModel(
+        [("deal_key", ASCENDING)],
+        name="deal_key_unique",
+        unique=True,
+        partialFilterExpression={"deal_key": {"$exists": True}}
+    ),
+    # Expiring a store's rows from older scrape generations
+    IndexModel([("store_key", ASCENDING), ("scrape_generation", ASCENDING)], name="store_generation"),
+    # Keyword search over deal text
+    IndexModel(
+        [("title", TEXT), ("description", TEXT)],
+        name="title_description_text",
+        weights={"title": 3, "description": 1}
+    ),
+]
+
+
+# Indexes replaced by ones in DEAL_INDEXES, dropped when found
+RETIRED_DEAL_INDEXES = ["geo_category_discount", "category_id_discount"]
+
+
+async def ensure_indexes(collection, indexes: List[IndexModel], retired: Iterable[str] = ()) -> Dict[str, List[str]]:
+    """
+    Create any of indexes missing from collection and log which ones were built,
+    then drop the retired ones that are still present.
+    Safe to run on every startup; existing indexes are left untouched.
+    """
+    existing = set((await collection.index_information()).keys())
+    summary = {"existing": [], "created": [], "failed": [], "dropped": []}
+
+    for index in indexes:
+        name = index.document["name"]
+        if name in existing:
+            summary["existing"].append(name)
+            continue
+        try:
+            await collection.create_indexes([index])
+            summary["created"].append(name)
+            logger.info(f"Built index {name} on {collection.name}")
+        except Exception as e:
+            summary["failed"].append(name)
+            logger.error(f"Error building index {name} on {collection.name}: {e}")
+
+    # Only drop once the replacements are in place, so queries are never left without an index
+    for name in retired:
+        if name not in existing or summary["failed"]:
+            continue
+        try:
+            await collection.drop_index(name)
+            summary["dropped"].append(name)
+            logger.info(f"Dropped retired index {name} on {collection.name}")
+        except Exception as e:
+            logger.error(f"Error dropping index {name} on {collection.name}: {e}")
+
+    logger.info(
+        f"Indexes on {collection.name}: {len(summary['created'])} built, "
+        f"{len(summary['existing'])} already present, {len(summary['failed'])} failed"
+    )
+    return summary
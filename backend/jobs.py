@@ -0,0 +1,122 @@
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Number of scrape jobs processed at the same time
+SCRAPE_WORKERS = int(os.environ.get('SCRAPE_WORKERS', '2'))
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+
+class JobProgress:
+    """
+    Handed to the runner so it can report progress on its job
+    """
+
+    def __init__(self, queue: "ScrapeJobQueue", job_id: str):
+        self._queue = queue
+        self.job_id = job_id
+
+    async def stores_found(self, count: int):
+        await self._queue._update(self.job_id, {"$set": {"stores_total": count}})
+
+    async def store_done(self, store_result: Dict[str, Any]):
+        await self._queue._update(self.job_id, {
+            "$inc": {"stores_done": 1},
+            "$push": {"stores": store_result}
+        })
+
+
+# runner(params, progress) performs the scrape and returns its summary
+Runner = Callable[[Dict[str, Any], JobProgress], Awaitable[Dict[str, Any]]]
+
+
+class ScrapeJobQueue:
+    """
+    In-process scrape scheduler: jobs are recorded in MongoDB and run by a pool of asyncio workers.
+    Progress is written to the job record after every store so clients can poll it.
+    """
+
+    def __init__(self, collection, runner: Runner, workers: int = SCRAPE_WORKERS):
+        self.collection = collection
+        self.runner = runner
+        self.workers = max(1, workers)
+        self._queue: "asyncio.Queue[str]" = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self):
+        """
+        Start the workers and re-queue jobs a previous process left unfinished
+        """
+        if self._tasks:
+            return
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        unfinished = self.collection.find({"status": {"$in": [QUEUED, RUNNING]}}, {"id": 1}).sort("created_at", 1)
+        requeued = 0
+        async for job in unfinished:
+            await self.collection.update_one({"id": job["id"]}, {"$set": {"status": QUEUED}})
+            self._queue.put_nowait(job["id"])
+            requeued += 1
+        logger.info(f"Started {self.workers} scrape workers, re-queued {requeued} unfinished jobs")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        now = datetime.now()
+        job = {
+            "id": str(uuid.uuid4()),
+            "status": QUEUED,
+            "params": params,
+            "stores_total": None,
+            "stores_done": 0,
+            "stores": [],
+            "result": None,
+            "error": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+        await self.collection.insert_one(dict(job))
+        self._queue.put_nowait(job["id"])
+        return job
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one({"id": job_id}, {"_id": 0})
+
+    async def _update(self, job_id: str, update: Dict[str, Any]):
+        update.setdefault("$set", {})["updated_at"] = datetime.now()
+        await self.collection.update_one({"id": job_id}, update)
+
+    async def _work(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                logger.error(f"Error running scrape job {job_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str):
+        job = await self.collection.find_one({"id": job_id})
+        if job is None or job["status"] not in (QUEUED, RUNNING):
+            return
+        await self._update(job_id, {"$set": {"status": RUNNING, "stores_done": 0, "stores": []}})
+
+        try:
+            result = await self.runner(job["params"], JobProgress(self, job_id))
+            await self._update(job_id, {"$set": {"status": COMPLETED, "result": result}})
+        except Exception as e:
+            detail = getattr(e, "detail", None) or str(e)
+            await self._update(job_id, {"$set": {"status": FAILED, "error": detail}})
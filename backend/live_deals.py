@@ -0,0 +1,113 @@
+import asyncio
+import logging
+import os
+import uuid
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
+
+from serialization import dumps, public_deal
+from subscriptions import Subscription, SubscriptionIndex
+
+logger = logging.getLogger(__name__)
+
+# Pushes buffered for a slow client before its oldest ones are dropped
+LIVE_DEALS_QUEUE_SIZE = int(os.environ.get('LIVE_DEALS_QUEUE_SIZE', '32'))
+# Seconds between keep-alive comments on an idle event stream
+LIVE_DEALS_HEARTBEAT = float(os.environ.get('LIVE_DEALS_HEARTBEAT', '15'))
+
+
+class LiveSubscription(Subscription):
+    """
+    A connected client's subscription and the pushes waiting to be sent to it
+    """
+
+    __slots__ = ("queue", "dropped")
+
+    def __init__(self, *args, queue_size: int = LIVE_DEALS_QUEUE_SIZE, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.queue: "asyncio.Queue[List[Dict[str, Any]]]" = asyncio.Queue(maxsize=max(1, queue_size))
+        self.dropped = 0
+
+    def push(self, deals: List[Dict[str, Any]]):
+        if self.queue.full():
+            # A client that can't keep up loses its oldest pushes rather than holding up ingestion
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(deals)
+
+
+class LiveDealHub:
+    """
+    In-process event bus from deal ingestion to connected clients. DealWriter
+    publishes the deals it inserts; each one is matched against the subscription
+    index and every subscriber it falls into gets one push per write batch with all
+    of its new deals, nearest first. Only writes made by this process are seen.
+    """
+
+    def __init__(self, queue_size: int = LIVE_DEALS_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscriptions = SubscriptionIndex()
+
+    def __len__(self):
+        return len(self._subscriptions)
+
+    def subscribe(
+        self,
+        lat: float,
+        lng: float,
+        radius: float,
+        category: Optional[str] = None,
+        min_discount: Optional[float] = None
+    ) -> LiveSubscription:
+        subscription = LiveSubscription(
+            str(uuid.uuid4()), lat, lng, radius, category, min_discount, queue_size=self.queue_size
+        )
+        self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: LiveSubscription):
+        self._subscriptions.remove(subscription)
+
+    def publish(self, documents: Iterable[Dict[str, Any]]) -> int:
+        """
+        Push newly written deal documents to the subscribers they match and return
+        the number of subscribers notified
+        """
+        if not len(self._subscriptions):
+            return 0
+        batches: Dict[LiveSubscription, List[Dict[str, Any]]] = {}
+        for document in documents:
+            location = document["location"]
+            matches = self._subscriptions.match(
+                location["lat"], location["lng"], document.get("category"), document.get("discount_percentage")
+            )
+            if not matches:
+                continue
+            deal = public_deal(document)
+            for subscription, distance in matches:
+                batches.setdefault(subscription, []).append({**deal, "distance": round(distance, 2)})
+
+        for subscription, deals in batches.items():
+            deals.sort(key=lambda deal: deal["distance"])
+            subscription.push(deals)
+        return len(batches)
+
+    async def events(self, subscription: LiveSubscription, heartbeat: float = LIVE_DEALS_HEARTBEAT) -> AsyncIterator[bytes]:
+        """
+        Server-sent events for a subscription: a "deals" event with a JSON array per
+        push, and a comment line while idle so proxies keep the connection open.
+        The subscription is removed when the client goes away.
+        """
+        try:
+            yield f"event: subscribed\ndata: {subscription.id}\n\n".encode()
+            while True:
+                try:
+                    deals = await asyncio.wait_for(subscription.queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+                    continue
+                yield b"event: deals\ndata: " + dumps(deals) + b"\n\n"
+        finally:
+            self.unsubscribe(subscription)
+
+
+live_deals = LiveDealHub()
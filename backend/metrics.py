@@ -0,0 +1,93 @@
+import functools
+import inspect
+import time
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, generate_latest
+
+from parsing import BELOW_MIN_DISCOUNT, INVALID_DISCOUNT, INVALID_PRICE, NO_DISCOUNT, ZERO_ORIGINAL_PRICE
+
+# Everything served on /metrics; a registry of our own keeps test re-imports from colliding
+registry = CollectorRegistry()
+
+# Sub-millisecond stages up to multi-second scrapes
+_STAGE_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+HANDLER_SECONDS = Histogram(
+    "deal_finder_handler_seconds", "Time spent in API handlers", ["handler"],
+    buckets=_STAGE_BUCKETS, registry=registry
+)
+DEALS_STAGE_SECONDS = Histogram(
+    "deal_finder_deals_stage_seconds", "Time spent in each stage of a /api/deals query", ["stage"],
+    buckets=_STAGE_BUCKETS, registry=registry
+)
+SCRAPE_STAGE_SECONDS = Histogram(
+    "deal_finder_scrape_stage_seconds", "Time spent in each stage of scraping one store", ["stage"],
+    buckets=_STAGE_BUCKETS, registry=registry
+)
+SCRAPED_DEALS = Counter(
+    "deal_finder_scraped_deals_total", "Scraped listing rows by outcome: accepted or the reject reason", ["outcome"],
+    registry=registry
+)
+
+# Label children are bound once here so the hot paths never build label dicts
+DEALS_HANDLER = HANDLER_SECONDS.labels(handler="/api/deals")
+SCRAPE_DEALS_HANDLER = HANDLER_SECONDS.labels(handler="/api/scrape-deals")
+SEARCH_HANDLER = HANDLER_SECONDS.labels(handler="/api/deals/search")
+
+DEALS_MONGO_QUERY = DEALS_STAGE_SECONDS.labels(stage="mongo_query")
+DEALS_DISTANCE_FILTER = DEALS_STAGE_SECONDS.labels(stage="distance_filter")
+DEALS_SORT = DEALS_STAGE_SECONDS.labels(stage="sort")
+DEALS_SERIALIZE = DEALS_STAGE_SECONDS.labels(stage="serialize")
+
+SCRAPE_FIRECRAWL = SCRAPE_STAGE_SECONDS.labels(stage="firecrawl")
+SCRAPE_PARSE = SCRAPE_STAGE_SECONDS.labels(stage="parse")
+SCRAPE_WRITE = SCRAPE_STAGE_SECONDS.labels(stage="write")
+
+SCRAPED_ACCEPTED = SCRAPED_DEALS.labels(outcome="accepted")
+SCRAPED_REJECTED = {
+    reason: SCRAPED_DEALS.labels(outcome=reason)
+    for reason in (NO_DISCOUNT, INVALID_DISCOUNT, INVALID_PRICE, ZERO_ORIGINAL_PRICE, BELOW_MIN_DISCOUNT)
+}
+
+
+def timed(histogram):
+    """
+    Decorator observing the duration of every call, for plain and async functions alike
+    """
+    def decorate(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    histogram.observe(time.perf_counter() - start)
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    histogram.observe(time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+def record_rejects(reject_counts):
+    """
+    Count rejected listing rows by reason; reasons unknown here get a child on first use
+    """
+    for reason, count in reject_counts.items():
+        child = SCRAPED_REJECTED.get(reason)
+        if child is None:
+            child = SCRAPED_REJECTED[reason] = SCRAPED_DEALS.labels(outcome=reason)
+        child.inc(count)
+
+
+def render():
+    """
+    Body and content type of the /metrics response in the Prometheus text format
+    """
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, List, Optional
 import uuid
 
 class Location(BaseModel):
@@ -22,3 +22,43 @@ class Deal(BaseModel):
     image_url: Optional[str] = None
     url: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.now)
+
+class PushSubscription(BaseModel):
+    # PushSubscription.toJSON() from the browser's PushManager
+    endpoint: str
+    keys: Dict[str, str] = {}
+    expirationTime: Optional[float] = None
+
+class DealAlertCreate(BaseModel):
+    lat: float = Field(ge=-90, le=90)
+    lng: float = Field(ge=-180, le=180)
+    radius: float = Field(5.0, gt=0, le=50)  # miles
+    category: Optional[str] = None
+    min_discount: Optional[float] = None
+    keywords: List[str] = []  # any of them in the title or description; empty matches every deal
+    push_subscription: PushSubscription
+
+class DealAlert(DealAlertCreate):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    created_at: datetime = Field(default_factory=datetime.now)
+
+# Fields of Deal in declaration order, and the defaults of the optional ones without a factory
+_DEAL_FIELDS = tuple(Deal.model_fields)
+_DEAL_DEFAULTS = {
+    name: field.default for name, field in Deal.model_fields.items()
+    if not field.is_required() and field.default_factory is None
+}
+
+def trusted_deal(**fields: Any) -> Dict[str, Any]:
+    """
+    A deal as a plain dict shaped like Deal.dict(), for data the app produced itself
+    such as normalized scraper output or the sample deals. Defaults are filled in
+    but nothing is validated or converted, so values must already have the right
+    types; input from outside the app goes through Deal(...) instead.
+    """
+    if "id" not in fields:
+        fields["id"] = str(uuid.uuid4())
+    if "created_at" not in fields:
+        fields["created_at"] = datetime.now()
+    # Missing required fields raise KeyError
+    return {name: fields[name] if name in fields else _DEAL_DEFAULTS[name] for name in _DEAL_FIELDS}
@@ -0,0 +1,55 @@
+import base64
+import json
+from typing import Any, Dict, Optional
+
+# Header carrying the token for the next page of /api/deals
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(deal: Dict[str, Any]) -> str:
+    """
+    Opaque token pointing just past deal in (distance, id) order.
+    The raw, unrounded distance is used so ties are resolved exactly.
+    """
+    position = {"id": deal["id"]}
+    if deal.get("distance") is not None:
+        position["d"] = deal["distance"]
+    raw = json.dumps(position, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Dict[str, Any]:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor("Malformed pagination cursor") from e
+
+    if not isinstance(position, dict) or not isinstance(position.get("id"), str):
+        raise InvalidCursor("Malformed pagination cursor")
+    if "d" in position and not isinstance(position["d"], (int, float)):
+        raise InvalidCursor("Malformed pagination cursor")
+    return position
+
+
+def keyset_match(position: Optional[Dict[str, Any]], by_distance: bool) -> Optional[Dict[str, Any]]:
+    """
+    $match stage selecting rows that sort after position
+    """
+    if position is None:
+        return None
+    if not by_distance:
+        return {"$match": {"id": {"$gt": position["id"]}}}
+    if "d" not in position:
+        raise InvalidCursor("Cursor does not belong to a distance-sorted query")
+    return {"$match": {"$or": [
+        {"distance": {"$gt": position["d"]}},
+        {"distance": position["d"], "id": {"$gt": position["id"]}}
+    ]}}
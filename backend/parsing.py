@@ -0,0 +1,153 @@
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Scraped deals below this discount are dropped
+MIN_DISCOUNT_PERCENTAGE = 15.0
+
+# Reasons a scraped row is rejected
+NO_DISCOUNT = "no_discount"
+INVALID_DISCOUNT = "invalid_discount"
+INVALID_PRICE = "invalid_price"
+ZERO_ORIGINAL_PRICE = "zero_original_price"
+BELOW_MIN_DISCOUNT = "below_min_discount"
+
+# First run of digits with grouping/decimal separators, e.g. "1,99,999.00" in "Rs. 1,99,999.00"
+_NUMBER = re.compile(r"\d[\d.,'\u00a0\u202f ]*")
+_GROUPING_SPACES = re.compile(r"['\u00a0\u202f ]")
+# "40%", "12.5 %", "12,5%"
+_PERCENT = re.compile(r"(\d+(?:[.,]\d+)?)\s*%")
+_NAN = float("nan")
+
+
+def parse_number(text: Any) -> float:
+    """
+    Number in a price or percentage string, or NaN when there is none.
+    Handles currency symbols and words, thousands separators (1,999 / 1.999.000 /
+    1 999 / Indian 1,99,999) and decimal commas (12,50 / 1.999,00).
+    """
+    if not isinstance(text, str):
+        if text is None:
+            return _NAN
+        if isinstance(text, (int, float)):
+            return float(text)
+        text = str(text)
+    match = _NUMBER.search(text)
+    if not match:
+        return _NAN
+    token = match.group()
+    if token.isdigit():
+        return float(token)
+    # Plain thousands grouping ("2,499", "1,99,999") is by far the most common shape
+    digits = token.replace(",", "")
+    if digits.isdigit() and len(token) - token.rfind(",") == 4:
+        return float(digits)
+    token = _GROUPING_SPACES.sub("", token).rstrip(".,")
+
+    comma, dot = token.rfind(","), token.rfind(".")
+    if comma >= 0 and dot >= 0:
+        # Whichever separator comes last is the decimal point
+        if comma > dot:
+            token = token.replace(".", "").replace(",", ".")
+        else:
+            token = token.replace(",", "")
+    elif comma >= 0:
+        if len(token) - comma == 4 or token.count(",") > 1:
+            token = token.replace(",", "")
+        else:
+            token = token.replace(",", ".")
+    elif token.count(".") > 1:
+        token = token.replace(".", "")
+    return float(token)
+
+
+class ParsedListing:
+    """
+    Column-wise result of normalizing a store's raw listing. Row i of every array
+    belongs to raw item i; reject_reasons[i] is None for accepted rows.
+    """
+
+    __slots__ = ("original_price", "sale_price", "discount", "reject_reasons", "accepted")
+
+    def __init__(self, original_price, sale_price, discount, reject_reasons):
+        self.original_price: np.ndarray = original_price
+        self.sale_price: np.ndarray = sale_price
+        self.discount: np.ndarray = discount
+        self.reject_reasons: List[Optional[str]] = reject_reasons
+        self.accepted: np.ndarray = np.array([reason is None for reason in reject_reasons], dtype=bool)
+
+    def __len__(self):
+        return len(self.reject_reasons)
+
+    def accepted_indices(self) -> np.ndarray:
+        return np.flatnonzero(self.accepted)
+
+    def reject_counts(self) -> Dict[str, int]:
+        return dict(Counter(reason for reason in self.reject_reasons if reason is not None))
+
+    @staticmethod
+    def price(value) -> Optional[float]:
+        return None if np.isnan(value) else float(value)
+
+
+def _text(value: Any) -> str:
+    if isinstance(value, str):
+        return value.strip()
+    return "" if value is None else str(value).strip()
+
+
+def _discount_from_text(text: str) -> float:
+    match = _PERCENT.search(text)
+    if match:
+        return float(match.group(1).replace(",", "."))
+    try:
+        return float(text.strip("%").strip())
+    except ValueError:
+        return _NAN
+
+
+def normalize_listing(raw_items: Sequence[Dict[str, Any]], min_discount: float = MIN_DISCOUNT_PERCENTAGE) -> ParsedListing:
+    """
+    Parse prices and discounts of a whole scraped listing in one pass over its rows.
+    The discount comes from the item's discount text when it has one, otherwise it is
+    derived from the original and sale prices.
+    """
+    original_prices: List[float] = []
+    sale_prices: List[float] = []
+    discounts: List[float] = []
+    reasons: List[Optional[str]] = []
+
+    for item in raw_items:
+        original_text = item.get("original_price")
+        sale_text = item.get("sale_price")
+        original = parse_number(original_text)
+        sale = parse_number(sale_text)
+
+        discount_text = _text(item.get("discount"))
+        if discount_text:
+            value = _discount_from_text(discount_text)
+            reason = INVALID_DISCOUNT if value != value else None
+        elif not (_text(original_text) and _text(sale_text)):
+            value, reason = _NAN, NO_DISCOUNT
+        elif original != original or sale != sale:
+            value, reason = _NAN, INVALID_PRICE
+        elif original <= 0:
+            value, reason = _NAN, ZERO_ORIGINAL_PRICE
+        else:
+            value, reason = round((original - sale) / original * 100, 2), None
+        # Only rows that are otherwise valid can fall below the minimum
+        if reason is None and value < min_discount:
+            reason = BELOW_MIN_DISCOUNT
+        original_prices.append(original)
+        sale_prices.append(sale)
+        discounts.append(value)
+        reasons.append(reason)
+
+    return ParsedListing(
+        np.array(original_prices, dtype=np.float64),
+        np.array(sale_prices, dtype=np.float64),
+        np.array(discounts, dtype=np.float64),
+        reasons
+    )
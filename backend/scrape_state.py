@@ -0,0 +1,74 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+# Seconds during which a successfully scraped store website is not scraped again
+STORE_SCRAPE_TTL = float(os.environ.get('STORE_SCRAPE_TTL', '900'))
+
+
+def listing_hash(store_deals) -> str:
+    """
+    Content hash of a raw Firecrawl listing, independent of key order
+    """
+    raw = json.dumps(store_deals, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class StoreFreshness:
+    """
+    Remembers when each store website was last scraped successfully and the hash of
+    what it returned, and coalesces concurrent scrapes of the same website
+    """
+
+    def __init__(self, ttl: float = STORE_SCRAPE_TTL, clock=time.monotonic):
+        self.ttl = ttl
+        self._clock = clock
+        # website -> (time of last successful scrape, content hash)
+        self._records: Dict[str, Tuple[float, str]] = {}
+        # website -> time its deals were last written
+        self._written: Dict[str, float] = {}
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    def is_fresh(self, website: str) -> bool:
+        record = self._records.get(website)
+        return record is not None and self._clock() - record[0] < self.ttl
+
+    def has_changed(self, website: str, content_hash: str, max_age: Optional[float] = None) -> bool:
+        """
+        Whether the listing differs from the last scrape. With max_age, a listing whose
+        deals were written more than max_age seconds ago also counts as changed, so
+        rewriting it renews the deals' expiry.
+        """
+        record = self._records.get(website)
+        if record is None or record[1] != content_hash:
+            return True
+        written = self._written.get(website)
+        return max_age is not None and (written is None or self._clock() - written >= max_age)
+
+    def record(self, website: str, content_hash: str, written: bool = True):
+        now = self._clock()
+        self._records[website] = (now, content_hash)
+        if written:
+            self._written[website] = now
+
+    def last_scraped(self, website: str) -> Optional[Tuple[float, str]]:
+        return self._records.get(website)
+
+    async def coalesce(self, website: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run factory() for website unless a call for it is already in flight, in which
+        case wait for that call's result instead
+        """
+        task = self._in_flight.get(website)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._in_flight[website] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(website, None))
+        # Shielded so one caller giving up doesn't cancel the scrape for the others
+        return await asyncio.shield(task)
+
+
+store_freshness = StoreFreshness()
@@ -0,0 +1,54 @@
+from typing import Any, Dict
+
+import orjson
+from bson import ObjectId
+from starlette.responses import Response
+
+from deal_writer import INTERNAL_FIELDS
+
+# Fields of a stored deal that never appear in API responses
+DEAL_EXCLUDED_FIELDS = ("_id", "location.point") + INTERNAL_FIELDS
+
+# $project stage that trims stored deals down to what responses return
+DEAL_PROJECTION = {"$project": {field: 0 for field in DEAL_EXCLUDED_FIELDS}}
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Encode straight to bytes; datetimes, nested dicts and lists are handled natively
+    """
+    return orjson.dumps(content, default=_default)
+
+
+def public_deal(row: Dict[str, Any], distance=None) -> Dict[str, Any]:
+    """
+    Response-shaped copy of a full stored deal row, optionally with its distance
+    """
+    deal = {key: value for key, value in row.items() if key not in DEAL_EXCLUDED_FIELDS}
+    location = deal.get("location")
+    if isinstance(location, dict) and "point" in location:
+        deal["location"] = {key: value for key, value in location.items() if key != "point"}
+    if distance is not None:
+        deal["distance"] = distance
+    return deal
+
+
+class FastJSONResponse(Response):
+    """
+    JSON response rendered with orjson in a single pass. Content that is already
+    encoded bytes, such as a cached body, is sent as is.
+    Return it from the endpoint directly so FastAPI skips jsonable_encoder.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
@@ -1,27 +1,48 @@
 from fastapi import FastAPI, HTTPException, Query, Depends
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 import uvicorn
 import os
+import asyncio
 import logging
-import requests
-import uuid
 import re
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import List, Optional, Any, Dict
-from pydantic import BaseModel, Field
 from pathlib import Path
-import json
-from math import radians, sin, cos, sqrt, atan2
-from bson import ObjectId
-from fastapi.encoders import jsonable_encoder
+from urllib.parse import urlsplit
 
 # /backend 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# Local modules read their settings from the environment, so import them after loading .env
+from alerts import deal_alerts
+from cache import DEALS_CACHE_GEOHASH_PRECISION, deals_cache
+from datagen import SYNTHETIC_DEALS_MAX, insert_deals, synthetic_deals
+from deal_index import DEAL_INDEX_ENABLED, deal_index
+from deal_writer import DealWriter, WriteReport, store_key
+from geo import bounding_box_query, calculate_distance, geo_point, geohash_center, miles_to_mongo_meters, MONGO_METERS_PER_MILE
+from http_client import FIRECRAWL_API_URL, SCRAPE_STORE_TIMEOUT, get_scrape_client
+from indexes import DEAL_INDEXES, RETIRED_DEAL_INDEXES, ensure_indexes
+from jobs import ScrapeJobQueue
+from live_deals import live_deals
+from metrics import (
+    DEALS_HANDLER, DEALS_MONGO_QUERY, DEALS_SERIALIZE, SCRAPE_DEALS_HANDLER, SCRAPE_FIRECRAWL,
+    SCRAPE_PARSE, SCRAPE_WRITE, SCRAPED_ACCEPTED, SEARCH_HANDLER, record_rejects, render as render_metrics, timed
+)
+from models import DealAlert, DealAlertCreate, trusted_deal
+from scrape_state import listing_hash, store_freshness
+from store_catalog import STORE_SEARCH_RADIUS, StoreCatalogError, store_catalog
+from store_selectors import SelectorRegistryError, selector_registry
+from parsing import normalize_listing
+from serialization import DEAL_PROJECTION, FastJSONResponse, dumps
+from pagination import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER,
+    InvalidCursor, decode_cursor, encode_cursor, keyset_match
+)
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
@@ -35,6 +56,7 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # Configure logging
@@ -47,46 +69,187 @@ logger = logging.getLogger(__name__)
 # Firecrawl API key
 FIRECRAWL_API_KEY = os.environ.get('FIRECRAWL_API_KEY')
 
-# Data models
-class Location(BaseModel):
-    lat: float
-    lng: float
-    address: str
-
-class Deal(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    title: str
-    description: str
-    discount_percentage: float
-    original_price: Optional[float] = None
-    sale_price: Optional[float] = None
-    business_name: str
-    category: str
-    location: Location
-    expiration_date: Optional[datetime] = None
-    image_url: Optional[str] = None
-    url: Optional[str] = None
-    created_at: datetime = Field(default_factory=datetime.now)
-
-# Calculate distance between two coordinates in miles
-def calculate_distance(lat1, lng1, lat2, lng2):
-    # Convert latitude and longitude from degrees to radians
-    lat1, lng1, lat2, lng2 = map(radians, [lat1, lng1, lat2, lng2])
+# Scraped deals rarely list an end date; they expire this long after they were last scraped
+SCRAPED_DEAL_LIFETIME = timedelta(hours=float(os.environ.get('SCRAPED_DEAL_LIFETIME_HOURS', '72')))
+
+# In-memory deal index kept in sync with every DealWriter, if enabled
+live_deal_index = deal_index if DEAL_INDEX_ENABLED else None
+
+# Firecrawl API integration
+async def fetch_store_listing(store):
+    """
+    Scrape a single store through Firecrawl and return the raw deal listing,
+    or None when the store could not be scraped
+    """
+    headers = {
+        "Authorization": f"Bearer {FIRECRAWL_API_KEY}",
+        "Content-Type": "application/json"
+    }
+    
+    # Look up the selectors for the store's website, falling back to the default ones
+    store_domain, extract_rules = selector_registry.lookup(store["website"])
+    logger.info(f"Using selectors for domain: {store_domain}")
+    
+    # Build the payload with the appropriate selectors
+    payload = {
+        "url": store["website"],
+        "wait_for": "domcontentloaded",
+        "extract_rules": extract_rules
+    }
     
-    # Haversine formula
-    dlng = lng2 - lng1
-    dlat = lat2 - lat1
-    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlng/2)**2
-    c = 2 * atan2(sqrt(a), sqrt(1-a))
-    radius = 3956  # Radius of Earth in miles
-    distance = radius * c
+    logger.info(f"Sending request to Firecrawl API for store: {store['name']}, URL: {store['website']}")
     
-    return distance
+    # Call the Firecrawl API
+    try:
+        response = await get_scrape_client().post(
+            FIRECRAWL_API_URL,
+            host_key=urlsplit(store["website"]).netloc,
+            headers=headers,
+            json=payload
+        )
+        
+        if response.status_code == 200:
+            data = response.json()
+            store_deals = data.get("deals", [])
+            if not store_deals and "extract_rules" in data:
+                # Try alternate format where extract_rules is returned
+                store_deals = data.get("extract_rules", {}).get("deals", [])
+            
+            return store_deals
+        else:
+            logger.error(f"Error from Firecrawl API for {store['name']}: {response.status_code} - {response.text}")
+            return None
+    
+    except Exception as e:
+        logger.error(f"Error scraping {store['name']}: {e}")
+        return None
 
-# Firecrawl API integration
-async def scrape_deals(location_name=None, lat=None, lng=None, category=None):
+@timed(SCRAPE_FIRECRAWL)
+async def fetch_store_listing_with_deadline(store):
     """
-    Use Firecrawl API to scrape deals from local store websites based on location
+    Fetch a store listing, giving up once its deadline passes so one slow site can't hold up the rest
+    """
+    try:
+        return await asyncio.wait_for(fetch_store_listing(store), timeout=SCRAPE_STORE_TIMEOUT)
+    except asyncio.TimeoutError:
+        logger.error(f"Timed out scraping {store['name']} after {SCRAPE_STORE_TIMEOUT}s")
+        return None
+
+@timed(SCRAPE_PARSE)
+def parse_store_deals(store, store_deals):
+    """
+    Turn a store's raw Firecrawl listing into deal dicts
+    """
+    store_results = []
+    if not store_deals:
+        logger.warning(f"No deals found for {store['name']}")
+        return store_results
+    
+    logger.info(f"Found {len(store_deals)} potential deals for {store['name']}")
+    
+    # Parse prices and discounts for the whole listing at once
+    parsed = normalize_listing(store_deals)
+    rejected = parsed.reject_counts()
+    record_rejects(rejected)
+    if rejected:
+        logger.info(f"Rejected {len(parsed) - int(parsed.accepted.sum())} deals from {store['name']}: {rejected}")
+    
+    # Prices and discounts are already parsed and the store comes from the catalog,
+    # so the deals are built as trusted dicts without model validation
+    location = {"lat": float(store["lat"]), "lng": float(store["lng"]), "address": store["address"]}
+    # Expiry dates are UTC, as MongoDB's TTL index reads them
+    expiration_date = datetime.utcnow() + SCRAPED_DEAL_LIFETIME
+    for i in parsed.accepted_indices():
+        deal_data = store_deals[i]
+        try:
+            image = deal_data.get("image")
+            # Create the deal object
+            deal = trusted_deal(
+                title=(deal_data.get("title") or "Unknown Deal").strip(),
+                description=(deal_data.get("description") or "").strip(),
+                discount_percentage=float(parsed.discount[i]),
+                business_name=store["name"],
+                category=store["category"],
+                location=location,
+                original_price=parsed.price(parsed.original_price[i]),
+                sale_price=parsed.price(parsed.sale_price[i]),
+                image_url=image if isinstance(image, str) else "",
+                url=store["website"],
+                expiration_date=expiration_date  # Usually not available from scraped data
+            )
+            store_results.append(deal)
+            
+        except Exception as e:
+            logger.error(f"Error processing deal from {store['name']}: {e}")
+    
+    SCRAPED_ACCEPTED.inc(len(store_results))
+    return store_results
+
+async def scrape_store(store):
+    """
+    Scrape a single store and return the parsed deals, or None when the store could not be scraped
+    """
+    store_deals = await fetch_store_listing_with_deadline(store)
+    if store_deals is None:
+        return None
+    return parse_store_deals(store, store_deals)
+
+async def ingest_store(store):
+    """
+    Scrape a store and write its deals, unless it was scraped within STORE_SCRAPE_TTL.
+    Concurrent requests for the same store website share a single in-flight ingest.
+    """
+    website = store["website"]
+    if store_freshness.is_fresh(website):
+        logger.info(f"Skipping {store['name']}: scraped within the last {store_freshness.ttl}s")
+        return {"store": store["name"], "status": "fresh", "write_report": WriteReport()}
+    return await store_freshness.coalesce(website, lambda: _ingest_store(store))
+
+async def _ingest_store(store):
+    # Rows written before an error are still counted in the store's report
+    report = WriteReport()
+    try:
+        store_deals = await fetch_store_listing_with_deadline(store)
+        if store_deals is None:
+            # Failed stores keep their previous deals
+            return {"store": store["name"], "status": "failed", "write_report": WriteReport()}
+        
+        # An unchanged listing is still rewritten once its deals are halfway to expiring
+        content_hash = listing_hash(store_deals)
+        renew_after = SCRAPED_DEAL_LIFETIME.total_seconds() / 2
+        if not store_freshness.has_changed(store["website"], content_hash, max_age=renew_after):
+            logger.info(f"Listing for {store['name']} is unchanged since the last scrape")
+            store_freshness.record(store["website"], content_hash, written=False)
+            return {"store": store["name"], "status": "unchanged", "write_report": WriteReport()}
+        
+        # Upsert in batches, then expire rows the store no longer lists. If some upserts
+        # failed, the old rows are kept and the store is retried on the next scrape.
+        deals = parse_store_deals(store, store_deals)
+        with SCRAPE_WRITE.time():
+            writer = DealWriter(db.deals, index=live_deal_index, events=[live_deals, deal_alerts])
+            await writer.add_many(deals)
+            report = await writer.close()
+            if not report.failed:
+                await writer.expire_stale([store_key(store["name"], store["address"])])
+        if deal_alerts.pending:
+            await deal_alerts.deliver(db.alert_notifications)
+        if not report.failed:
+            store_freshness.record(store["website"], content_hash)
+        deals_cache.invalidate_points([(store["lat"], store["lng"])])
+        
+        return {"store": store["name"], "status": "scraped", "write_report": report}
+    except Exception as e:
+        # One store's database errors must not fail the scrape for the others
+        logger.error(f"Error ingesting deals for {store['name']}: {e}")
+        if report.inserted or report.updated:
+            deals_cache.invalidate_points([(store["lat"], store["lng"])])
+        return {"store": store["name"], "status": "failed", "write_report": report}
+
+async def scrape_deals(location_name=None, lat=None, lng=None, category=None, progress=None):
+    """
+    Use Firecrawl API to scrape deals from local store websites based on location.
+    Each store's deals are written as soon as that store is done; progress, if given,
+    is told how many stores were found and when each one finishes.
     """
     try:
         if not location_name and (not lat or not lng):
@@ -94,13 +257,6 @@ async def scrape_deals(location_name=None, lat=None, lng=None, category=None):
         
         logger.info(f"Scraping deals for location: {location_name} or coordinates: {lat}, {lng}, category: {category}")
         
-        # Clear previous deals for this location to avoid duplicates
-        location_query = {}
-        if location_name:
-            location_query = {"location.address": {"$regex": location_name, "$options": "i"}}
-        
-        await db.deals.delete_many(location_query)
-        
         # Determine which stores to target based on location and category
         target_stores = await find_local_stores(location_name, lat, lng, category)
         
@@ -108,209 +264,34 @@ async def scrape_deals(location_name=None, lat=None, lng=None, category=None):
             logger.warning(f"No stores found for location: {location_name} or coordinates: {lat}, {lng}")
             return {"message": "No local stores found for the specified location"}
         
-        all_deals = []
+        if progress:
+            await progress.stores_found(len(target_stores))
         
-        for store in target_stores:
-            # Set up Firecrawl API request
-            headers = {
-                "Authorization": f"Bearer {FIRECRAWL_API_KEY}",
-                "Content-Type": "application/json"
-            }
-            
-            # Customized payload for each store website
-            store_selectors = {
-                # Zudio/Tata Cliq selectors
-                "tatacliq.com": {
-                    "selector": ".product-card, .product-grid-item, .product-tile",
-                    "properties": {
-                        "title": ".product-name, .product-title, h2",
-                        "description": ".product-description, .product-info",
-                        "discount": ".discount-label, .discount-tag, span:contains(\"%\")",
-                        "original_price": ".strike-price, .original-price, .old-price",
-                        "sale_price": ".discount-price, .selling-price, .sale-price",
-                        "image": "img@src"
-                    }
-                },
-                # Levi's selectors
-                "levi.in": {
-                    "selector": ".product-tile, .product-item, .product-card",
-                    "properties": {
-                        "title": ".product-name, .product-title",
-                        "description": ".product-description, .product-details",
-                        "discount": ".badge, .promo-badge, .discount-percentage",
-                        "original_price": ".price-standard, .list-price, .original-price",
-                        "sale_price": ".price-sales, .sale-price, .current-price",
-                        "image": "img.product-image@src"
-                    }
-                },
-                # H&M selectors
-                "hm.com": {
-                    "selector": ".product-item, .product-tile, li.product-detail",
-                    "properties": {
-                        "title": ".item-heading, .product-title, h3",
-                        "description": ".product-description, .item-description",
-                        "discount": ".item-price .sale, .discount-label, span:contains(\"%\")",
-                        "original_price": ".price-regular, .original-price",
-                        "sale_price": ".price-sale, .sale-price, .reduced-price",
-                        "image": "img.item-image@src"
-                    }
-                },
-                # Dominos selectors
-                "dominos.co.in": {
-                    "selector": ".offer-box, .coupon-box, .deal-item",
-                    "properties": {
-                        "title": ".offer-title, .coupon-title, h3",
-                        "description": ".offer-description, .details",
-                        "discount": ".discount-text, .deal-discount, span:contains(\"%\")",
-                        "original_price": ".original-price, .strike-price",
-                        "sale_price": ".offer-price, .deal-price",
-                        "image": "img@src"
-                    }
-                },
-                # Default selectors for any other store
-                "default": {
-                    "selector": "div.product, div.offer, div.promotion, div.deal, article.product, li.product",
-                    "properties": {
-                        "title": "h2, h3, .product-title, .offer-title, .title",
-                        "description": ".description, .product-details, p, .offer-description",
-                        "discount": ".discount, .sale-badge, .offer-percentage, span:contains(\"%\")",
-                        "original_price": ".original-price, .regular-price, .old-price, del",
-                        "sale_price": ".sale-price, .offer-price, .special-price, ins",
-                        "image": "img@src"
-                    }
-                }
-            }
-            
-            # Determine which selectors to use based on the store's website URL
-            store_domain = None
-            for domain in store_selectors.keys():
-                if domain in store["website"]:
-                    store_domain = domain
-                    break
-            
-            # Use default selectors if the domain doesn't match any known ones
-            if not store_domain or store_domain == "default":
-                store_domain = "default"
-                
-            logger.info(f"Using selectors for domain: {store_domain}")
-            
-            # Build the payload with the appropriate selectors
-            payload = {
-                "url": store["website"],
-                "wait_for": "domcontentloaded",
-                "extract_rules": {
-                    "deals": {
-                        "selector": store_selectors[store_domain]["selector"],
-                        "type": "list",
-                        "properties": store_selectors[store_domain]["properties"]
-                    }
-                }
-            }
-            
-            logger.info(f"Sending request to Firecrawl API for store: {store['name']}, URL: {store['website']}")
-            
-            # Call the Firecrawl API
-            try:
-                response = requests.post(
-                    "https://api.firecrawl.dev/v1/scrape",
-                    headers=headers,
-                    json=payload,
-                    timeout=30
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    store_deals = data.get("deals", [])
-                    if not store_deals and "extract_rules" in data:
-                        # Try alternate format where extract_rules is returned
-                        store_deals = data.get("extract_rules", {}).get("deals", [])
-                    
-                    if store_deals:
-                        logger.info(f"Found {len(store_deals)} potential deals for {store['name']}")
-                        
-                        # Process and store each deal
-                        for deal_data in store_deals:
-                            try:
-                                # Extract discount percentage
-                                discount_text = deal_data.get("discount", "")
-                                if not discount_text:
-                                    # Try to calculate from original and sale prices
-                                    original_price_text = deal_data.get("original_price", "").replace("$", "").replace("₹", "").replace("€", "").strip()
-                                    sale_price_text = deal_data.get("sale_price", "").replace("$", "").replace("₹", "").replace("€", "").strip()
-                                    
-                                    if original_price_text and sale_price_text:
-                                        try:
-                                            original_price = float(original_price_text)
-                                            sale_price = float(sale_price_text)
-                                            if original_price > 0:
-                                                discount_percentage = round(((original_price - sale_price) / original_price) * 100, 2)
-                                            else:
-                                                continue
-                                        except (ValueError, TypeError):
-                                            continue
-                                    else:
-                                        continue
-                                else:
-                                    # Extract percentage from text
-                                    discount_match = re.search(r'(\d+)[%]', discount_text)
-                                    if discount_match:
-                                        discount_percentage = float(discount_match.group(1))
-                                    else:
-                                        try:
-                                            discount_percentage = float(discount_text.strip("%"))
-                                        except (ValueError, TypeError):
-                                            continue
-                                
-                                # Skip deals with less than 15% discount
-                                if discount_percentage < 15:
-                                    continue
-                                
-                                # Format prices
-                                original_price_text = deal_data.get("original_price", "").replace("$", "").replace("₹", "").replace("€", "").strip()
-                                sale_price_text = deal_data.get("sale_price", "").replace("$", "").replace("₹", "").replace("€", "").strip()
-                                
-                                try:
-                                    original_price = float(original_price_text) if original_price_text else None
-                                    sale_price = float(sale_price_text) if sale_price_text else None
-                                except (ValueError, TypeError):
-                                    original_price = None
-                                    sale_price = None
-                                
-                                # Create the deal object
-                                deal = Deal(
-                                    title=deal_data.get("title", "Unknown Deal").strip(),
-                                    description=deal_data.get("description", "").strip(),
-                                    discount_percentage=discount_percentage,
-                                    business_name=store["name"],
-                                    category=store["category"],
-                                    location=Location(
-                                        lat=store["lat"],
-                                        lng=store["lng"],
-                                        address=store["address"]
-                                    ),
-                                    original_price=original_price,
-                                    sale_price=sale_price,
-                                    image_url=deal_data.get("image", ""),
-                                    url=store["website"],
-                                    expiration_date=None  # Usually not available from scraped data
-                                )
-                                
-                                # Store in database
-                                await db.deals.insert_one(deal.dict())
-                                all_deals.append(deal)
-                                
-                            except Exception as e:
-                                logger.error(f"Error processing deal from {store['name']}: {e}")
-                    else:
-                        logger.warning(f"No deals found for {store['name']}")
-                else:
-                    logger.error(f"Error from Firecrawl API for {store['name']}: {response.status_code} - {response.text}")
-            
-            except Exception as e:
-                logger.error(f"Error scraping {store['name']}: {e}")
+        async def ingest_and_report(store):
+            result = await ingest_store(store)
+            if progress:
+                await progress.store_done({
+                    "store": result["store"],
+                    "status": result["status"],
+                    "deals_written": result["write_report"].inserted + result["write_report"].updated
+                })
+            return result
+        
+        # Scrape all stores concurrently; the shared client enforces the concurrency limits
+        store_results = await asyncio.gather(*(ingest_and_report(store) for store in target_stores))
         
-        return {"message": f"Scraped and processed {len(all_deals)} deals from {len(target_stores)} stores"}
+        report = WriteReport()
+        for result in store_results:
+            report.merge(result["write_report"])
+        
+        return {
+            "message": f"Scraped and processed {report.inserted + report.updated} deals from {len(target_stores)} stores",
+            "stores": [{"store": result["store"], "status": result["status"]} for result in store_results],
+            "write_report": report.dict()
+        }
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in scrape_deals: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -319,140 +300,17 @@ async def find_local_stores(location_name=None, lat=None, lng=None, category=Non
     """
     Find local stores based on location and category
     This would typically use an external API like Google Places, but for demonstration
-    we'll use a simplified approach with some predefined stores
+    we use the store catalog in data/stores.json
     """
     stores = []
     
-    # Check for specific Bengaluru neighborhoods
-    is_jayanagar = False
-    is_brigade_road = False
-    is_san_francisco = False
+    # Stores of every named area the location refers to
+    for area in store_catalog.resolve_areas(location_name, lat, lng):
+        stores.extend(area.stores)
     
-    if location_name:
-        is_jayanagar = "jayanagar" in location_name.lower()
-        is_brigade_road = "brigade" in location_name.lower() or "brigade road" in location_name.lower()
-        is_san_francisco = "san francisco" in location_name.lower() or "sf" in location_name.lower()
-    elif lat and lng:
-        # Jayanagar area
-        is_jayanagar = 12.93 <= float(lat) <= 12.94 and 77.58 <= float(lng) <= 77.59
-        # Brigade Road area
-        is_brigade_road = 12.96 <= float(lat) <= 12.97 and 77.60 <= float(lng) <= 77.61
-        # San Francisco
-        is_san_francisco = 37.7 <= float(lat) <= 37.8 and -122.5 <= float(lng) <= -122.3
-    
-    # Define stores for Jayanagar
-    if is_jayanagar:
-        jayanagar_stores = [
-            {
-                "name": "Zudio Jayanagar",
-                "category": "retail",
-                "address": "11th Main Rd, 2nd Block, Jayanagar, Bengaluru",
-                "lat": 12.9399039,
-                "lng": 77.5826382,
-                "website": "https://www.tatacliq.com/zudio/c-msh1451/offers"
-            },
-            {
-                "name": "Levi's Store Jayanagar",
-                "category": "retail",
-                "address": "30th Cross, Jayanagar 2nd Block, Bengaluru",
-                "lat": 12.9385,
-                "lng": 77.5832,
-                "website": "https://www.levi.in/discount/sale"
-            },
-            {
-                "name": "H&M Jayanagar",
-                "category": "retail",
-                "address": "Cool Joint Rd, Jayanagar 2nd Block, Bengaluru",
-                "lat": 12.9410,
-                "lng": 77.5815,
-                "website": "https://www2.hm.com/en_in/sale.html"
-            },
-            {
-                "name": "Dominos Pizza Jayanagar",
-                "category": "restaurant",
-                "address": "30th Cross, Jayanagar 2nd Block, Bengaluru",
-                "lat": 12.9395,
-                "lng": 77.5840,
-                "website": "https://www.dominos.co.in/offers"
-            }
-        ]
-        stores.extend(jayanagar_stores)
-    
-    # Define stores for Brigade Road
-    if is_brigade_road:
-        brigade_road_stores = [
-            {
-                "name": "Lifestyle Brigade Road",
-                "category": "retail",
-                "address": "51, Brigade Road, Bengaluru",
-                "lat": 12.9720,
-                "lng": 77.6081,
-                "website": "https://www.lifestylestores.com/in/en/c/sale"
-            },
-            {
-                "name": "Adidas Store Brigade Road",
-                "category": "retail",
-                "address": "42, Brigade Road, Bengaluru",
-                "lat": 12.9723,
-                "lng": 77.6078,
-                "website": "https://www.adidas.co.in/sale"
-            },
-            {
-                "name": "Westside Brigade Road",
-                "category": "retail",
-                "address": "28, Brigade Road, Bengaluru",
-                "lat": 12.9728,
-                "lng": 77.6075,
-                "website": "https://www.westside.com/collections/the-sale"
-            },
-            {
-                "name": "Hard Rock Cafe",
-                "category": "restaurant",
-                "address": "33, Brigade Road, Bengaluru",
-                "lat": 12.9725,
-                "lng": 77.6079,
-                "website": "https://www.hardrockcafe.com/location/bengaluru/specials.aspx"
-            }
-        ]
-        stores.extend(brigade_road_stores)
-    
-    # Define some stores for San Francisco
-    if is_san_francisco:
-        sf_stores = [
-            {
-                "name": "Gap Union Square",
-                "category": "retail",
-                "address": "123 Market St, San Francisco, CA",
-                "lat": 37.7749,
-                "lng": -122.4194,
-                "website": "https://www.gap.com/browse/category.do?cid=1065504"
-            },
-            {
-                "name": "Little Italy Restaurant",
-                "category": "restaurant",
-                "address": "456 Mission St, San Francisco, CA",
-                "lat": 37.7739,
-                "lng": -122.4312,
-                "website": "https://littleitaly-sf.com/specials/"
-            },
-            {
-                "name": "Best Buy SF",
-                "category": "retail",
-                "address": "789 Powell St, San Francisco, CA",
-                "lat": 37.7833,
-                "lng": -122.4167,
-                "website": "https://www.bestbuy.com/site/electronics/top-deals/pcmcat1563299784494.c"
-            },
-            {
-                "name": "Cheesecake Factory",
-                "category": "restaurant",
-                "address": "101 California St, San Francisco, CA",
-                "lat": 37.7694,
-                "lng": -122.4862,
-                "website": "https://www.thecheesecakefactory.com/specials-and-promotions/"
-            }
-        ]
-        stores.extend(sf_stores)
+    # Outside the named areas, fall back to the stores around the coordinates
+    if not stores and lat and lng:
+        stores = store_catalog.stores_near(float(lat), float(lng), STORE_SEARCH_RADIUS)
     
     # Filter by category if provided
     if category and category != "all":
@@ -465,9 +323,8 @@ async def generate_sample_deals():
     """
     Generate sample deals for testing purposes
     """
-    # Clear ALL existing deals first
-    await db.deals.delete_many({})
-    
+    # Expiry dates are relative so the samples stay live; UTC, as the TTL index reads them
+    now = datetime.utcnow()
     sample_deals = [
         # San Francisco Deals
         {
@@ -483,7 +340,7 @@ async def generate_sample_deals():
             },
             "original_price": 100.0,
             "sale_price": 50.0,
-            "expiration_date": datetime(2025, 5, 1),
+            "expiration_date": now + timedelta(days=30),
             "image_url": "https://images.unsplash.com/photo-1567401893414-76b7b1e5a7a5?ixlib=rb-1.2.1&auto=format&fit=crop&w=800&q=60",
             "url": "https://www.gap.com/browse/category.do?cid=1065504"
         },
@@ -500,7 +357,7 @@ async def generate_sample_deals():
             },
             "original_price": 25.0,
             "sale_price": 12.5,
-            "expiration_date": datetime(2025, 4, 15),
+            "expiration_date": now + timedelta(days=14),
             "image_url": "https://images.unsplash.com/photo-1513104890138-7c749659a591?ixlib=rb-1.2.1&auto=format&fit=crop&w=800&q=60",
             "url": "https://littleitaly-sf.com/specials/"
         },
@@ -517,7 +374,7 @@ async def generate_sample_deals():
             },
             "original_price": 1000.0,
             "sale_price": 700.0,
-            "expiration_date": datetime(2025, 4, 30),
+            "expiration_date": now + timedelta(days=29),
             "image_url": "https://images.unsplash.com/photo-1498049794561-7780e7231661?ixlib=rb-1.2.1&auto=format&fit=crop&w=800&q=60",
             "url": "https://www.bestbuy.com/site/electronics/top-deals/pcmcat1563299784494.c"
         },
@@ -534,7 +391,7 @@ async def generate_sample_deals():
             },
             "original_price": 50.0,
             "sale_price": 40.0,
-            "expiration_date": datetime(2025, 5, 15),
+            "expiration_date": now + timedelta(days=44),
             "image_url": "https://images.unsplash.com/photo-1504674900247-0877df9cc836?ixlib=rb-1.2.1&auto=format&fit=crop&w=800&q=60",
             "url": "https://www.thecheesecakefactory.com/specials-and-promotions/"
         },
@@ -551,7 +408,7 @@ async def generate_sample_deals():
             },
             "original_price": 60.0,
             "sale_price": 40.0,
-            "expiration_date": datetime(2025, 6, 1),
+            "expiration_date": now + timedelta(days=61),
             "image_url": "https://images.unsplash.com/photo-1507842217343-583bb7270b66?ixlib=rb-1.2.1&auto=format&fit=crop&w=800&q=60",
             "url": "https://www.barnesandnoble.com/b/books/_/N-1fZ29Z8q8"
         },
@@ -570,7 +427,7 @@ async def generate_sample_deals():
             },
             "original_price": 2000.0,
             "sale_price": 1200.0,
-            "expiration_date": datetime(2025, 5, 10),
+            "expiration_date": now + timedelta(days=39),
             "image_url": "https://images.unsplash.com/photo-1441984904996-e0b6ba687e04?ixlib=rb-1.2.1&auto=format&fit=crop&w=800&q=60",
             "url": "https://www.tatacliq.com/zudio/c-msh1451/offers"
         },
@@ -587,7 +444,7 @@ async def generate_sample_deals():
             },
             "original_price": 250.0,
             "sale_price": 187.5,
-            "expiration_date": datetime(2025, 4, 20),
+            "expiration_date": now + timedelta(days=19),
             "image_url": "https://images.unsplash.com/photo-1610192244261-3f33de3f55e4?ixlib=rb-1.2.1&auto=format&fit=crop&w=800&q=60",
             "url": "https://www.zomato.com/bangalore/south-indian-restaurants-in-jayanagar"
         },
@@ -604,7 +461,7 @@ async def generate_sample_deals():
             },
             "original_price": 3999.0,
             "sale_price": 1999.0,
-            "expiration_date": datetime(2025, 5, 5),
+            "expiration_date": now + timedelta(days=34),
             "image_url": "https://images.unsplash.com/photo-1497935586047-9242eb4fc795?ixlib=rb-1.2.1&auto=format&fit=crop&w=800&q=60",
             "url": "https://www.levi.in/discount/sale"
         },
@@ -621,7 +478,7 @@ async def generate_sample_deals():
             },
             "original_price": 1499.0,
             "sale_price": 1199.0,
-            "expiration_date": datetime(2025, 4, 25),
+            "expiration_date": now + timedelta(days=24),
             "image_url": "https://images.unsplash.com/photo-1550009158-9ebf69173e03?ixlib=rb-1.2.1&auto=format&fit=crop&w=800&q=60",
             "url": "https://www2.hm.com/en_in/sale.html"
         },
@@ -640,7 +497,7 @@ async def generate_sample_deals():
             },
             "original_price": 4999.0,
             "sale_price": 3499.3,
-            "expiration_date": datetime(2025, 5, 20),
+            "expiration_date": now + timedelta(days=49),
             "image_url": "https://images.unsplash.com/photo-1572804013309-59a88b7e92f1?ixlib=rb-1.2.1&auto=format&fit=crop&w=800&q=60",
             "url": "https://www.lifestylestores.com/in/en/c/sale"
         },
@@ -657,7 +514,7 @@ async def generate_sample_deals():
             },
             "original_price": 8999.0,
             "sale_price": 5999.0,
-            "expiration_date": datetime(2025, 6, 10),
+            "expiration_date": now + timedelta(days=70),
             "image_url": "https://images.unsplash.com/photo-1542291026-7eec264c27ff?ixlib=rb-1.2.1&auto=format&fit=crop&w=800&q=60",
             "url": "https://www.adidas.co.in/sale"
         },
@@ -674,7 +531,7 @@ async def generate_sample_deals():
             },
             "original_price": 2499.0,
             "sale_price": 1499.4,
-            "expiration_date": datetime(2025, 5, 15),
+            "expiration_date": now + timedelta(days=44),
             "image_url": "https://images.unsplash.com/photo-1620799140188-3b2a02fd9a77?ixlib=rb-1.2.1&auto=format&fit=crop&w=800&q=60",
             "url": "https://www.westside.com/collections/the-sale"
         },
@@ -691,135 +548,346 @@ async def generate_sample_deals():
             },
             "original_price": 2000.0,
             "sale_price": 1500.0,
-            "expiration_date": datetime(2025, 5, 30),
+            "expiration_date": now + timedelta(days=59),
             "image_url": "https://images.unsplash.com/photo-1550966871-3ed3cdb5ed0c?ixlib=rb-1.2.1&auto=format&fit=crop&w=800&q=60",
             "url": "https://www.hardrockcafe.com/location/bengaluru/specials.aspx"
         }
     ]
     
-    # Insert sample deals
-    for deal in sample_deals:
-        deal_obj = Deal(**deal)
-        await db.deals.insert_one(deal_obj.dict())
+    # Upsert sample deals, then clear ALL other existing deals
+    writer = DealWriter(db.deals, index=live_deal_index, events=[live_deals, deal_alerts])
+    await writer.add_many(trusted_deal(**deal) for deal in sample_deals)
+    await writer.expire_stale()
+    report = await writer.close()
+    if deal_alerts.pending:
+        await deal_alerts.deliver(db.alert_notifications)
+    deals_cache.clear()
     
-    return {"message": f"Generated {len(sample_deals)} sample deals"}
+    return {"message": f"Generated {report.inserted + report.updated} sample deals", "write_report": report.dict()}
 
 # API routes
 @app.get("/api")
 async def root():
     return {"message": "Welcome to the Real-Time Local Deal Finder API"}
 
-# Helper function to convert MongoDB documents to JSON-serializable objects
-def serialize_deal(deal: Dict[str, Any]) -> Dict[str, Any]:
-    if deal.get("_id"):
-        deal["id"] = str(deal["_id"])
-        del deal["_id"]
+def neighborhood_filter(lat, lng, radius, location):
+    """
+    Address token deals must contain and the effective radius for a located query.
+    Only deals from the neighborhood the user is in, if any, are included; some
+    neighborhoods cap the distance regardless of the requested radius.
+    """
+    address_token, max_distance = None, radius
+    neighborhood = store_catalog.primary_area(location, lat, lng)
+    if neighborhood is not None:
+        address_token = neighborhood.address_token
+        if neighborhood.max_radius is not None:
+            max_distance = neighborhood.max_radius
+    return address_token, max_distance
+
+def build_deals_pipeline(lat, lng, category, address_token, max_distance, min_discount, limit, position, stream):
+    """
+    Aggregation pipeline for a deals query, and the (lat, lng, radius) area it covers.
+    address_token and max_distance come from neighborhood_filter.
+    """
+    # Build query
+    query = {"discount_percentage": {"$gte": min_discount}}
     
-    # Convert any nested ObjectIds
-    for key, value in deal.items():
-        if isinstance(value, ObjectId):
-            deal[key] = str(value)
-        elif isinstance(value, dict):
-            deal[key] = serialize_deal(value)
-        elif isinstance(value, list):
-            deal[key] = [serialize_deal(item) if isinstance(item, dict) else item for item in value]
+    if category:
+        query["category"] = category
     
-    return deal
+    # The TTL monitor only runs once a minute, so leave out rows that expired since
+    query["expiration_date"] = {"$gt": datetime.utcnow()}
+    
+    by_distance = lat is not None and lng is not None
+    after_position = keyset_match(position, by_distance)
+    area = None
+    
+    # Filter by distance if location is provided
+    if by_distance:
+        if address_token:
+            query["location.address"] = {"$regex": re.escape(address_token)}
+        # A plain lat/lng range check lets MongoDB discard far-away rows before
+        # computing exact spherical distances
+        query.update(bounding_box_query(lat, lng, max_distance))
+        area = (lat, lng, max_distance)
+        
+        # Let MongoDB filter by radius and sort by distance using the 2dsphere index
+        geo_near = {
+            "near": geo_point(lat, lng),
+            "key": "location.point",
+            "distanceField": "distance",
+            "distanceMultiplier": 1 / MONGO_METERS_PER_MILE,
+            "maxDistance": miles_to_mongo_meters(max_distance),
+            "query": query,
+            "spherical": True
+        }
+        if position is not None:
+            # Skip everything nearer than the previous page; ties are resolved by the keyset match.
+            # The bound is loosened slightly so rounding in the unit conversion can't drop a tie.
+            geo_near["minDistance"] = miles_to_mongo_meters(position["d"]) * (1 - 1e-9)
+        pipeline = [{"$geoNear": geo_near}]
+        sort_order = {"distance": 1, "id": 1}
+    else:
+        pipeline = [{"$match": query}]
+        sort_order = {"id": 1}
+    
+    if after_position:
+        pipeline.append(after_position)
+    
+    # $geoNear already yields rows nearest first, so a stream can skip the blocking
+    # sort on the tie-breaker and start sending immediately
+    if not (stream and by_distance):
+        pipeline.append({"$sort": sort_order})
+    
+    if stream:
+        if limit:
+            pipeline.append({"$limit": limit})
+    else:
+        # Fetch one extra row to know whether another page exists
+        pipeline.append({"$limit": limit + 1})
+    # Only return the fields responses use; documents can then be encoded as they come
+    pipeline.append(DEAL_PROJECTION)
+    return pipeline, area
+
+def nearest_indexed_deals(lat, lng, category, address_token, max_distance, min_discount, limit, position):
+    """
+    Same rows as the $geoNear pipeline (including the extra row that signals another
+    page) answered from the in-memory deal index, and the area they cover
+    """
+    after = None
+    if position is not None:
+        if "d" not in position:
+            raise InvalidCursor("Cursor does not belong to a distance-sorted query")
+        after = (position["d"], position["id"])
+    deals = live_deal_index.nearest(
+        lat, lng, max_distance,
+        k=limit + 1,
+        category=category,
+        min_discount=min_discount,
+        address_token=address_token,
+        after=after
+    )
+    return deals, (lat, lng, max_distance)
 
 @app.get("/api/deals")
+@timed(DEALS_HANDLER)
 async def get_deals(
     lat: float = Query(None, description="User's latitude"),
     lng: float = Query(None, description="User's longitude"),
     category: Optional[str] = Query(None, description="Filter by category (retail, restaurant)"),
-    radius: float = Query(5.0, description="Search radius in miles, default 5 miles"),
+    radius: float = Query(5.0, gt=0, le=50, description="Search radius in miles, default 5 miles"),
     min_discount: float = Query(15.0, description="Minimum discount percentage"),
-    location: Optional[str] = Query(None, description="Location name for more precise filtering")
+    location: Optional[str] = Query(None, description="Location name for more precise filtering"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description=f"Page size, default {DEFAULT_PAGE_SIZE}; unlimited when streaming"),
+    next_cursor: Optional[str] = Query(None, alias="next", description=f"Token from the {NEXT_CURSOR_HEADER} header of the previous page"),
+    stream: bool = Query(False, description="Stream deals as newline-delimited JSON")
 ):
     """
     Get deals filtered by location, category, and discount percentage
     """
     try:
-        # Build query
-        query = {"discount_percentage": {"$gte": min_discount}}
-        
-        if category:
-            query["category"] = category
-        
-        # Get deals from database
-        cursor = db.deals.find(query)
-        deals = await cursor.to_list(length=100)
+        position = decode_cursor(next_cursor) if next_cursor else None
+        # The neighborhood is decided by where the user actually is, before any snapping
+        address_token, max_distance = neighborhood_filter(lat, lng, radius, location)
         
-        # Convert documents to JSON-serializable objects
-        serialized_deals = [serialize_deal(deal) for deal in deals]
+        if stream:
+            pipeline, _ = build_deals_pipeline(
+                lat, lng, category, address_token, max_distance, min_discount, limit, position, stream=True
+            )
+            return StreamingResponse(stream_deals(pipeline), media_type="application/x-ndjson")
         
-        # Filter by distance if location is provided
+        # Nearby users share cache entries: the distance origin is snapped to the center of their geohash cell
+        cell = None
         if lat is not None and lng is not None:
-            filtered_deals = []
-            # Check for specific Bengaluru neighborhoods
-            is_jayanagar = False
-            is_brigade_road = False
-            is_san_francisco = False
-            
-            if location:
-                is_jayanagar = "jayanagar" in location.lower()
-                is_brigade_road = "brigade" in location.lower() or "brigade road" in location.lower()
-                is_san_francisco = "san francisco" in location.lower() or "sf" in location.lower()
-            elif lat and lng:
-                # Jayanagar area
-                is_jayanagar = 12.93 <= float(lat) <= 12.94 and 77.58 <= float(lng) <= 77.59
-                # Brigade Road area
-                is_brigade_road = 12.96 <= float(lat) <= 12.97 and 77.60 <= float(lng) <= 77.61
-                # San Francisco
-                is_san_francisco = 37.7 <= float(lat) <= 37.8 and -122.5 <= float(lng) <= -122.3
-            
-            for deal in serialized_deals:
-                # Only include deals from the correct neighborhood
-                if is_jayanagar:
-                    if "Jayanagar" not in deal["location"]["address"]:
-                        continue
-                elif is_brigade_road:
-                    if "Brigade" not in deal["location"]["address"]:
-                        continue
-                elif is_san_francisco:
-                    if "San Francisco" not in deal["location"]["address"]:
-                        continue
-                    
-                deal_lat = deal["location"]["lat"]
-                deal_lng = deal["location"]["lng"]
-                distance = calculate_distance(lat, lng, deal_lat, deal_lng)
-                
-                # If we're in Brigade Road, prioritize Brigade Road deals within 1 mile
-                if is_brigade_road and "Brigade" in deal["location"]["address"]:
-                    # Only include Brigade Road deals that are very close
-                    if distance <= 1.0:
-                        deal["distance"] = round(distance, 2)
-                        filtered_deals.append(deal)
-                # If we're in Jayanagar, prioritize Jayanagar deals within 1 mile
-                elif is_jayanagar and "Jayanagar" in deal["location"]["address"]:
-                    if distance <= 1.0:
-                        deal["distance"] = round(distance, 2)
-                        filtered_deals.append(deal)
-                # For San Francisco or general case, use the specified radius
-                elif is_san_francisco and "San Francisco" in deal["location"]["address"]:
-                    if distance <= radius:
-                        deal["distance"] = round(distance, 2)
-                        filtered_deals.append(deal)
-                # General case for any other locations
-                elif distance <= radius:
-                    deal["distance"] = round(distance, 2)
-                    filtered_deals.append(deal)
+            cell, lat, lng = geohash_center(lat, lng, DEALS_CACHE_GEOHASH_PRECISION)
+        page_size = limit or DEFAULT_PAGE_SIZE
+        cache_key = (cell, address_token, max_distance, category, min_discount, page_size, next_cursor)
+        
+        cached = deals_cache.get(cache_key)
+        if cached is None:
+            if cell is not None and live_deal_index is not None and live_deal_index.ready:
+                deals, area = nearest_indexed_deals(
+                    lat, lng, category, address_token, max_distance, min_discount, page_size, position
+                )
+            else:
+                pipeline, area = build_deals_pipeline(
+                    lat, lng, category, address_token, max_distance, min_discount, page_size, position, stream=False
+                )
+                with DEALS_MONGO_QUERY.time():
+                    deals = await db.deals.aggregate(pipeline).to_list(length=page_size + 1)
+            token = None
+            if len(deals) > page_size:
+                deals = deals[:page_size]
+                token = encode_cursor(deals[-1])
             
-            # Sort by distance
-            filtered_deals.sort(key=lambda x: x["distance"])
-            return filtered_deals
+            # Encode once; cache hits send the stored bytes without touching the deals again
+            with DEALS_SERIALIZE.time():
+                cached = (dumps([present_deal(deal) for deal in deals]), token)
+            deals_cache.put(cache_key, cached, area)
         
-        return serialized_deals
+        body, token = cached
+        return FastJSONResponse(body, headers={NEXT_CURSOR_HEADER: token} if token else None)
     
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error getting deals: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/api/scrape-deals")
+def build_search_pipeline(q, lat, lng, radius, category, min_discount, limit):
+    """
+    Aggregation pipeline ranking deals by MongoDB's text score, used until the deal index is ready
+    """
+    query = {"$text": {"$search": q}, "expiration_date": {"$gt": datetime.utcnow()}}
+    if category:
+        query["category"] = category
+    if min_discount is not None:
+        query["discount_percentage"] = {"$gte": min_discount}
+    if lat is not None and lng is not None:
+        query.update(bounding_box_query(lat, lng, radius))
+    return [
+        {"$match": query},
+        {"$addFields": {"score": {"$meta": "textScore"}}},
+        {"$sort": {"score": -1, "id": 1}},
+        # Rows in the corners of the bounding box are dropped afterwards, so fetch some spare
+        {"$limit": limit * 2},
+        DEAL_PROJECTION
+    ]
+
+async def search_stored_deals(q, lat, lng, radius, category, min_discount, limit):
+    pipeline = build_search_pipeline(q, lat, lng, radius, category, min_discount, limit)
+    deals = []
+    async for deal in db.deals.aggregate(pipeline):
+        if lat is not None and lng is not None:
+            distance = calculate_distance(lat, lng, deal["location"]["lat"], deal["location"]["lng"])
+            if distance > radius:
+                continue
+            deal["distance"] = round(distance, 2)
+        deals.append(deal)
+        if len(deals) == limit:
+            break
+    return deals
+
+@app.get("/api/deals/search")
+@timed(SEARCH_HANDLER)
+async def search_deals(
+    q: str = Query(..., min_length=1, max_length=200, description="Keywords; the last one may be incomplete"),
+    lat: float = Query(None, description="User's latitude"),
+    lng: float = Query(None, description="User's longitude"),
+    radius: float = Query(5.0, gt=0, le=50, description="Search radius in miles, default 5 miles"),
+    category: Optional[str] = Query(None, description="Filter by category (retail, restaurant)"),
+    min_discount: float = Query(15.0, description="Minimum discount percentage"),
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE, description="Number of results")
+):
+    """
+    Deals whose title or description match the keywords, most relevant first,
+    within radius miles when a location is given
+    """
+    try:
+        if live_deal_index is not None and live_deal_index.ready:
+            deals = live_deal_index.search(
+                q, limit, lat=lat, lng=lng, radius=radius, category=category, min_discount=min_discount
+            )
+        else:
+            deals = await search_stored_deals(q, lat, lng, radius, category, min_discount, limit)
+        return FastJSONResponse(deals)
+    except Exception as e:
+        logger.error(f"Error searching deals: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/deals/suggest")
+async def suggest_deal_words(
+    q: str = Query(..., min_length=1, max_length=50, description="Start of a word"),
+    limit: int = Query(8, ge=1, le=50)
+):
+    """
+    Autocomplete: words from current deals that start with q, most common first
+    """
+    if live_deal_index is None or not live_deal_index.ready:
+        return {"suggestions": []}
+    return {"suggestions": live_deal_index.suggest(q, limit)}
+
+@app.get("/api/deals/live")
+async def get_live_deals(
+    lat: float = Query(..., description="User's latitude"),
+    lng: float = Query(..., description="User's longitude"),
+    radius: float = Query(5.0, gt=0, le=50, description="Search radius in miles, default 5 miles"),
+    category: Optional[str] = Query(None, description="Filter by category (retail, restaurant)"),
+    min_discount: float = Query(15.0, description="Minimum discount percentage")
+):
+    """
+    Server-sent events carrying deals as they are scraped, for deals matching the
+    same filters as /api/deals. Clients keep this open instead of re-polling.
+    """
+    subscription = live_deals.subscribe(lat, lng, radius, category, min_discount)
+    return StreamingResponse(
+        live_deals.events(subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/api/alerts", status_code=201)
+async def create_alert(alert_input: DealAlertCreate):
+    """
+    Save a deal alert; matching deals are pushed to its browser push subscription as they are scraped
+    """
+    alert = DealAlert(**alert_input.dict())
+    document = alert.dict()
+    await db.deal_alerts.insert_one(dict(document))
+    deal_alerts.add(document)
+    return {"id": alert.id}
+
+@app.delete("/api/alerts/{alert_id}")
+async def delete_alert(alert_id: str):
+    result = await db.deal_alerts.delete_one({"id": alert_id})
+    removed = deal_alerts.remove(alert_id)
+    if not result.deleted_count and not removed:
+        raise HTTPException(status_code=404, detail="Alert not found")
+    return {"id": alert_id, "deleted": True}
+
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    """
+    Hit/miss counters of the /api/deals response cache
+    """
+    return deals_cache.stats()
+
+@app.get("/metrics")
+async def get_metrics():
+    """
+    Latency histograms and scrape counters in the Prometheus text format
+    """
+    body, content_type = render_metrics()
+    return Response(body, media_type=content_type)
+
+def present_deal(deal: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Round the distance of a projected deal for display
+    """
+    if "distance" in deal:
+        deal["distance"] = round(deal["distance"], 2)
+    return deal
+
+async def stream_deals(pipeline):
+    """
+    Yield deals as newline-delimited JSON while the cursor produces them
+    """
+    async for deal in db.deals.aggregate(pipeline):
+        yield dumps(present_deal(deal)) + b"\n"
+
+async def run_scrape_job(params, progress):
+    return await scrape_deals(
+        location_name=params["location"],
+        lat=params["lat"],
+        lng=params["lng"],
+        category=params["category"],
+        progress=progress
+    )
+
+scrape_jobs = ScrapeJobQueue(db.scrape_jobs, run_scrape_job)
+
+@app.post("/api/scrape-deals", status_code=202)
+@timed(SCRAPE_DEALS_HANDLER)
 async def trigger_deal_scraping(
     location: str = Query(None, description="Name of the location"),
     lat: float = Query(None, description="Latitude coordinate"),
@@ -827,22 +895,144 @@ async def trigger_deal_scraping(
     category: str = Query(None, description="Category of stores to scrape (retail, restaurant)")
 ):
     """
-    Trigger deal scraping from websites based on location
+    Queue deal scraping from websites based on location and return the job to poll.
+    Deals become queryable store by store while the job runs.
     """
-    result = await scrape_deals(location_name=location, lat=lat, lng=lng, category=category)
-    return result
+    if not location and (not lat or not lng):
+        raise HTTPException(status_code=400, detail="Location name or coordinates required")
+    
+    job = await scrape_jobs.submit({"location": location, "lat": lat, "lng": lng, "category": category})
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "status_url": f"/api/scrape-jobs/{job['id']}"
+    }
+
+@app.get("/api/scrape-jobs/{job_id}")
+async def get_scrape_job(job_id: str):
+    """
+    Status and per-store progress of a scrape job
+    """
+    job = await scrape_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Scrape job not found")
+    return job
+
+@app.post("/api/admin/selectors/reload")
+async def reload_store_selectors():
+    """
+    Reload the store selector file so new retailers take effect without a restart
+    """
+    try:
+        count = selector_registry.load()
+    except SelectorRegistryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"message": f"Loaded selectors for {count} store domains", "domains": selector_registry.domains()}
+
+@app.post("/api/admin/stores/reload")
+async def reload_store_catalog():
+    """
+    Reload the store catalog so new stores and areas take effect without a restart
+    """
+    try:
+        count = store_catalog.load()
+    except StoreCatalogError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"message": f"Loaded {count} stores in {len(store_catalog.areas)} areas"}
+
+async def generate_synthetic_deals(count, seed, replace):
+    """
+    Bulk-load count seeded synthetic deals, optionally after deleting every existing deal
+    """
+    if replace:
+        await db.deals.delete_many({})
+        if live_deal_index is not None:
+            live_deal_index.clear()
+    report = await insert_deals(db.deals, synthetic_deals(count, seed), index=live_deal_index)
+    deals_cache.clear()
+    
+    return {"message": f"Generated {report.inserted} synthetic deals", "write_report": report.dict()}
 
 @app.post("/api/sample-deals")
-async def create_sample_deals():
+async def create_sample_deals(
+    count: Optional[int] = Query(
+        None, ge=1, le=SYNTHETIC_DEALS_MAX,
+        description="Generate this many synthetic deals instead of the hand-written samples; load larger datasets with datagen.py"
+    ),
+    seed: int = Query(0, description="Seed of the synthetic deals"),
+    replace: bool = Query(False, description="Delete every existing deal before loading synthetic deals")
+):
     """
-    Generate sample deals for testing
+    Generate sample deals for testing, or a seeded synthetic dataset of count deals
     """
+    if count is not None:
+        return await generate_synthetic_deals(count, seed, replace)
     result = await generate_sample_deals()
     return result
 
+@app.on_event("startup")
+async def prepare_deal_indexes():
+    """
+    Backfill GeoJSON points and expiry dates on deals stored before they existed and
+    ensure the deal indexes
+    """
+    try:
+        result = await db.deals.update_many(
+            {"location.point": {"$exists": False}, "location.lat": {"$type": "number"}},
+            [{"$set": {"location.point": {"type": "Point", "coordinates": ["$location.lng", "$location.lat"]}}}]
+        )
+        if result.modified_count:
+            logger.info(f"Added GeoJSON points to {result.modified_count} deals")
+        # Reads only return deals with a future expiry, and the TTL index skips rows without one
+        result = await db.deals.update_many(
+            {"expiration_date": None},
+            {"$set": {"expiration_date": datetime.utcnow() + SCRAPED_DEAL_LIFETIME}}
+        )
+        if result.modified_count:
+            logger.info(f"Added expiry dates to {result.modified_count} deals")
+        await ensure_indexes(db.deals, DEAL_INDEXES, RETIRED_DEAL_INDEXES)
+    except Exception as e:
+        logger.error(f"Error preparing deal indexes: {e}")
+
+@app.on_event("startup")
+async def load_deal_index():
+    """
+    Bulk-load the in-memory deal index; until it is ready, reads go to MongoDB
+    """
+    if live_deal_index is None:
+        return
+    try:
+        await live_deal_index.load(db.deals)
+    except Exception as e:
+        logger.error(f"Error loading the deal index: {e}")
+
+@app.on_event("startup")
+async def load_deal_alerts():
+    try:
+        await db.deal_alerts.create_index("id", unique=True)
+        await deal_alerts.load(db.deal_alerts)
+    except Exception as e:
+        logger.error(f"Error loading deal alerts: {e}")
+
+@app.on_event("startup")
+async def start_scrape_workers():
+    try:
+        await db.scrape_jobs.create_index("id", unique=True)
+        await scrape_jobs.start()
+    except Exception as e:
+        logger.error(f"Error starting scrape workers: {e}")
+
+@app.on_event("shutdown")
+async def stop_scrape_workers():
+    await scrape_jobs.stop()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
     client.close()
 
+@app.on_event("shutdown")
+async def shutdown_scrape_client():
+    await get_scrape_client().aclose()
+
 if __name__ == "__main__":
     uvicorn.run("server:app", host="0.0.0.0", port=8001, reload=True)
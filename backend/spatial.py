@@ -0,0 +1,93 @@
+from math import floor
+from typing import Any, Dict, Iterator, List, Tuple
+
+Cell = Tuple[int, int]
+
+
+class GridIndex:
+    """
+    Uniform lat/lng grid mapping cells to the items inside them. A box query only
+    visits the cells the box overlaps, so its cost depends on the area searched and
+    the items found there rather than on the total number of items.
+    Boxes crossing the antimeridian are not split; callers near it get a partial result.
+    """
+
+    def __init__(self, cell_degrees: float = 0.05):
+        self.cell_degrees = cell_degrees
+        self._cells: Dict[Cell, List[Any]] = {}
+
+    def __len__(self):
+        return sum(len(items) for items in self._cells.values())
+
+    def cell(self, lat: float, lng: float) -> Cell:
+        return (floor(lat / self.cell_degrees), floor(lng / self.cell_degrees))
+
+    def cells_in_box(self, min_lat: float, max_lat: float, min_lng: float, max_lng: float) -> Iterator[Cell]:
+        low_lat, low_lng = self.cell(min_lat, min_lng)
+        high_lat, high_lng = self.cell(max_lat, max_lng)
+        for lat_cell in range(low_lat, high_lat + 1):
+            for lng_cell in range(low_lng, high_lng + 1):
+                yield (lat_cell, lng_cell)
+
+    def _occupied_cells_in_box(self, min_lat: float, max_lat: float, min_lng: float, max_lng: float) -> Iterator[Cell]:
+        low_lat, low_lng = self.cell(min_lat, min_lng)
+        high_lat, high_lng = self.cell(max_lat, max_lng)
+        box_cells = (high_lat - low_lat + 1) * (high_lng - low_lng + 1)
+        if box_cells <= len(self._cells):
+            yield from self.cells_in_box(min_lat, max_lat, min_lng, max_lng)
+            return
+        # A box larger than the populated part of the grid: walk the populated cells instead
+        for lat_cell, lng_cell in list(self._cells):
+            if low_lat <= lat_cell <= high_lat and low_lng <= lng_cell <= high_lng:
+                yield (lat_cell, lng_cell)
+
+    def insert(self, item: Any, lat: float, lng: float):
+        self._cells.setdefault(self.cell(lat, lng), []).append(item)
+
+    def insert_box(self, item: Any, min_lat: float, max_lat: float, min_lng: float, max_lng: float):
+        """
+        Register an item covering an area in every cell the area overlaps
+        """
+        for cell in self.cells_in_box(min_lat, max_lat, min_lng, max_lng):
+            self._cells.setdefault(cell, []).append(item)
+
+    def remove_box(self, item: Any, min_lat: float, max_lat: float, min_lng: float, max_lng: float):
+        """
+        Undo insert_box for an item registered with the same box
+        """
+        for cell in self.cells_in_box(min_lat, max_lat, min_lng, max_lng):
+            items = self._cells.get(cell)
+            if not items:
+                continue
+            try:
+                items.remove(item)
+            except ValueError:
+                continue
+            if not items:
+                del self._cells[cell]
+
+    def remove(self, item: Any, lat: float, lng: float) -> bool:
+        items = self._cells.get(self.cell(lat, lng))
+        if not items:
+            return False
+        try:
+            items.remove(item)
+        except ValueError:
+            return False
+        if not items:
+            del self._cells[self.cell(lat, lng)]
+        return True
+
+    def at(self, lat: float, lng: float) -> List[Any]:
+        return self._cells.get(self.cell(lat, lng), [])
+
+    def query_box(self, min_lat: float, max_lat: float, min_lng: float, max_lng: float) -> Iterator[Any]:
+        """
+        Items in cells overlapping the box. Items registered with insert_box may be
+        yielded once per overlapping cell; points are yielded once.
+        """
+        cells = self._cells
+        for cell in self._occupied_cells_in_box(min_lat, max_lat, min_lng, max_lng):
+            items = cells.get(cell)
+            if items:
+                yield from items
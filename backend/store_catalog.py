@@ -0,0 +1,195 @@
+import json
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from geo import bounding_box, calculate_distance
+from spatial import GridIndex
+
+logger = logging.getLogger(__name__)
+
+# Named areas and the stores in them
+STORE_CATALOG_PATH = Path(os.environ.get(
+    'STORE_CATALOG_PATH',
+    Path(__file__).parent / 'data' / 'stores.json'
+))
+
+# Radius in miles used to find stores around coordinates outside every named area
+STORE_SEARCH_RADIUS = float(os.environ.get('STORE_SEARCH_RADIUS', '5'))
+
+# Longest alias, in words, matched against a location name
+_MAX_ALIAS_WORDS = 3
+_WORD = re.compile(r"[a-z0-9&']+")
+
+
+class StoreCatalogError(ValueError):
+    pass
+
+
+class Area:
+    """
+    A named neighborhood. bbox is (min_lat, max_lat, min_lng, max_lng); deals shown
+    for the area must have address_token in their address and, if max_radius is set,
+    lie within max_radius miles regardless of the requested radius.
+    """
+
+    __slots__ = ("name", "aliases", "bbox", "address_token", "max_radius", "priority", "stores")
+
+    def __init__(self, name, aliases, bbox, address_token, max_radius, priority):
+        self.name = name
+        self.aliases = aliases
+        self.bbox = bbox
+        self.address_token = address_token
+        self.max_radius = max_radius
+        self.priority = priority
+        self.stores: List[Dict[str, Any]] = []
+
+    def contains(self, lat: float, lng: float) -> bool:
+        min_lat, max_lat, min_lng, max_lng = self.bbox
+        return min_lat <= lat <= max_lat and min_lng <= lng <= max_lng
+
+
+def _alias_key(text: str) -> str:
+    return " ".join(_WORD.findall(text.lower()))
+
+
+class StoreCatalog:
+    """
+    Stores and named areas loaded from a data file, with a spatial grid over both.
+    Areas are resolved by name through an alias table and by coordinates through
+    the grid; earlier areas in the file take priority when several match.
+    """
+
+    def __init__(self, path: Path = STORE_CATALOG_PATH, cell_degrees: float = 0.05):
+        self.path = Path(path)
+        self.cell_degrees = cell_degrees
+        self.areas: List[Area] = []
+        self._aliases: Dict[str, Area] = {}
+        self._area_grid = GridIndex(cell_degrees)
+        self._store_grid = GridIndex(cell_degrees)
+        self._store_count = 0
+
+    def load(self) -> int:
+        """
+        (Re)load the catalog file and return the number of stores. The current catalog
+        stays in use if the file can't be read or is invalid.
+        """
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            areas, aliases, area_grid, store_grid, count = self._build(data)
+        except (OSError, KeyError, TypeError, ValueError) as e:
+            raise StoreCatalogError(f"Could not load store catalog from {self.path}: {e}") from e
+
+        self.areas, self._aliases, self._area_grid, self._store_grid = areas, aliases, area_grid, store_grid
+        self._store_count = count
+        logger.info(f"Loaded {count} stores in {len(areas)} areas from {self.path}")
+        return count
+
+    def _build(self, data):
+        areas: List[Area] = []
+        by_name: Dict[str, Area] = {}
+        aliases: Dict[str, Area] = {}
+        area_grid = GridIndex(self.cell_degrees)
+        store_grid = GridIndex(self.cell_degrees)
+
+        for priority, raw in enumerate(data.get("areas", [])):
+            bbox = tuple(float(value) for value in raw["bbox"])
+            if len(bbox) != 4:
+                raise StoreCatalogError(f"Area {raw['name']} needs a bbox of [min_lat, max_lat, min_lng, max_lng]")
+            area = Area(
+                name=raw["name"],
+                aliases=[_alias_key(alias) for alias in raw.get("aliases", [])] + [_alias_key(raw["name"])],
+                bbox=bbox,
+                address_token=raw.get("address_token"),
+                max_radius=raw.get("max_radius"),
+                priority=priority
+            )
+            areas.append(area)
+            by_name[area.name] = area
+            for alias in area.aliases:
+                # The first area to claim an alias keeps it
+                aliases.setdefault(alias, area)
+            area_grid.insert_box(area, *bbox)
+
+        for raw in data.get("stores", []):
+            store = {
+                "name": raw["name"],
+                "category": raw["category"],
+                "address": raw["address"],
+                "lat": float(raw["lat"]),
+                "lng": float(raw["lng"]),
+                "website": raw["website"],
+            }
+            area = by_name.get(raw.get("area"))
+            if area is not None:
+                area.stores.append(store)
+            store_grid.insert(store, store["lat"], store["lng"])
+
+        return areas, aliases, area_grid, store_grid, len(data.get("stores", []))
+
+    def __len__(self):
+        return self._store_count
+
+    def areas_for_name(self, location_name: str) -> List[Area]:
+        """
+        Areas whose alias appears as a word or phrase in location_name
+        """
+        words = _WORD.findall(location_name.lower())
+        found = {}
+        for size in range(1, _MAX_ALIAS_WORDS + 1):
+            for start in range(len(words) - size + 1):
+                area = self._aliases.get(" ".join(words[start:start + size]))
+                if area is not None:
+                    found[area.name] = area
+        return sorted(found.values(), key=lambda area: area.priority)
+
+    def areas_for_point(self, lat: float, lng: float) -> List[Area]:
+        found = {area.name: area for area in self._area_grid.at(lat, lng) if area.contains(lat, lng)}
+        return sorted(found.values(), key=lambda area: area.priority)
+
+    def resolve_areas(self, location_name: Optional[str] = None, lat=None, lng=None) -> List[Area]:
+        """
+        Areas a request refers to: by name when one is given, otherwise by coordinates
+        """
+        if location_name:
+            return self.areas_for_name(location_name)
+        if lat and lng:
+            return self.areas_for_point(float(lat), float(lng))
+        return []
+
+    def primary_area(self, location_name: Optional[str] = None, lat=None, lng=None) -> Optional[Area]:
+        areas = self.resolve_areas(location_name, lat, lng)
+        return areas[0] if areas else None
+
+    def stores_near(self, lat: float, lng: float, radius: float) -> List[Dict[str, Any]]:
+        """
+        Stores within radius miles of a point, nearest first
+        """
+        nearby = []
+        min_lat, max_lat, min_lng, max_lng = box = bounding_box(lat, lng, radius)
+        for store in self._store_grid.query_box(*box):
+            # Cheap box check before the exact distance; grid cells overhang the box
+            if not (min_lat <= store["lat"] <= max_lat and min_lng <= store["lng"] <= max_lng):
+                continue
+            distance = calculate_distance(lat, lng, store["lat"], store["lng"])
+            if distance <= radius:
+                nearby.append((distance, store))
+        nearby.sort(key=lambda pair: pair[0])
+        return [store for _, store in nearby]
+
+
+store_catalog = StoreCatalog()
+
+
+def load_store_catalog() -> Optional[int]:
+    try:
+        return store_catalog.load()
+    except StoreCatalogError as e:
+        logger.error(str(e))
+        return None
+
+
+load_store_catalog()
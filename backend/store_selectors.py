@@ -0,0 +1,100 @@
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+# Per-retailer Firecrawl extraction rules, keyed by registered domain
+STORE_SELECTORS_PATH = Path(os.environ.get(
+    'STORE_SELECTORS_PATH',
+    Path(__file__).parent / 'data' / 'store_selectors.json'
+))
+
+DEFAULT_DOMAIN = "default"
+
+
+class SelectorRegistryError(ValueError):
+    pass
+
+
+def _extract_rules(rules: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Firecrawl extract_rules for one set of selectors, built once when the registry loads
+    """
+    if not isinstance(rules.get("selector"), str) or not isinstance(rules.get("properties"), dict):
+        raise SelectorRegistryError("Selector rules need a 'selector' string and a 'properties' object")
+    return {
+        "deals": {
+            "selector": rules["selector"],
+            "type": "list",
+            "properties": dict(rules["properties"])
+        }
+    }
+
+
+class SelectorRegistry:
+    """
+    Firecrawl extraction rules indexed by domain. Lookups walk the URL's hostname
+    from the most specific suffix down, so www2.hm.com resolves to hm.com with a
+    handful of dict lookups. The table is only rebuilt by load().
+    """
+
+    def __init__(self, path: Path = STORE_SELECTORS_PATH):
+        self.path = Path(path)
+        self._default: Dict[str, Any] = {}
+        self._by_domain: Dict[str, Dict[str, Any]] = {}
+
+    def load(self) -> int:
+        """
+        (Re)load the rules file and return the number of domains. The current table
+        stays in use if the file can't be read or is invalid.
+        """
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            default = _extract_rules(data[DEFAULT_DOMAIN])
+            by_domain = {
+                domain.lower().strip("."): _extract_rules(rules)
+                for domain, rules in data.get("domains", {}).items()
+            }
+        except (OSError, KeyError, TypeError, ValueError) as e:
+            raise SelectorRegistryError(f"Could not load store selectors from {self.path}: {e}") from e
+
+        # Swap both tables at once so lookups never see a half-loaded registry
+        self._default, self._by_domain = default, by_domain
+        logger.info(f"Loaded selectors for {len(by_domain)} store domains from {self.path}")
+        return len(by_domain)
+
+    def lookup(self, url: str) -> Tuple[str, Dict[str, Any]]:
+        """
+        Domain and extract_rules for a store URL, falling back to the default rules
+        """
+        hostname = (urlsplit(url).hostname or "").lower()
+        labels = hostname.split(".")
+        # Stop before the bare top-level domain
+        for start in range(len(labels) - 1):
+            domain = ".".join(labels[start:])
+            rules = self._by_domain.get(domain)
+            if rules is not None:
+                return domain, rules
+        return DEFAULT_DOMAIN, self._default
+
+    def domains(self):
+        return sorted(self._by_domain)
+
+
+selector_registry = SelectorRegistry()
+
+
+def load_selector_registry() -> Optional[int]:
+    try:
+        return selector_registry.load()
+    except SelectorRegistryError as e:
+        logger.error(str(e))
+        return None
+
+
+load_selector_registry()
@@ -0,0 +1,90 @@
+import os
+from typing import Dict, List, Optional, Tuple
+
+from geo import bounding_box, calculate_distance, wrapped_boxes
+from spatial import GridIndex
+
+# Grid cell size in degrees for subscription areas; 0.05 is roughly 3.5 miles of latitude
+SUBSCRIPTION_CELL_DEGREES = float(os.environ.get('SUBSCRIPTION_CELL_DEGREES', '0.05'))
+
+
+class Subscription:
+    """
+    Standing interest in deals within radius miles of (lat, lng), optionally limited
+    to one category and a minimum discount
+    """
+
+    __slots__ = ("id", "lat", "lng", "radius", "category", "min_discount", "_boxes")
+
+    def __init__(
+        self,
+        id: str,
+        lat: float,
+        lng: float,
+        radius: float,
+        category: Optional[str] = None,
+        min_discount: Optional[float] = None
+    ):
+        self.id = id
+        self.lat = lat
+        self.lng = lng
+        self.radius = radius
+        self.category = category if category and category != "all" else None
+        self.min_discount = min_discount
+        self._boxes = wrapped_boxes(bounding_box(lat, lng, radius))
+
+
+class SubscriptionIndex:
+    """
+    Finds the subscriptions a deal falls into without looking at every subscription.
+    Each subscription is registered in the grid cells its search box overlaps, in a
+    separate grid per category (plus one for subscriptions to every category), so
+    matching a deal reads one cell of two grids and only checks the exact distance
+    and discount of the subscriptions found there.
+    """
+
+    def __init__(self, cell_degrees: float = SUBSCRIPTION_CELL_DEGREES):
+        self.cell_degrees = cell_degrees
+        self._grids: Dict[Optional[str], GridIndex] = {}
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def add(self, subscription: Subscription):
+        grid = self._grids.get(subscription.category)
+        if grid is None:
+            grid = self._grids[subscription.category] = GridIndex(self.cell_degrees)
+        for box in subscription._boxes:
+            grid.insert_box(subscription, *box)
+        self._count += 1
+
+    def remove(self, subscription: Subscription):
+        grid = self._grids.get(subscription.category)
+        if grid is None:
+            return
+        for box in subscription._boxes:
+            grid.remove_box(subscription, *box)
+        self._count -= 1
+
+    def match(
+        self,
+        lat: float,
+        lng: float,
+        category: Optional[str],
+        discount: Optional[float]
+    ) -> List[Tuple[Subscription, float]]:
+        """
+        Subscriptions a deal at (lat, lng) satisfies, with the deal's distance from each
+        """
+        matches = []
+        for grid in (self._grids.get(None), self._grids.get(category) if category else None):
+            if grid is None:
+                continue
+            for subscription in grid.at(lat, lng):
+                if subscription.min_discount is not None and (discount is None or discount < subscription.min_discount):
+                    continue
+                distance = calculate_distance(subscription.lat, subscription.lng, lat, lng)
+                if distance <= subscription.radius:
+                    matches.append((subscription, distance))
+        return matches
@@ -0,0 +1,100 @@
+import asyncio
+from types import SimpleNamespace
+
+from alerts import AlertIndex, Alert, DealAlerts, notification_payload
+from deal_writer import DealWriter
+from test_deal_writer import FakeCollection, make_deal
+
+PUSH = {"endpoint": "https://push.example.com/abc", "keys": {"p256dh": "key", "auth": "secret"}}
+
+
+def alert(id, lat=12.972, lng=77.608, radius=3.0, **fields):
+    return {"id": id, "lat": lat, "lng": lng, "radius": radius, "push_subscription": PUSH, **fields}
+
+
+def deal(title, lat=12.973, lng=77.608, category="retail", discount=40.0, description="", id=None):
+    return {
+        "id": id or title, "title": title, "description": description, "category": category,
+        "discount_percentage": discount, "business_name": "Zudio", "url": "https://example.com/sale",
+        "location": {"lat": lat, "lng": lng, "address": "Brigade Road"},
+    }
+
+
+class Outbox:
+    def __init__(self):
+        self.rows = []
+
+    async def insert_many(self, documents, ordered=True):
+        self.rows.extend(documents)
+        return SimpleNamespace(inserted_ids=[row["id"] for row in documents])
+
+
+def test_keywords_category_discount_and_radius_must_all_match():
+    index = AlertIndex()
+    alerts = {
+        "any": Alert(alert("any")),
+        "jeans": Alert(alert("jeans", keywords=["Jeans", "running shoes"])),
+        "pizza": Alert(alert("pizza", keywords=["pizza"], category="restaurant")),
+        "deep": Alert(alert("deep", min_discount=60)),
+        "far": Alert(alert("far", lat=13.2)),
+    }
+    for item in alerts.values():
+        index.add(item)
+
+    def matched(document):
+        return sorted(item.id for item in index.match(document))
+
+    assert matched(deal("Slim fit jean sale")) == ["any", "jeans"]
+    assert matched(deal("Shoes for running")) == ["any", "jeans"]
+    # Only one word of the phrase
+    assert matched(deal("Running socks")) == ["any"]
+    assert matched(deal("Pizzas", category="retail")) == ["any"]
+    assert matched(deal("Two pizzas for one", category="restaurant", discount=70)) == ["any", "deep", "pizza"]
+    assert matched(deal("Jeans", lat=12.99, lng=77.7)) == []
+
+    index.remove(alerts["jeans"])
+    assert matched(deal("Slim fit jean sale")) == ["any"]
+    assert len(index) == 4
+
+
+def test_one_notification_per_alert_per_batch():
+    alerts = DealAlerts()
+    alerts.add(alert("a", keywords=["jeans"]))
+    alerts.add(alert("b"))
+
+    batch = alerts.notifications([deal("Jeans", lat=12.98), deal("Jeans", id="near"), deal("Shirt")])
+
+    by_alert = {notification["alert_id"]: notification for notification in batch}
+    assert sorted(by_alert) == ["a", "b"]
+    assert by_alert["a"]["deal_ids"] == ["near", "Jeans"]
+    assert by_alert["a"]["subscription"] == PUSH
+    assert by_alert["a"]["payload"]["title"] == "2 new deals near you"
+    assert by_alert["b"]["deal_ids"][-1] == "Jeans"
+
+
+def test_payload_matches_the_service_worker_shape():
+    payload = notification_payload([(0.4, deal("Jeans"))])
+
+    assert set(payload) == {"title", "body", "icon", "badge", "url"}
+    assert payload["title"] == "40% off at Zudio"
+    assert payload["body"] == "Jeans - 40% off, 0.4 mi"
+
+
+def test_inserted_deals_are_queued_and_delivered_to_the_outbox():
+    alerts = DealAlerts()
+    alerts.add(alert("a", lat=12.97, lng=77.60, keywords=["jacket"]))
+    outbox = Outbox()
+
+    async def scrape(titles):
+        writer = DealWriter(FakeCollection(), events=[alerts])
+        await writer.add_many(make_deal(title=title) for title in titles)
+        await writer.close()
+        return await alerts.deliver(outbox)
+
+    assert asyncio.run(scrape(["Denim Jacket", "Socks"])) == 1
+    assert asyncio.run(scrape(["Socks"])) == 0
+    assert [row["alert_id"] for row in outbox.rows] == ["a"]
+    assert outbox.rows[0]["status"] == "pending"
+
+    alerts.remove("a")
+    assert asyncio.run(scrape(["Leather Jacket"])) == 0
@@ -0,0 +1,56 @@
+from cache import TTLLRUCache
+from geo import geohash, geohash_center
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = TTLLRUCache(ttl=10, max_entries=4, clock=clock)
+    cache.put("key", "value")
+
+    assert cache.get("key") == "value"
+    clock.now = 10
+    assert cache.get("key") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLLRUCache(ttl=60, max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_writes_invalidate_only_the_affected_area():
+    cache = TTLLRUCache(ttl=60, max_entries=8)
+    cache.put("brigade", "deals", area=(12.9720, 77.6081, 1.0))
+    cache.put("sf", "deals", area=(37.7749, -122.4194, 5.0))
+    cache.put("everywhere", "deals", area=None)
+
+    # A new deal on Brigade Road
+    dropped = cache.invalidate_points([(12.9725, 77.6079)])
+
+    assert dropped == 2
+    assert cache.get("brigade") is None
+    assert cache.get("everywhere") is None
+    assert cache.get("sf") == "deals"
+
+
+def test_nearby_points_share_a_geohash_cell():
+    code, lat, lng = geohash_center(12.97201, 77.60811, 7)
+    assert code == geohash(12.97205, 77.60815, 7)
+    assert geohash(lat, lng, 7) == code
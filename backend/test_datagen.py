@@ -0,0 +1,105 @@
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+from pymongo.errors import BulkWriteError
+
+from datagen import CITIES, insert_deals, store_catalog_data, synthetic_deals, synthetic_stores
+from deal_index import DealIndex
+from geo import calculate_distance
+
+
+class InsertCollection:
+    """In-memory stand-in for insert_many with a unique deal_key"""
+
+    def __init__(self):
+        self.rows = {}
+
+    async def insert_many(self, documents, ordered=True):
+        errors = []
+        inserted = []
+        for index, document in enumerate(documents):
+            if document["deal_key"] in self.rows:
+                errors.append({"index": index, "code": 11000, "errmsg": "duplicate key"})
+                continue
+            self.rows[document["deal_key"]] = document
+            inserted.append(document["id"])
+        if errors:
+            raise BulkWriteError({"nInserted": len(inserted), "writeErrors": errors})
+        return SimpleNamespace(inserted_ids=inserted)
+
+
+def test_same_seed_generates_the_same_deals():
+    first = [(deal["id"], deal["title"], deal["location"]["lat"]) for deal in synthetic_deals(500, seed=3)]
+    again = [(deal["id"], deal["title"], deal["location"]["lat"]) for deal in synthetic_deals(500, seed=3)]
+    other = [(deal["id"], deal["title"], deal["location"]["lat"]) for deal in synthetic_deals(500, seed=4)]
+
+    assert first == again
+    assert first != other
+
+
+def test_deals_are_clustered_live_and_plausible():
+    now = datetime.utcnow()
+    centroids = {name: (lat, lng) for name, lat, lng, _, _ in CITIES}
+    stores = synthetic_stores(200, seed=1)
+    deals = list(synthetic_deals(2000, seed=1, stores=stores))
+
+    for store in stores:
+        assert calculate_distance(*centroids[store["area"]], store["lat"], store["lng"]) < 50
+    for deal in deals:
+        assert 5 <= deal["discount_percentage"] <= 90
+        assert deal["sale_price"] < deal["original_price"]
+        assert deal["expiration_date"] > now
+        assert deal["category"] in ("retail", "restaurant")
+    # Some stores list far more deals than others
+    per_store = {}
+    for deal in deals:
+        per_store[deal["business_name"]] = per_store.get(deal["business_name"], 0) + 1
+    assert max(per_store.values()) > 3 * len(deals) / len(stores)
+
+
+def test_store_catalog_data_has_an_area_per_city():
+    catalog = store_catalog_data(synthetic_stores(300, seed=2))
+
+    names = {area["name"] for area in catalog["areas"]}
+    assert {store["area"] for store in catalog["stores"]} == names
+    for area in catalog["areas"]:
+        min_lat, max_lat, min_lng, max_lng = area["bbox"]
+        assert min_lat <= max_lat and min_lng <= max_lng
+
+
+def test_insert_deals_loads_in_batches_and_mirrors_the_index():
+    collection = InsertCollection()
+    index = DealIndex()
+    deals = list(synthetic_deals(250, seed=5))
+
+    report = asyncio.run(insert_deals(collection, deals, index=index, batch_size=100))
+    assert (report.attempted, report.inserted, report.batches, report.failed) == (250, 250, 3, 0)
+    assert len(index) == 250
+
+    # Deals that are already stored are rejected, not duplicated
+    again = asyncio.run(insert_deals(collection, deals[:10], index=index))
+    assert (again.inserted, again.failed) == (0, 10)
+    assert len(collection.rows) == 250
+
+
+def test_insert_deals_lets_other_requests_run_while_loading():
+    collection = InsertCollection()
+    index = DealIndex()
+    ticks = []
+
+    async def load_while_ticking():
+        async def tick():
+            while True:
+                ticks.append(len(index))
+                await asyncio.sleep(0)
+
+        ticker = asyncio.create_task(tick())
+        report = await insert_deals(collection, synthetic_deals(3000, seed=6), index=index, batch_size=1000)
+        ticker.cancel()
+        return report
+
+    report = asyncio.run(load_while_ticking())
+    assert report.inserted == 3000
+    # The loop got control while each batch was generated and while it was mirrored into the index
+    assert len(set(ticks)) > 3
@@ -0,0 +1,197 @@
+import asyncio
+import random
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from deal_index import DealIndex
+from deal_writer import DealWriter, store_key
+from geo import calculate_distance
+from test_deal_writer import FakeCollection, make_deal
+
+
+class FakeCursor:
+    def __init__(self, rows):
+        self._rows = iter(rows)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._rows)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+def random_documents(count, seed=3):
+    rng = random.Random(seed)
+    return [
+        {
+            "id": f"deal-{i:05d}",
+            "deal_key": f"key-{i}",
+            "store_key": f"store-{i % 50}",
+            "scrape_generation": "g1",
+            "title": f"Deal {i}",
+            "category": rng.choice(["retail", "restaurant"]),
+            "discount_percentage": rng.choice([10.0, 20.0, 35.0, 50.0]),
+            "location": {
+                "lat": 12.97 + rng.uniform(-0.3, 0.3),
+                "lng": 77.6 + rng.uniform(-0.3, 0.3),
+                "address": rng.choice(["Brigade Road, Bengaluru", "Jayanagar, Bengaluru"]),
+                "point": {"type": "Point", "coordinates": [0, 0]},
+            },
+        }
+        for i in range(count)
+    ]
+
+
+def brute_force(documents, lat, lng, radius, category=None, min_discount=None):
+    matches = []
+    for document in documents:
+        distance = calculate_distance(lat, lng, document["location"]["lat"], document["location"]["lng"])
+        if distance > radius:
+            continue
+        if category and document["category"] != category:
+            continue
+        if min_discount is not None and document["discount_percentage"] < min_discount:
+            continue
+        matches.append((distance, document["id"]))
+    return [deal_id for _, deal_id in sorted(matches)]
+
+
+def test_nearest_matches_brute_force():
+    documents = random_documents(3000)
+    index = DealIndex()
+    index.upsert_many(documents)
+
+    for k in (1, 10, 100, None):
+        deals = index.nearest(12.97, 77.6, 8, k=k, category="retail", min_discount=20)
+        expected = brute_force(documents, 12.97, 77.6, 8, category="retail", min_discount=20)
+        assert [deal["id"] for deal in deals] == expected[:k]
+
+    deal = index.nearest(12.97, 77.6, 8, k=1)[0]
+    assert "point" not in deal["location"]
+    assert abs(deal["distance"] - calculate_distance(12.97, 77.6, deal["location"]["lat"], deal["location"]["lng"])) < 1e-9
+
+
+def test_pages_continue_after_the_cursor_position():
+    documents = random_documents(500)
+    index = DealIndex()
+    index.upsert_many(documents)
+
+    pages, after = [], None
+    while True:
+        page = index.nearest(12.97, 77.6, 10, k=40, address_token="Brigade", after=after)
+        if not page:
+            break
+        pages.extend(deal["id"] for deal in page)
+        after = (page[-1]["distance"], page[-1]["id"])
+
+    expected = brute_force(
+        [document for document in documents if "Brigade" in document["location"]["address"]], 12.97, 77.6, 10
+    )
+    assert pages == expected
+
+
+def test_writer_keeps_index_in_sync():
+    collection = FakeCollection()
+    index = DealIndex()
+    store = store_key("Store", "Brigade Road, Bengaluru")
+
+    async def write(deals):
+        writer = DealWriter(collection, index=index)
+        await writer.add_many(deals)
+        await writer.expire_stale([store])
+        return await writer.close()
+
+    asyncio.run(write([make_deal("Kept"), make_deal("Dropped"), make_deal("bad")]))
+    first_id = next(row["id"] for row in collection.rows.values() if row["title"] == "Kept")
+    asyncio.run(write([make_deal("Kept"), make_deal("New")]))
+
+    deals = index.nearest(12.97, 77.60, 1)
+    assert sorted(deal["title"] for deal in deals) == ["Kept", "New"]
+    assert len(index) == len(collection.rows)
+    assert next(deal["id"] for deal in deals if deal["title"] == "Kept") == first_id
+
+
+def test_load_replaces_contents():
+    documents = random_documents(20)
+
+    class Collection:
+        def find(self, query, projection):
+            return FakeCursor(documents)
+
+    index = DealIndex()
+    index.upsert_many(random_documents(5, seed=9))
+    assert asyncio.run(index.load(Collection())) == 20
+    assert index.ready
+    assert len(index.nearest(12.97, 77.6, 100)) == 20
+
+
+def test_records_share_strings_and_reuse_slots():
+    index = DealIndex(capacity=2)
+    documents = random_documents(10)
+    for document in documents:
+        document["business_name"] = "".join(["Brigade ", "Store"])
+    index.upsert_many(documents)
+
+    records = [index._records[slot] for slot in index._by_key.values()]
+    assert all(record.business_name is records[0].business_name for record in records)
+
+    index.expire_stale("g2", ["store-1", "store-2"])
+    index.upsert_many(random_documents(12)[10:])
+    assert len(index) == 10
+    assert len(index._records) == 10
+    assert len(index.nearest(12.97, 77.6, 100)) == 10
+
+
+def test_expired_deals_are_skipped_and_purged():
+    clock = SimpleNamespace(now=datetime(2025, 4, 1, tzinfo=timezone.utc).timestamp())
+    index = DealIndex(purge_interval=7 * 86400, clock=lambda: clock.now)
+    documents = random_documents(4)
+    for days, document in enumerate(documents):
+        document["expiration_date"] = datetime(2025, 4, 2) + timedelta(days=days)
+    documents[3]["expiration_date"] = None
+    index.upsert_many(documents)
+    assert len(index.nearest(12.97, 77.6, 100)) == 4
+
+    clock.now += 2.5 * 86400
+    assert sorted(deal["id"] for deal in index.nearest(12.97, 77.6, 100)) == ["deal-00002", "deal-00003"]
+    # The sweep waits for purge_interval; until then expired rows are only filtered out
+    assert len(index) == 4
+    clock.now += 5 * 86400
+    index.nearest(12.97, 77.6, 100)
+    assert len(index) == 1
+
+
+def test_search_filters_by_distance_category_and_discount():
+    documents = random_documents(400)
+    for i, document in enumerate(documents):
+        document["title"] = "Denim jacket" if i % 4 == 0 else f"Pizza combo {i}"
+    index = DealIndex()
+    index.upsert_many(documents)
+
+    deals = index.search("jacket", 1000, lat=12.97, lng=77.6, radius=8, category="retail", min_discount=20)
+    jackets = [document for document in documents if document["title"] == "Denim jacket"]
+    assert [deal["id"] for deal in deals] == brute_force(jackets, 12.97, 77.6, 8, category="retail", min_discount=20)
+    assert all(deal["score"] > 0 for deal in deals)
+
+    assert len(index.search("jack", 1000)) == len(jackets)
+    assert index.search("jack", 1000, prefix=False) == []
+    assert index.suggest("Ja") == ["jacket"]
+
+
+def test_search_follows_removed_and_replaced_deals():
+    index = DealIndex(capacity=2)
+    documents = random_documents(3)
+    documents[0]["title"] = "Running shoes"
+    index.upsert_many(documents)
+    assert [deal["id"] for deal in index.search("shoe", 10)] == ["deal-00000"]
+
+    index.expire_stale("g2", ["store-0"])
+    replacement = random_documents(4)[3]
+    replacement["title"] = "Leather boots"
+    index.upsert_many([replacement])
+    assert index.search("shoes", 10) == []
+    assert [deal["id"] for deal in index.search("boot", 10)] == ["deal-00003"]
+    assert index.suggest("sh") == []
@@ -0,0 +1,118 @@
+import asyncio
+from types import SimpleNamespace
+
+from pymongo.errors import BulkWriteError
+
+from deal_writer import DealWriter, deal_key, store_key
+from models import Deal, Location
+
+
+class FakeCollection:
+    """In-memory stand-in for upserts by deal_key; rejects deals whose title is 'bad'"""
+
+    def __init__(self):
+        self.rows = {}
+        self.calls = []
+
+    async def bulk_write(self, operations, ordered=True):
+        self.calls.append((len(operations), ordered))
+        upserted = matched = 0
+        upserted_ids = {}
+        errors = []
+        for index, operation in enumerate(operations):
+            key = operation._filter["deal_key"]
+            update = operation._doc
+            if update["$set"]["title"] == "bad":
+                errors.append({"index": index, "code": 11000, "errmsg": "duplicate key"})
+                continue
+            if key in self.rows:
+                matched += 1
+                self.rows[key].update(update["$set"])
+            else:
+                upserted += 1
+                upserted_ids[index] = key
+                self.rows[key] = {**update["$set"], **update["$setOnInsert"]}
+        if errors:
+            raise BulkWriteError({
+                "nUpserted": upserted, "nMatched": matched, "writeErrors": errors,
+                "upserted": [{"index": index, "_id": _id} for index, _id in upserted_ids.items()]
+            })
+        return SimpleNamespace(upserted_count=upserted, matched_count=matched, upserted_ids=upserted_ids)
+
+    async def delete_many(self, query):
+        generation = query["scrape_generation"]["$ne"]
+        store_keys = query.get("store_key", {}).get("$in")
+        stale = [
+            key for key, row in self.rows.items()
+            if row["scrape_generation"] != generation and (store_keys is None or row["store_key"] in store_keys)
+        ]
+        for key in stale:
+            del self.rows[key]
+        return SimpleNamespace(deleted_count=len(stale))
+
+
+def make_deal(title="Deal", business_name="Store", sale_price=None):
+    return Deal(
+        title=title,
+        description="",
+        discount_percentage=20.0,
+        business_name=business_name,
+        category="retail",
+        sale_price=sale_price,
+        location=Location(lat=12.97, lng=77.60, address="Brigade Road, Bengaluru"),
+    )
+
+
+async def write(collection, deals, batch_size=500, expire_stores=None):
+    writer = DealWriter(collection, batch_size=batch_size)
+    await writer.add_many(deals)
+    if expire_stores is not None:
+        await writer.expire_stale(expire_stores)
+    return await writer.close()
+
+
+def test_deals_are_flushed_in_batches():
+    collection = FakeCollection()
+    deals = [make_deal(f"Deal {i}") for i in range(10)]
+
+    report = asyncio.run(write(collection, deals, batch_size=4))
+    assert collection.calls == [(4, False), (4, False), (2, False)]
+    assert report.inserted == 10
+    assert report.batches == 3
+    assert report.failed == 0
+
+
+def test_partial_failure_is_reported():
+    collection = FakeCollection()
+    deals = [make_deal("One"), make_deal("bad"), make_deal("Two")]
+
+    report = asyncio.run(write(collection, deals))
+    assert report.attempted == 3
+    assert report.inserted == 2
+    assert report.failed == 1
+    assert report.errors[0].deal_id == deals[1].id
+    assert report.errors[0].code == 11000
+
+
+def test_deal_key_ignores_case_and_spacing():
+    assert deal_key(make_deal("50% Off  Jeans", sale_price=999)) == deal_key(make_deal("50% off jeans ", sale_price=999.0))
+    assert deal_key(make_deal("50% Off Jeans", sale_price=999)) != deal_key(make_deal("50% Off Jeans", sale_price=899))
+
+
+def test_rescrape_upserts_and_expires_stale_rows():
+    collection = FakeCollection()
+    store = store_key("Store", "Brigade Road, Bengaluru")
+    other_store = make_deal("Other", business_name="Other Store")
+
+    asyncio.run(write(collection, [make_deal("Kept"), make_deal("Dropped"), other_store], expire_stores=[store]))
+    kept_id = next(row["id"] for row in collection.rows.values() if row["title"] == "Kept")
+
+    report = asyncio.run(write(collection, [make_deal("Kept"), make_deal("New")], expire_stores=[store]))
+    titles = sorted(row["title"] for row in collection.rows.values())
+
+    assert titles == ["Kept", "New", "Other"]
+    assert report.inserted == 1
+    assert report.updated == 1
+    assert report.expired == 1
+    # The upserted row keeps the id it was first stored with
+    assert next(row["id"] for row in collection.rows.values() if row["title"] == "Kept") == kept_id
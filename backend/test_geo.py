@@ -0,0 +1,72 @@
+import random
+from math import radians, sin, cos, sqrt, atan2
+
+import numpy as np
+
+from geo import (
+    bounding_box, bounding_box_query, calculate_distance, calculate_distances, in_bounding_box, nearest_order,
+    geo_point, miles_to_mongo_meters, MONGO_EARTH_RADIUS_METERS, MONGO_METERS_PER_MILE
+)
+
+
+def mongo_spherical_meters(lat1, lng1, lat2, lng2):
+    """Great-circle distance the way MongoDB computes it for GeoJSON points"""
+    lat1, lng1, lat2, lng2 = map(radians, [lat1, lng1, lat2, lng2])
+    a = sin((lat2 - lat1) / 2)**2 + cos(lat1) * cos(lat2) * sin((lng2 - lng1) / 2)**2
+    return MONGO_EARTH_RADIUS_METERS * 2 * atan2(sqrt(a), sqrt(1 - a))
+
+
+def test_geo_point_is_lng_lat():
+    assert geo_point(12.97, 77.60) == {"type": "Point", "coordinates": [77.60, 12.97]}
+
+
+def test_mongo_distances_match_calculate_distance():
+    jayanagar = (12.9399039, 77.5826382)
+    brigade_road = (12.9720, 77.6081)
+    miles = calculate_distance(*jayanagar, *brigade_road)
+    meters = mongo_spherical_meters(*jayanagar, *brigade_road)
+
+    assert abs(meters / MONGO_METERS_PER_MILE - miles) < 1e-9
+    assert abs(miles_to_mongo_meters(miles) - meters) < 1e-6
+
+
+def test_batch_distances_match_calculate_distance():
+    rng = random.Random(11)
+    lats = [rng.uniform(-89, 89) for _ in range(2000)]
+    lngs = [rng.uniform(-180, 180) for _ in range(2000)]
+
+    distances = calculate_distances(12.97, 77.6, lats, lngs)
+    expected = [calculate_distance(12.97, 77.6, lat, lng) for lat, lng in zip(lats, lngs)]
+    assert np.allclose(distances, expected, rtol=1e-12, atol=1e-9)
+    assert len(calculate_distances(12.97, 77.6, [], [])) == 0
+
+
+def test_nearest_order_keeps_ties_at_the_cutoff():
+    distances = np.array([5.0, 1.0, 3.0, 3.0, 0.5, 3.0])
+
+    assert list(nearest_order(distances)) == [4, 1, 2, 3, 5, 0]
+    assert list(nearest_order(distances, 2)) == [4, 1]
+    assert sorted(nearest_order(distances, 3)[2:]) == [2, 3, 5]
+    assert len(nearest_order(distances, 0)) == 0
+
+
+def test_bounding_box_prefilter_keeps_every_point_in_the_radius():
+    rng = random.Random(5)
+    for lat, lng in [(12.97, 77.6), (64.1, -21.9), (-36.8, 179.95)]:
+        lats = [lat + rng.uniform(-0.5, 0.5) for _ in range(2000)]
+        lngs = [((lng + rng.uniform(-0.5, 0.5) + 180) % 360) - 180 for _ in range(2000)]
+        inside = in_bounding_box(lats, lngs, bounding_box(lat, lng, 10))
+        distances = calculate_distances(lat, lng, lats, lngs)
+
+        assert not np.any((distances <= 10) & ~inside)
+        assert np.count_nonzero(inside) < len(lats)
+
+
+def test_bounding_box_query_splits_at_the_antimeridian():
+    assert set(bounding_box_query(12.97, 77.6, 5)) == {"location.lat", "location.lng"}
+
+    query = bounding_box_query(-36.8, 179.95, 10)
+    east, west = (clause["location.lng"] for clause in query["$or"])
+    assert "location.lng" not in query
+    assert east["$lte"] == 180.0 and east["$gte"] < 179.95
+    assert west["$gte"] == -180.0 and -180.0 < west["$lte"] < -179.5
@@ -0,0 +1,61 @@
+import asyncio
+
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+from indexes import DEAL_INDEXES, RETIRED_DEAL_INDEXES, ensure_indexes
+
+
+class FakeCollection:
+    name = "deals"
+
+    def __init__(self, existing, failing=()):
+        self.indexes = {name: {} for name in existing}
+        self.failing = set(failing)
+
+    async def index_information(self):
+        return dict(self.indexes)
+
+    async def create_indexes(self, indexes):
+        for index in indexes:
+            name = index.document["name"]
+            if name in self.failing:
+                raise OperationFailure("Index build failed")
+            self.indexes[name] = index.document
+
+    async def drop_index(self, name):
+        del self.indexes[name]
+
+
+def test_only_missing_indexes_are_built():
+    collection = FakeCollection(existing=["_id_", "id_unique"])
+    summary = asyncio.run(ensure_indexes(collection, DEAL_INDEXES))
+
+    assert summary["existing"] == ["id_unique"]
+    assert "id_unique" not in summary["created"]
+    assert len(summary["created"]) == len(DEAL_INDEXES) - 1
+
+    # A second run finds everything in place
+    summary = asyncio.run(ensure_indexes(collection, DEAL_INDEXES))
+    assert summary["created"] == []
+
+
+def test_failed_index_does_not_stop_the_rest():
+    indexes = [IndexModel([("a", ASCENDING)], name="a"), IndexModel([("b", ASCENDING)], name="b")]
+    collection = FakeCollection(existing=[], failing=["a"])
+    summary = asyncio.run(ensure_indexes(collection, indexes))
+
+    assert summary["failed"] == ["a"]
+    assert summary["created"] == ["b"]
+
+
+def test_retired_indexes_are_dropped_once_replacements_exist():
+    collection = FakeCollection(existing=["_id_", "geo_category_discount"], failing=["expiration_ttl"])
+    summary = asyncio.run(ensure_indexes(collection, DEAL_INDEXES, RETIRED_DEAL_INDEXES))
+    assert summary["dropped"] == []
+
+    collection.failing = set()
+    summary = asyncio.run(ensure_indexes(collection, DEAL_INDEXES, RETIRED_DEAL_INDEXES))
+    assert summary["dropped"] == ["geo_category_discount"]
+    assert "geo_category_discount" not in collection.indexes
+    assert collection.indexes["expiration_ttl"]["expireAfterSeconds"] == 0
@@ -0,0 +1,102 @@
+import asyncio
+import copy
+
+from jobs import COMPLETED, FAILED, ScrapeJobQueue
+
+
+class FakeCursor:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def sort(self, key, direction):
+        self.rows.sort(key=lambda row: row[key], reverse=direction < 0)
+        return self
+
+    def __aiter__(self):
+        self._iter = iter(self.rows)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class FakeJobs:
+    """Just enough of a Motor collection for the job queue"""
+
+    def __init__(self):
+        self.rows = {}
+
+    async def insert_one(self, document):
+        self.rows[document["id"]] = copy.deepcopy(document)
+
+    async def find_one(self, query, projection=None):
+        row = self.rows.get(query["id"])
+        return copy.deepcopy(row) if row else None
+
+    def find(self, query, projection=None):
+        statuses = query["status"]["$in"]
+        return FakeCursor([copy.deepcopy(row) for row in self.rows.values() if row["status"] in statuses])
+
+    async def update_one(self, query, update):
+        row = self.rows[query["id"]]
+        row.update(update.get("$set", {}))
+        for key, amount in update.get("$inc", {}).items():
+            row[key] += amount
+        for key, value in update.get("$push", {}).items():
+            row[key].append(value)
+
+
+async def run_jobs(collection, runner, params_list):
+    queue = ScrapeJobQueue(collection, runner, workers=2)
+    await queue.start()
+    jobs = [await queue.submit(params) for params in params_list]
+    await queue._queue.join()
+    await queue.stop()
+    return [await queue.get(job["id"]) for job in jobs]
+
+
+def test_job_records_progress_and_result():
+    async def runner(params, progress):
+        await progress.stores_found(2)
+        for name in ("A", "B"):
+            await progress.store_done({"store": name, "status": "scraped"})
+        return {"message": f"Scraped {params['location']}"}
+
+    (job,) = asyncio.run(run_jobs(FakeJobs(), runner, [{"location": "Jayanagar"}]))
+    assert job["status"] == COMPLETED
+    assert job["stores_total"] == 2
+    assert job["stores_done"] == 2
+    assert [store["store"] for store in job["stores"]] == ["A", "B"]
+    assert job["result"] == {"message": "Scraped Jayanagar"}
+
+
+def test_failing_job_is_marked_failed():
+    async def runner(params, progress):
+        raise RuntimeError("Firecrawl is down")
+
+    (job,) = asyncio.run(run_jobs(FakeJobs(), runner, [{"location": "SF"}]))
+    assert job["status"] == FAILED
+    assert job["error"] == "Firecrawl is down"
+
+
+def test_unfinished_jobs_are_requeued_on_start():
+    collection = FakeJobs()
+    asyncio.run(collection.insert_one({
+        "id": "left-over", "status": "running", "params": {"location": "SF"},
+        "stores_done": 0, "stores": [], "created_at": 0
+    }))
+
+    async def runner(params, progress):
+        return {"message": "done"}
+
+    async def restart():
+        queue = ScrapeJobQueue(collection, runner, workers=1)
+        await queue.start()
+        await queue._queue.join()
+        await queue.stop()
+        return await queue.get("left-over")
+
+    assert asyncio.run(restart())["status"] == COMPLETED
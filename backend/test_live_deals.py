@@ -0,0 +1,108 @@
+import asyncio
+
+import orjson
+
+from deal_writer import DealWriter
+from live_deals import LiveDealHub
+from subscriptions import Subscription, SubscriptionIndex
+from test_deal_writer import FakeCollection, make_deal
+
+
+def document(lat, lng, category="retail", discount=30.0, id="deal"):
+    return {
+        "id": id, "title": "Deal", "category": category, "discount_percentage": discount,
+        "deal_key": f"key-{id}", "store_key": "store", "scrape_generation": "g1",
+        "location": {"lat": lat, "lng": lng, "address": "Brigade Road", "point": {"type": "Point"}},
+    }
+
+
+def test_index_matches_by_radius_category_and_discount():
+    index = SubscriptionIndex()
+    near = Subscription("near", 12.972, 77.608, 2.0)
+    restaurants = Subscription("restaurants", 12.972, 77.608, 2.0, category="restaurant")
+    picky = Subscription("picky", 12.972, 77.608, 2.0, min_discount=50)
+    far = Subscription("far", 37.77, -122.42, 2.0)
+    for subscription in (near, restaurants, picky, far):
+        index.add(subscription)
+
+    assert [s.id for s, _ in index.match(12.975, 77.61, "retail", 30.0)] == ["near"]
+    assert sorted(s.id for s, _ in index.match(12.975, 77.61, "restaurant", 60.0)) == ["near", "picky", "restaurants"]
+    # About 3.5 miles away: inside the grid cells but outside every radius
+    assert index.match(13.02, 77.608, "retail", 60.0) == []
+
+    index.remove(near)
+    assert index.match(12.975, 77.61, "retail", 30.0) == []
+    assert len(index) == 3
+
+
+def test_subscriptions_across_the_antimeridian_match_both_sides():
+    index = SubscriptionIndex()
+    index.add(Subscription("fiji", -17.0, 179.99, 5.0))
+
+    assert [s.id for s, _ in index.match(-17.0, -179.99, None, None)] == ["fiji"]
+    assert [s.id for s, _ in index.match(-17.0, 179.95, None, None)] == ["fiji"]
+
+
+def test_publish_sends_one_push_per_subscriber_nearest_first():
+    hub = LiveDealHub()
+    subscription = hub.subscribe(12.972, 77.608, 5.0)
+    other = hub.subscribe(37.77, -122.42, 5.0)
+
+    notified = hub.publish([document(12.99, 77.608, id="b"), document(12.973, 77.608, id="a")])
+
+    assert notified == 1
+    assert other.queue.empty()
+    deals = subscription.queue.get_nowait()
+    assert [deal["id"] for deal in deals] == ["a", "b"]
+    assert "deal_key" not in deals[0] and "point" not in deals[0]["location"]
+    assert subscription.queue.empty()
+
+
+def test_slow_subscribers_drop_their_oldest_pushes():
+    hub = LiveDealHub(queue_size=2)
+    subscription = hub.subscribe(12.972, 77.608, 5.0)
+    for i in range(3):
+        hub.publish([document(12.972, 77.608, id=str(i))])
+
+    assert subscription.dropped == 1
+    assert [subscription.queue.get_nowait()[0]["id"] for _ in range(2)] == ["1", "2"]
+
+
+def test_event_stream_sends_pushes_and_unsubscribes_on_close():
+    hub = LiveDealHub()
+
+    async def consume():
+        subscription = hub.subscribe(12.972, 77.608, 5.0)
+        events = hub.events(subscription, heartbeat=0.01)
+        first = await events.__anext__()
+        idle = await events.__anext__()
+        hub.publish([document(12.972, 77.608)])
+        pushed = await events.__anext__()
+        await events.aclose()
+        return first, idle, pushed
+
+    first, idle, pushed = asyncio.run(consume())
+    assert first.startswith(b"event: subscribed\n")
+    assert idle == b": keep-alive\n\n"
+    assert pushed.startswith(b"event: deals\ndata: ")
+    assert orjson.loads(pushed.split(b"data: ", 1)[1])[0]["id"] == "deal"
+    assert len(hub) == 0
+
+
+def test_writer_publishes_only_newly_inserted_deals():
+    hub = LiveDealHub()
+    subscription = hub.subscribe(12.9716, 77.5946, 5.0, min_discount=None)
+    collection = FakeCollection()
+
+    async def write(titles):
+        writer = DealWriter(collection, events=[hub])
+        await writer.add_many(make_deal(title=title) for title in titles)
+        await writer.close()
+
+    asyncio.run(write(["Jacket", "Shoes"]))
+    asyncio.run(write(["Jacket", "Scarf", "bad"]))
+
+    assert sorted(deal["title"] for deal in subscription.queue.get_nowait()) == ["Jacket", "Shoes"]
+    # The rewritten jacket and the rejected row are not pushed again
+    assert [deal["title"] for deal in subscription.queue.get_nowait()] == ["Scarf"]
+    assert subscription.queue.empty()
@@ -0,0 +1,57 @@
+import asyncio
+
+import server
+from cache import deals_cache
+from deal_index import DealIndex
+from http_client import ScrapeClient
+from metrics import registry
+from parsing import BELOW_MIN_DISCOUNT
+from test_scraping import STORES, stub_transport, use_client  # noqa: F401
+from test_serialization import stored_deal
+
+
+def sample(name, **labels):
+    return registry.get_sample_value(name, labels) or 0.0
+
+
+def test_scrape_stages_and_outcomes_are_recorded(use_client):  # noqa: F811
+    use_client(ScrapeClient(transport=stub_transport()))
+    before = {
+        "firecrawl": sample("deal_finder_scrape_stage_seconds_count", stage="firecrawl"),
+        "parse": sample("deal_finder_scrape_stage_seconds_count", stage="parse"),
+        "accepted": sample("deal_finder_scraped_deals_total", outcome="accepted"),
+        "rejected": sample("deal_finder_scraped_deals_total", outcome=BELOW_MIN_DISCOUNT),
+    }
+
+    asyncio.run(server.scrape_store(STORES[0]))
+
+    assert sample("deal_finder_scrape_stage_seconds_count", stage="firecrawl") == before["firecrawl"] + 1
+    assert sample("deal_finder_scrape_stage_seconds_count", stage="parse") == before["parse"] + 1
+    # The stub listing has one deal over the minimum discount and one under it
+    assert sample("deal_finder_scraped_deals_total", outcome="accepted") == before["accepted"] + 1
+    assert sample("deal_finder_scraped_deals_total", outcome=BELOW_MIN_DISCOUNT) == before["rejected"] + 1
+
+
+def test_get_deals_stages_are_recorded_and_exposed(monkeypatch):
+    index = DealIndex()
+    index.upsert_many(stored_deal(i, 12.972 + i * 0.001) for i in range(3))
+    index.ready = True
+    monkeypatch.setattr(server, "live_deal_index", index)
+    deals_cache.clear()
+    stages = ("distance_filter", "sort", "serialize")
+    before = {stage: sample("deal_finder_deals_stage_seconds_count", stage=stage) for stage in stages}
+    handler_before = sample("deal_finder_handler_seconds_count", handler="/api/deals")
+
+    asyncio.run(server.get_deals(
+        lat=12.972, lng=77.6081, category=None, radius=5.0, min_discount=15.0,
+        location=None, limit=2, next_cursor=None, stream=False
+    ))
+    deals_cache.clear()
+
+    for stage in stages:
+        assert sample("deal_finder_deals_stage_seconds_count", stage=stage) == before[stage] + 1
+    assert sample("deal_finder_handler_seconds_count", handler="/api/deals") == handler_before + 1
+
+    response = asyncio.run(server.get_metrics())
+    assert response.media_type.startswith("text/plain")
+    assert b'deal_finder_deals_stage_seconds_bucket{le="0.001",stage="sort"}' in response.body
@@ -0,0 +1,48 @@
+from datetime import datetime
+
+import pytest
+from pydantic import ValidationError
+
+from deal_writer import deal_key, deal_to_document
+from models import Deal, trusted_deal
+
+
+def sample():
+    return {
+        "title": "50% Off All Clothing",
+        "description": "Limited time offer",
+        "discount_percentage": 50.0,
+        "business_name": "Gap Union Square",
+        "category": "retail",
+        "location": {"lat": 37.7749, "lng": -122.4194, "address": "123 Market St, San Francisco, CA"},
+        "original_price": 100.0,
+        "sale_price": 50.0,
+        "expiration_date": datetime(2025, 5, 1),
+        "created_at": datetime(2025, 4, 1),
+        "id": "deal-1",
+    }
+
+
+def test_trusted_deal_matches_validated_deal():
+    trusted = trusted_deal(**sample())
+    validated = Deal(**sample())
+
+    assert trusted == validated.dict()
+    assert list(trusted) == list(validated.dict())
+    assert deal_key(trusted) == deal_key(validated)
+    assert deal_to_document(trusted, "g1") == deal_to_document(validated, "g1")
+
+
+def test_trusted_deal_fills_defaults():
+    fields = {key: value for key, value in sample().items() if key not in ("id", "created_at", "sale_price")}
+    deal = trusted_deal(**fields)
+
+    assert deal["id"] and deal["created_at"]
+    assert deal["sale_price"] is None
+    with pytest.raises(KeyError):
+        trusted_deal(title="No store")
+
+
+def test_validated_deal_rejects_bad_input():
+    with pytest.raises(ValidationError):
+        Deal(**dict(sample(), discount_percentage="lots"))
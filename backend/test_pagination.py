@@ -0,0 +1,32 @@
+import pytest
+
+from pagination import InvalidCursor, decode_cursor, encode_cursor, keyset_match
+
+
+def test_cursor_round_trip():
+    token = encode_cursor({"id": "b2c1", "distance": 0.4213377, "title": "ignored"})
+    assert decode_cursor(token) == {"id": "b2c1", "d": 0.4213377}
+
+
+def test_cursor_without_distance():
+    token = encode_cursor({"id": "b2c1"})
+    assert keyset_match(decode_cursor(token), by_distance=False) == {"$match": {"id": {"$gt": "b2c1"}}}
+
+
+def test_distance_keyset_breaks_ties_on_id():
+    stage = keyset_match({"id": "b2c1", "d": 1.5}, by_distance=True)
+    assert stage == {"$match": {"$or": [
+        {"distance": {"$gt": 1.5}},
+        {"distance": 1.5, "id": {"$gt": "b2c1"}}
+    ]}}
+
+
+@pytest.mark.parametrize("token", ["not base64!", "e30", encode_cursor({"id": "x"})[:-2]])
+def test_malformed_cursor_is_rejected(token):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(token)
+
+
+def test_distance_cursor_required_for_distance_query():
+    with pytest.raises(InvalidCursor):
+        keyset_match({"id": "b2c1"}, by_distance=True)
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from parsing import (
+    BELOW_MIN_DISCOUNT, INVALID_DISCOUNT, INVALID_PRICE, NO_DISCOUNT, ZERO_ORIGINAL_PRICE,
+    normalize_listing, parse_number,
+)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("₹1,999", 1999.0),
+    ("Rs. 1,99,999.00", 199999.0),
+    ("$1,299.99", 1299.99),
+    ("€1.999,00", 1999.0),
+    ("12,50 €", 12.5),
+    ("1 999 ₹", 1999.0),
+    ("1.999.000", 1999000.0),
+    (49.5, 49.5),
+    ("call for price", float("nan")),
+    (None, float("nan")),
+])
+def test_parse_number(text, expected):
+    np.testing.assert_equal(parse_number(text), expected)
+
+
+def test_listing_is_parsed_column_wise_with_reject_reasons():
+    parsed = normalize_listing([
+        {"discount": "Flat 40% Off", "original_price": "₹2,499", "sale_price": "₹1,499"},
+        {"original_price": "₹1,999", "sale_price": "₹999"},
+        {"discount": "Up to 12.5% off"},
+        {"discount": "huge savings"},
+        {"original_price": "0", "sale_price": "0"},
+        {"original_price": "see store", "sale_price": "see store"},
+        {"title": "No prices at all"},
+    ])
+
+    assert parsed.reject_reasons == [
+        None, None, BELOW_MIN_DISCOUNT, INVALID_DISCOUNT, ZERO_ORIGINAL_PRICE, INVALID_PRICE, NO_DISCOUNT
+    ]
+    assert parsed.accepted_indices().tolist() == [0, 1]
+    assert parsed.discount[:3].tolist() == [40.0, 50.03, 12.5]
+    assert parsed.original_price[:2].tolist() == [2499.0, 1999.0]
+    assert parsed.price(parsed.sale_price[6]) is None
+    assert parsed.reject_counts()[BELOW_MIN_DISCOUNT] == 1
+
+
+def test_empty_listing():
+    parsed = normalize_listing([])
+    assert len(parsed) == 0
+    assert parsed.accepted_indices().tolist() == []
@@ -0,0 +1,178 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from types import SimpleNamespace
+
+import server
+from http_client import ScrapeClient, set_scrape_client
+from scrape_state import StoreFreshness
+from test_deal_writer import FakeCollection
+
+STUB_DEALS = [
+    {"title": "Denim Jacket", "description": "Classic fit", "discount": "40% off",
+     "original_price": "₹2000", "sale_price": "₹1200", "image": "https://example.com/a.jpg"},
+    {"title": "Socks", "description": "Cotton", "discount": "5%",
+     "original_price": "₹200", "sale_price": "₹190", "image": ""},
+]
+
+STORES = [
+    {"name": f"Store {i}", "category": "retail", "address": f"{i} Brigade Road, Bengaluru",
+     "lat": 12.9720, "lng": 77.6081, "website": f"https://shop{i}.example.com/sale"}
+    for i in range(4)
+]
+
+
+def stub_transport(latency=0.0, tracker=None):
+    """Fake Firecrawl server that answers every scrape with STUB_DEALS"""
+    async def handler(request):
+        if tracker is not None:
+            tracker["requests"] = tracker.get("requests", 0) + 1
+            tracker["active"] += 1
+            tracker["peak"] = max(tracker["peak"], tracker["active"])
+        try:
+            await asyncio.sleep(latency)
+            return httpx.Response(200, json={"deals": STUB_DEALS})
+        finally:
+            if tracker is not None:
+                tracker["active"] -= 1
+    return httpx.MockTransport(handler)
+
+
+@pytest.fixture
+def use_client():
+    previous = []
+
+    def install(client):
+        previous.append(set_scrape_client(client))
+        return client
+
+    yield install
+    for client in previous:
+        set_scrape_client(client)
+
+
+def test_scrape_store_parses_stub_response(use_client):
+    use_client(ScrapeClient(transport=stub_transport()))
+    deals = asyncio.run(server.scrape_store(STORES[0]))
+
+    # The 5% deal falls under the minimum discount
+    assert [deal["title"] for deal in deals] == ["Denim Jacket"]
+    assert deals[0]["discount_percentage"] == 40.0
+    assert deals[0]["business_name"] == "Store 0"
+
+
+def test_stores_are_scraped_concurrently(use_client):
+    use_client(ScrapeClient(max_concurrency=8, max_per_host=2, transport=stub_transport(latency=0.2)))
+
+    async def scrape_all():
+        return await asyncio.gather(*(server.scrape_store(store) for store in STORES))
+
+    started = time.perf_counter()
+    results = asyncio.run(scrape_all())
+    elapsed = time.perf_counter() - started
+
+    assert all(len(deals) == 1 for deals in results)
+    # Four stores at 0.2s each would take 0.8s serially
+    assert elapsed < 0.6
+
+
+def test_per_host_limit_is_enforced(use_client):
+    tracker = {"active": 0, "peak": 0}
+    scrape_client = use_client(ScrapeClient(max_concurrency=8, max_per_host=1,
+                                            transport=stub_transport(latency=0.05, tracker=tracker)))
+
+    async def post_all():
+        await asyncio.gather(*(
+            scrape_client.post("http://firecrawl.test/v1/scrape", host_key="same.example.com", json={})
+            for _ in range(4)
+        ))
+        await scrape_client.aclose()
+
+    asyncio.run(post_all())
+    assert tracker["peak"] == 1
+
+
+def test_store_deadline(use_client, monkeypatch):
+    use_client(ScrapeClient(transport=stub_transport(latency=1.0)))
+    monkeypatch.setattr(server, "SCRAPE_STORE_TIMEOUT", 0.05)
+
+    deals = asyncio.run(server.scrape_store(STORES[0]))
+    assert deals is None
+
+
+def test_concurrent_ingests_of_a_store_are_coalesced(use_client, monkeypatch):
+    tracker = {"active": 0, "peak": 0}
+    use_client(ScrapeClient(transport=stub_transport(latency=0.05, tracker=tracker)))
+    monkeypatch.setattr(server, "db", SimpleNamespace(deals=FakeCollection()))
+    monkeypatch.setattr(server, "store_freshness", StoreFreshness(ttl=60))
+
+    async def ingest_twice():
+        return await asyncio.gather(server.ingest_store(STORES[0]), server.ingest_store(STORES[0]))
+
+    first, second = asyncio.run(ingest_twice())
+    assert tracker["requests"] == 1
+    assert first["status"] == second["status"] == "scraped"
+    assert first["write_report"].inserted == 1
+
+    # Within the TTL the store is not scraped again
+    again = asyncio.run(server.ingest_store(STORES[0]))
+    assert again["status"] == "fresh"
+    assert tracker["requests"] == 1
+
+
+def test_unchanged_listing_is_not_rewritten(use_client, monkeypatch):
+    use_client(ScrapeClient(transport=stub_transport()))
+    collection = FakeCollection()
+    monkeypatch.setattr(server, "db", SimpleNamespace(deals=collection))
+    monkeypatch.setattr(server, "store_freshness", StoreFreshness(ttl=0))
+
+    assert asyncio.run(server.ingest_store(STORES[1]))["status"] == "scraped"
+    assert asyncio.run(server.ingest_store(STORES[1]))["status"] == "unchanged"
+    assert len(collection.calls) == 1
+
+
+def test_unchanged_listing_is_rewritten_to_renew_expiry(use_client, monkeypatch):
+    use_client(ScrapeClient(transport=stub_transport()))
+    collection = FakeCollection()
+    clock = SimpleNamespace(now=0.0)
+    monkeypatch.setattr(server, "db", SimpleNamespace(deals=collection))
+    monkeypatch.setattr(server, "store_freshness", StoreFreshness(ttl=0, clock=lambda: clock.now))
+    monkeypatch.setattr(server, "SCRAPED_DEAL_LIFETIME", timedelta(hours=2))
+
+    assert asyncio.run(server.ingest_store(STORES[1]))["status"] == "scraped"
+    first_expiry = next(iter(collection.rows.values()))["expiration_date"]
+    clock.now = 1800
+    assert asyncio.run(server.ingest_store(STORES[1]))["status"] == "unchanged"
+    clock.now = 3600
+    assert asyncio.run(server.ingest_store(STORES[1]))["status"] == "scraped"
+
+    assert len(collection.calls) == 2
+    assert next(iter(collection.rows.values()))["expiration_date"] >= first_expiry
+    assert first_expiry > datetime.utcnow() + timedelta(hours=1)
+
+
+def test_one_store_failing_to_write_does_not_fail_the_scrape(use_client, monkeypatch):
+    use_client(ScrapeClient(transport=stub_transport()))
+    failing_key = server.store_key(STORES[0]["name"], STORES[0]["address"])
+
+    class FlakyCollection(FakeCollection):
+        async def delete_many(self, query):
+            if failing_key in query["store_key"]["$in"]:
+                raise RuntimeError("connection reset")
+            return await super().delete_many(query)
+
+    async def find_local_stores(*args):
+        return STORES[:3]
+
+    monkeypatch.setattr(server, "db", SimpleNamespace(deals=FlakyCollection()))
+    monkeypatch.setattr(server, "store_freshness", StoreFreshness(ttl=0))
+    monkeypatch.setattr(server, "find_local_stores", find_local_stores)
+
+    result = asyncio.run(server.scrape_deals(location_name="Brigade Road"))
+
+    assert [store["status"] for store in result["stores"]] == ["failed", "scraped", "scraped"]
+    # The failed store's upsert landed before the delete did not
+    assert result["write_report"]["inserted"] == 3
@@ -0,0 +1,94 @@
+import asyncio
+from datetime import datetime
+
+import orjson
+from bson import ObjectId
+from fastapi.testclient import TestClient
+
+import server
+from cache import deals_cache
+from deal_index import DealIndex
+from pagination import NEXT_CURSOR_HEADER
+from serialization import FastJSONResponse
+
+
+def stored_deal(i, lat):
+    return {
+        "_id": ObjectId(),
+        "id": f"deal-{i}",
+        "deal_key": f"key-{i}",
+        "store_key": "brigade",
+        "scrape_generation": "g1",
+        "title": f"Deal {i}",
+        "category": "retail",
+        "discount_percentage": 30.0,
+        "created_at": datetime(2025, 4, 1, 9, 30),
+        "location": {
+            "lat": lat,
+            "lng": 77.6081,
+            "address": "Brigade Road, Bengaluru",
+            "point": {"type": "Point", "coordinates": [77.6081, lat]},
+        },
+    }
+
+
+def test_response_renders_datetimes_and_object_ids():
+    object_id = ObjectId()
+    response = FastJSONResponse([{"id": object_id, "created_at": datetime(2025, 4, 1, 9, 30)}])
+
+    assert orjson.loads(response.body) == [{"id": str(object_id), "created_at": "2025-04-01T09:30:00"}]
+    assert FastJSONResponse(b"[]").body == b"[]"
+
+
+def test_get_deals_pages_from_the_deal_index(monkeypatch):
+    index = DealIndex()
+    index.upsert_many(stored_deal(i, 12.972 + i * 0.001) for i in range(3))
+    index.ready = True
+    monkeypatch.setattr(server, "live_deal_index", index)
+    deals_cache.clear()
+
+    def get_page(cursor=None):
+        return asyncio.run(server.get_deals(
+            lat=12.972, lng=77.6081, category=None, radius=5.0, min_discount=15.0,
+            location=None, limit=2, next_cursor=cursor, stream=False
+        ))
+
+    first = get_page()
+    second = get_page(first.headers[NEXT_CURSOR_HEADER])
+    deals_cache.clear()
+
+    assert [deal["id"] for deal in orjson.loads(first.body)] == ["deal-0", "deal-1"]
+    assert [deal["id"] for deal in orjson.loads(second.body)] == ["deal-2"]
+    assert NEXT_CURSOR_HEADER not in second.headers
+    assert "deal_key" not in orjson.loads(second.body)[0]
+
+
+def test_get_deals_rejects_radii_mongodb_cannot_query():
+    client = TestClient(server.app)
+    for radius in (0, -1, 51):
+        response = client.get("/api/deals", params={"lat": 12.972, "lng": 77.6081, "radius": radius})
+        assert response.status_code == 422
+        response = client.get(
+            "/api/deals/search", params={"q": "jacket", "lat": 12.972, "lng": 77.6081, "radius": radius}
+        )
+        assert response.status_code == 422
+
+
+def test_neighborhood_is_taken_from_the_unsnapped_point(monkeypatch):
+    # 12.9699 is just inside the Brigade Road box (12.96-12.97); its geohash cell center is not
+    brigade = stored_deal(0, 12.972)
+    jayanagar = stored_deal(1, 12.9399)
+    jayanagar["location"].update(lng=77.5826, address="Jayanagar 4th Block, Bengaluru")
+    index = DealIndex()
+    index.upsert_many([brigade, jayanagar])
+    index.ready = True
+    monkeypatch.setattr(server, "live_deal_index", index)
+    deals_cache.clear()
+
+    response = asyncio.run(server.get_deals(
+        lat=12.9699, lng=77.6081, category=None, radius=5.0, min_discount=15.0,
+        location=None, limit=None, next_cursor=None, stream=False
+    ))
+    deals_cache.clear()
+
+    assert [deal["id"] for deal in orjson.loads(response.body)] == ["deal-0"]
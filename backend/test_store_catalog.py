@@ -0,0 +1,55 @@
+import asyncio
+import json
+import random
+
+import server
+from geo import calculate_distance
+from store_catalog import StoreCatalog, store_catalog
+
+
+def names(stores):
+    return [store["name"] for store in stores]
+
+
+def test_areas_resolve_by_name_and_coordinates():
+    assert [area.name for area in store_catalog.areas_for_name("Brigade Road, Bengaluru")] == ["Brigade Road"]
+    assert [area.name for area in store_catalog.areas_for_name("SF, CA")] == ["San Francisco"]
+    assert store_catalog.areas_for_name("Transfer station") == []
+    assert [area.name for area in store_catalog.areas_for_point(12.935, 77.585)] == ["Jayanagar"]
+    assert store_catalog.areas_for_point(40.71, -74.0) == []
+
+
+def test_find_local_stores_uses_named_areas():
+    stores = asyncio.run(server.find_local_stores("Jayanagar, Bengaluru", category="restaurant"))
+    assert names(stores) == ["Dominos Pizza Jayanagar"]
+
+    stores = asyncio.run(server.find_local_stores(lat=37.7749, lng=-122.4194))
+    assert len(stores) == 4
+
+
+def test_coordinates_outside_areas_fall_back_to_nearby_stores():
+    # Just north of the Brigade Road box
+    stores = asyncio.run(server.find_local_stores(lat=12.9725, lng=77.6079))
+    assert names(stores)[0] == "Hard Rock Cafe"
+    # Brigade Road stores come before the Jayanagar ones about 2.5 miles away
+    assert all("Brigade" in store["address"] for store in stores[:4])
+    assert "Zudio Jayanagar" in names(stores)[4:]
+
+
+def test_stores_near_matches_brute_force(tmp_path):
+    rng = random.Random(7)
+    stores = [
+        {"name": f"Store {i}", "category": "retail", "address": f"{i} Main St",
+         "lat": 12.9 + rng.uniform(-1, 1), "lng": 77.6 + rng.uniform(-1, 1), "website": "https://example.com"}
+        for i in range(5000)
+    ]
+    path = tmp_path / "stores.json"
+    path.write_text(json.dumps({"areas": [], "stores": stores}))
+    catalog = StoreCatalog(path)
+    assert catalog.load() == 5000
+
+    expected = sorted(
+        (store for store in stores if calculate_distance(12.97, 77.6, store["lat"], store["lng"]) <= 3),
+        key=lambda store: calculate_distance(12.97, 77.6, store["lat"], store["lng"])
+    )
+    assert names(catalog.stores_near(12.97, 77.6, 3)) == names(expected)
@@ -0,0 +1,43 @@
+import json
+
+import pytest
+
+from store_selectors import DEFAULT_DOMAIN, SelectorRegistry, SelectorRegistryError, selector_registry
+
+RULES = {"selector": ".deal", "properties": {"title": "h2"}}
+
+
+def test_shipped_selectors_resolve_by_hostname():
+    assert selector_registry.lookup("https://www2.hm.com/en_in/sale.html")[0] == "hm.com"
+    assert selector_registry.lookup("https://www.tatacliq.com/zudio/c-msh1451/offers")[0] == "tatacliq.com"
+    assert selector_registry.lookup("https://www.dominos.co.in/offers")[0] == "dominos.co.in"
+    # A domain merely containing a known one is not a match
+    assert selector_registry.lookup("https://www.bhm.com/sale")[0] == DEFAULT_DOMAIN
+
+
+def test_lookup_returns_ready_extract_rules(tmp_path):
+    path = tmp_path / "selectors.json"
+    path.write_text(json.dumps({"default": RULES, "domains": {"shop.example": RULES}}))
+    registry = SelectorRegistry(path)
+    registry.load()
+
+    domain, rules = registry.lookup("https://m.shop.example/sale")
+    assert domain == "shop.example"
+    assert rules == {"deals": {"selector": ".deal", "type": "list", "properties": {"title": "h2"}}}
+
+
+def test_reload_picks_up_new_domains_and_keeps_table_on_error(tmp_path):
+    path = tmp_path / "selectors.json"
+    path.write_text(json.dumps({"default": RULES, "domains": {}}))
+    registry = SelectorRegistry(path)
+    registry.load()
+    assert registry.lookup("https://new.example/sale")[0] == DEFAULT_DOMAIN
+
+    path.write_text(json.dumps({"default": RULES, "domains": {"new.example": RULES}}))
+    assert registry.load() == 1
+    assert registry.lookup("https://new.example/sale")[0] == "new.example"
+
+    path.write_text("{not json")
+    with pytest.raises(SelectorRegistryError):
+        registry.load()
+    assert registry.lookup("https://new.example/sale")[0] == "new.example"
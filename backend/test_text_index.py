@@ -0,0 +1,77 @@
+import random
+
+import text_index
+from text_index import TextIndex
+
+
+def ranked(index, query, prefix=True):
+    slots, scores = index.score(query, prefix=prefix)
+    return [int(slot) for _, slot in sorted(zip(-scores, slots))]
+
+
+def test_rare_words_and_title_matches_rank_first():
+    index = TextIndex(capacity=2)
+    index.add(0, "Cotton shirts", "Summer sale on shirts and denim")
+    index.add(1, "Denim jeans", "Straight fit")
+    index.add(2, "Denim jacket", "Also shirts")
+    index.add(3, "Pizza", "Two for one")
+
+    # "shirt" is in the title of 0 and only the description of 2
+    assert ranked(index, "shirt") == [0, 2]
+    # Both words count; "jacket" is rarer than "denim"
+    assert ranked(index, "denim jacket") == [2, 1, 0]
+    assert ranked(index, "burgers") == []
+    assert len(index) == 4
+
+
+def test_last_word_expands_as_a_prefix():
+    index = TextIndex()
+    index.add(0, "Pizzas", None)
+    index.add(1, "Pizzeria lunch", None)
+    index.add(2, "Pita bread", None)
+
+    assert sorted(ranked(index, "piz")) == [0, 1]
+    assert ranked(index, "piz", prefix=False) == []
+    # A finished word is matched whole, with its plural folded
+    assert ranked(index, "pizzas ") == [0]
+    assert index.expand("pi") == [("pita", 1), ("pizza", 1), ("pizzeria", 1)]
+
+
+def test_remove_forgets_terms_and_frees_the_slot():
+    index = TextIndex()
+    index.add(0, "Leather boots", "Winter boots")
+    index.add(1, "Leather belt", None)
+    index.remove(0, "Leather boots", "Winter boots")
+
+    assert ranked(index, "boot") == []
+    assert ranked(index, "leather") == [1]
+    assert index.expand("b") == [("belt", 1)]
+
+    index.add(0, "Boots", None)
+    assert ranked(index, "boots") == [0]
+    assert len(index) == 2
+
+
+def test_scores_survive_tombstones_and_compaction(monkeypatch):
+    monkeypatch.setattr(text_index, "_COMPACT_MIN_POSTINGS", 16)
+    rng = random.Random(5)
+    words = ["denim", "jacket", "jeans", "pizza", "pizzeria", "boots", "belt", "shirt", f"item{rng.random()}"]
+    index, live = TextIndex(capacity=4), {}
+    for step in range(600):
+        slot = rng.randrange(60)
+        if slot in live:
+            index.remove(slot, *live.pop(slot))
+        if rng.random() < 0.7:
+            live[slot] = (" ".join(rng.sample(words, 2)), f"{rng.choice(words)} item{step}")
+            index.add(slot, *live[slot])
+
+    fresh = TextIndex()
+    for slot, (title, description) in live.items():
+        fresh.add(slot, title, description)
+    for query in ("denim", "pizz", "boots jea", "item5"):
+        scored = [dict(zip(slots.tolist(), scores.round(9).tolist())) for slots, scores in (
+            index.score(query), fresh.score(query)
+        )]
+        assert scored[0] == scored[1]
+    assert index.expand("item") == fresh.expand("item")
+    assert len(index) == len(live)
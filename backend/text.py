@@ -0,0 +1,27 @@
+import re
+from typing import List
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def normalize_token(word: str) -> str:
+    """
+    Fold simple plurals so "jeans" finds "jean" and "pizzas" finds "pizza"
+    """
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def split_words(text: str) -> List[str]:
+    """
+    Lowercased words of text, in order, as written
+    """
+    return _WORD.findall(text.lower()) if text else []
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercased words of text, in order, with plurals folded
+    """
+    return [normalize_token(word) for word in split_words(text)]
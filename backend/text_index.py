@@ -0,0 +1,288 @@
+import bisect
+import math
+from array import array
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from text import normalize_token, split_words, tokenize
+
+# BM25 term-frequency saturation and length normalization
+SEARCH_BM25_K1 = float(os.environ.get('SEARCH_BM25_K1', '1.2'))
+SEARCH_BM25_B = float(os.environ.get('SEARCH_BM25_B', '0.75'))
+# Title words count this many times as often as description words
+SEARCH_TITLE_WEIGHT = int(os.environ.get('SEARCH_TITLE_WEIGHT', '2'))
+# Most frequent vocabulary terms a trailing prefix expands to
+SEARCH_PREFIX_EXPANSIONS = int(os.environ.get('SEARCH_PREFIX_EXPANSIONS', '20'))
+# Postings added or removed since the last compaction, as a fraction of the compacted
+# ones, that triggers the next compaction
+SEARCH_COMPACT_FRACTION = float(os.environ.get('SEARCH_COMPACT_FRACTION', '0.25'))
+
+# Below this many changed postings compaction is never worth it
+_COMPACT_MIN_POSTINGS = 4096
+_MAX_COUNT = np.iinfo(np.uint16).max
+_EMPTY = (np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float64))
+
+
+def _grown(values: np.ndarray, size: int) -> np.ndarray:
+    """
+    Copy of values with room for at least size entries, doubling its capacity
+    """
+    grown = np.zeros(max(size, len(values) * 2), dtype=values.dtype)
+    grown[:len(values)] = values
+    return grown
+
+
+class TextIndex:
+    """
+    Inverted index over deal titles and descriptions, keyed by the slot numbers of
+    the owning DealIndex, scoring matches with BM25. The last word of a query may be
+    a prefix, which is expanded over the sorted vocabulary for search-as-you-type.
+
+    Postings live in NumPy arrays rather than per-term dicts. Compacted postings are
+    sorted by term id and sliced through an offsets array; ids follow vocabulary
+    order, so the compacted vocabulary is a sorted list searched with bisect. New
+    postings are appended to a delta segment, which queries search through a
+    term-sorted order cached between writes, and new terms get ids after the
+    compacted ones. Removing a slot bumps its epoch, which tombstones every posting
+    written under the old one. Once enough postings have changed, the live ones are
+    merged and sorted, dead terms dropped and epochs reset to zero, so compacted
+    postings need no epoch of their own.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        capacity = max(1, capacity)
+        self._vocabulary: List[str] = []
+        # Terms added since the last compaction, by id and in vocabulary order
+        self._new_terms: List[str] = []
+        self._new_sorted: List[str] = []
+        self._new_ids: Dict[str, int] = {}
+        # Live deals containing each term, by id
+        self._df = array("i")
+        self._lengths = np.zeros(capacity, dtype=np.float64)
+        self._epochs = np.zeros(capacity, dtype=np.uint32)
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._slots = np.zeros(0, dtype=np.int32)
+        self._counts = np.zeros(0, dtype=np.uint16)
+        self._reset_delta()
+        self._documents = 0
+        self._total_length = 0
+
+    def __len__(self):
+        return self._documents
+
+    def _reset_delta(self):
+        self._delta_terms = array("i")
+        self._delta_slots = array("i")
+        self._delta_counts = array("H")
+        self._delta_epochs = array("I")
+        self._delta_by_term: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._removed = 0
+
+    def _delta(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        The delta segment's (term, slot, count, epoch) columns as NumPy views. Don't keep
+        them past the call: the arrays cannot grow while a view exists.
+        """
+        return (
+            np.frombuffer(self._delta_terms, dtype=np.int32),
+            np.frombuffer(self._delta_slots, dtype=np.int32),
+            np.frombuffer(self._delta_counts, dtype=np.uint16),
+            np.frombuffer(self._delta_epochs, dtype=np.uint32),
+        )
+
+    def _term_counts(self, title: Optional[str], description: Optional[str]) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for token in tokenize(title or ""):
+            counts[token] = counts.get(token, 0) + SEARCH_TITLE_WEIGHT
+        for token in tokenize(description or ""):
+            counts[token] = counts.get(token, 0) + 1
+        return counts
+
+    def _term(self, term_id: int) -> str:
+        compacted = len(self._vocabulary)
+        return self._vocabulary[term_id] if term_id < compacted else self._new_terms[term_id - compacted]
+
+    def _lookup(self, term: str) -> Optional[int]:
+        i = bisect.bisect_left(self._vocabulary, term)
+        if i < len(self._vocabulary) and self._vocabulary[i] == term:
+            return i
+        return self._new_ids.get(term)
+
+    def _term_id(self, term: str) -> int:
+        term_id = self._lookup(term)
+        if term_id is None:
+            term_id = self._new_ids[term] = len(self._vocabulary) + len(self._new_terms)
+            self._new_terms.append(term)
+            bisect.insort(self._new_sorted, term)
+            self._df.append(0)
+        return term_id
+
+    def add(self, slot: int, title: Optional[str], description: Optional[str]):
+        if slot >= len(self._lengths):
+            self._lengths = _grown(self._lengths, slot + 1)
+            self._epochs = _grown(self._epochs, slot + 1)
+        counts = self._term_counts(title, description)
+        term_ids = [self._term_id(term) for term in counts]
+        self._delta_terms.extend(term_ids)
+        self._delta_slots.extend([slot] * len(term_ids))
+        self._delta_counts.extend([min(count, _MAX_COUNT) for count in counts.values()])
+        self._delta_epochs.extend([int(self._epochs[slot])] * len(term_ids))
+        self._delta_by_term = None
+        df = self._df
+        for term_id in term_ids:
+            df[term_id] += 1
+
+        length = sum(counts.values())
+        self._lengths[slot] = length
+        self._documents += 1
+        self._total_length += length
+        self._compact_if_needed()
+
+    def remove(self, slot: int, title: Optional[str], description: Optional[str]):
+        """
+        Undo add for a slot, given the same title and description
+        """
+        term_ids = [self._lookup(term) for term in self._term_counts(title, description)]
+        df = self._df
+        for term_id in term_ids:
+            df[term_id] -= 1
+        self._epochs[slot] += 1
+        self._removed += len(term_ids)
+        self._documents -= 1
+        self._total_length -= int(self._lengths[slot])
+        self._lengths[slot] = 0
+        self._compact_if_needed()
+
+    def _postings(self, term_ids: List[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Live (slot, count) postings of the given terms, concatenated
+        """
+        compacted = len(self._vocabulary)
+        ranges = [(self._offsets[term_id], self._offsets[term_id + 1]) for term_id in term_ids if term_id < compacted]
+        slots = np.concatenate([self._slots[start:end] for start, end in ranges] or [_EMPTY[0]])
+        counts = np.concatenate([self._counts[start:end] for start, end in ranges] or [_EMPTY[0]])
+        keep = self._epochs[slots] == 0
+        slots, counts = slots[keep], counts[keep]
+
+        if self._delta_terms:
+            terms, delta_slots, delta_counts, epochs = self._delta()
+            if self._delta_by_term is None:
+                # Sorted once per batch of adds, so queries binary-search the delta instead of scanning it
+                order = np.argsort(terms, kind="stable").astype(np.int32)
+                self._delta_by_term = (terms[order], order)
+            sorted_terms, order = self._delta_by_term
+            bounds = np.searchsorted(sorted_terms, [(term_id, term_id + 1) for term_id in term_ids])
+            found = np.concatenate([order[start:end] for start, end in bounds.tolist()])
+            if len(found):
+                live = found[epochs[found] == self._epochs[delta_slots[found]]]
+                slots = np.concatenate([slots, delta_slots[live]])
+                counts = np.concatenate([counts, delta_counts[live]])
+        return slots, counts.astype(np.float64)
+
+    def compact(self):
+        """
+        Merge the delta segment into the sorted postings and drop removed postings and terms
+        """
+        terms = np.repeat(np.arange(len(self._vocabulary), dtype=np.int32), np.diff(self._offsets))
+        keep = self._epochs[self._slots] == 0
+        delta_terms, delta_slots, delta_counts, epochs = self._delta()
+        delta_keep = epochs == self._epochs[delta_slots]
+        terms = np.concatenate([terms[keep], delta_terms[delta_keep]])
+        slots = np.concatenate([self._slots[keep], delta_slots[delta_keep]])
+        counts = np.concatenate([self._counts[keep], delta_counts[delta_keep]])
+        del delta_terms, delta_slots, delta_counts, epochs
+
+        # Renumber the terms still in use in vocabulary order
+        known = len(self._df)
+        live = np.flatnonzero(np.frombuffer(self._df, dtype=np.int32) > 0)
+        live_terms = [self._term(term_id) for term_id in live.tolist()]
+        order = sorted(range(len(live_terms)), key=live_terms.__getitem__)
+        renumber = np.full(known, -1, dtype=np.int32)
+        renumber[live[order]] = np.arange(len(order), dtype=np.int32)
+        terms = renumber[terms]
+
+        by_term = np.argsort(terms, kind="stable")
+        self._slots = slots[by_term]
+        self._counts = counts[by_term]
+        self._offsets = np.zeros(len(order) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(terms, minlength=len(order)), out=self._offsets[1:])
+        self._vocabulary = [live_terms[i] for i in order]
+        self._new_terms, self._new_sorted, self._new_ids = [], [], {}
+        self._df = array("i", np.diff(self._offsets).astype(np.int32).tobytes())
+        self._epochs[:] = 0
+        self._reset_delta()
+
+    def _compact_if_needed(self):
+        changed = len(self._delta_terms) + self._removed
+        if changed > max(_COMPACT_MIN_POSTINGS, len(self._slots) * SEARCH_COMPACT_FRACTION):
+            self.compact()
+
+    def _expand(self, prefix: str, limit: int) -> List[int]:
+        df, new_sorted = self._df, self._new_sorted
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        end = bisect.bisect_left(self._vocabulary, prefix + "\uffff", start)
+        term_ids = [term_id for term_id in range(start, end) if df[term_id] > 0]
+        start = bisect.bisect_left(new_sorted, prefix)
+        end = bisect.bisect_left(new_sorted, prefix + "\uffff", start)
+        new_ids = (self._new_ids[term] for term in new_sorted[start:end])
+        term_ids.extend(term_id for term_id in new_ids if df[term_id] > 0)
+        term_ids.sort(key=lambda term_id: (-df[term_id], self._term(term_id)))
+        return term_ids[:limit]
+
+    def expand(self, prefix: str, limit: int = SEARCH_PREFIX_EXPANSIONS) -> List[Tuple[str, int]]:
+        """
+        Vocabulary terms starting with prefix and the number of deals containing each,
+        most common first
+        """
+        return [(self._term(term_id), int(self._df[term_id])) for term_id in self._expand(prefix, limit)]
+
+    def _bm25(self, slots: np.ndarray, counts: np.ndarray, df: int) -> np.ndarray:
+        documents = self._documents
+        idf = math.log(1 + (documents - df + 0.5) / (df + 0.5))
+        average_length = self._total_length / documents if documents else 1.0
+        norm = SEARCH_BM25_K1 * (1 - SEARCH_BM25_B + SEARCH_BM25_B * self._lengths[slots] / average_length)
+        return idf * counts * (SEARCH_BM25_K1 + 1) / (counts + norm)
+
+    def score(self, query: str, prefix: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Slots of the deals matching any query word, and their BM25 scores. With prefix,
+        the last word also matches every term it starts (the most common ones), scored
+        as a single term.
+        """
+        written = split_words(query)
+        if not written:
+            return _EMPTY
+        words = [normalize_token(word) for word in written]
+        last = None
+        if prefix and query[-1:].isalnum():
+            # A word still being typed: expand it as written, plus its folded form below
+            last = written[-1]
+            words = words[:-1]
+
+        parts = []
+        for term in dict.fromkeys(words):
+            term_id = self._lookup(term)
+            if term_id is None or not self._df[term_id]:
+                continue
+            slots, counts = self._postings([term_id])
+            parts.append((slots, self._bm25(slots, counts, int(self._df[term_id]))))
+        if last:
+            term_ids = set(self._expand(last, SEARCH_PREFIX_EXPANSIONS))
+            folded_id = self._lookup(normalize_token(last))
+            if folded_id is not None and self._df[folded_id]:
+                term_ids.add(folded_id)
+            if term_ids:
+                slots, counts = self._postings(list(term_ids))
+                if len(term_ids) > 1:
+                    slots, inverse = np.unique(slots, return_inverse=True)
+                    counts = np.bincount(inverse, weights=counts)
+                parts.append((slots, self._bm25(slots, counts, len(slots))))
+
+        if not parts:
+            return _EMPTY
+        if len(parts) == 1:
+            return parts[0]
+        slots, inverse = np.unique(np.concatenate([pair[0] for pair in parts]), return_inverse=True)
+        return slots, np.bincount(inverse, weights=np.concatenate([pair[1] for pair in parts]))
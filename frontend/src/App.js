@@ -147,17 +147,19 @@ function App() {
       setIsGeocoding(false);
       
       try {
-        // Call the scrape-deals endpoint with the location information
+        // Queue a scrape job for this location; the server answers right away
         const scrapeResponse = await fetch(`${BACKEND_URL}/api/scrape-deals?location=${encodeURIComponent(locationInput)}&lat=${lat}&lng=${lon}&category=${filter.category}`, {
           method: 'POST',
-          // Set a longer timeout for this request
-          signal: AbortSignal.timeout(30000) // 30 second timeout
+          signal: AbortSignal.timeout(10000)
         });
         
         if (!scrapeResponse.ok) {
           throw new Error("Failed to scrape deals for this location");
         }
         
+        const scrapeJob = await scrapeResponse.json();
+        await waitForScrapeJob(scrapeJob.status_url, locationInput);
+        
         // Now fetch the deals with location name included to ensure proper filtering
         await fetchDeals(locationInput);
       } catch (scrapeErr) {
@@ -193,6 +195,37 @@ function App() {
     }
   };
 
+  // Poll a scrape job until it finishes, showing deals as each store's results land
+  const waitForScrapeJob = async (statusUrl, locationName, timeoutMs = 30000) => {
+    const deadline = Date.now() + timeoutMs;
+    let storesSeen = 0;
+    
+    while (Date.now() < deadline) {
+      const response = await fetch(`${BACKEND_URL}${statusUrl}`);
+      if (!response.ok) {
+        throw new Error("Failed to get scrape job status");
+      }
+      
+      const job = await response.json();
+      if (job.status === "completed") {
+        return job;
+      }
+      if (job.status === "failed") {
+        throw new Error(job.error || "Scrape job failed");
+      }
+      if (job.stores_done > storesSeen) {
+        storesSeen = job.stores_done;
+        await fetchDeals(locationName);
+      }
+      
+      await new Promise((resolve) => setTimeout(resolve, 1000));
+    }
+    
+    const timeoutError = new Error("Timed out waiting for scrape job");
+    timeoutError.name = "TimeoutError";
+    throw timeoutError;
+  };
+
   const handleCategoryChange = (e) => {
     setFilter({ ...filter, category: e.target.value });
   };